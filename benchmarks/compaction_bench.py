@@ -0,0 +1,104 @@
+"""월별 partition을 연도별 segment로 합치기 전후의 파일 수, 크기, 읽기 시간을 비교한다.
+
+가짜 시장의 여러 종목 몇 년치 분봉을 월별 partition으로 저장하고
+compaction 전후로 db 전체 읽기, 종목 하나 전체 읽기, 한달 구간 읽기, Close만 읽기 시간을 잰다.
+읽기는 매번 partition cache를 비우고 잰다.
+
+    python benchmarks/compaction_bench.py
+    python benchmarks/compaction_bench.py --tickers 50 --years 3 --format PARQUET --out compaction.json
+    python benchmarks/compaction_bench.py --compress          # pickle segment를 gzip으로 압축한다.
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import nodji as nd  # noqa: E402
+from nodji.data.dataframe_data.partition_compaction import compact_database  # noqa: E402
+from storage_bench import measure  # noqa: E402
+from synthetic_market import SyntheticMarket  # noqa: E402
+
+
+def save_market(market: SyntheticMarket, storage_format: nd.StorageFormat):
+    start = pd.Timestamp(market.start_ns, tz='Asia/Seoul')
+    end = pd.Timestamp(market.end_ns, tz='Asia/Seoul') - pd.Timedelta(minutes=1)
+    for ticker in market.tickers:
+        df = market.minute_ohlcv(ticker, start, end)
+        if not df.empty:
+            nd.DataFrameData(ticker, storage_format)(df).save()
+
+
+def measure_loads(market: SyntheticMarket, storage_format: nd.StorageFormat) -> dict:
+    ticker = market.tickers[0]
+    month = (nd.NTime(pd.Timestamp(market.start_ns, tz='Asia/Seoul') + pd.Timedelta(days=200)),
+             nd.NTime(pd.Timestamp(market.start_ns, tz='Asia/Seoul') + pd.Timedelta(days=230)))
+
+    def load(name=ticker, start_time=None, end_time=None, columns=None):
+        nd.partition_cache.clear()
+        return nd.DataFrameData(name, storage_format).load(start_time, end_time, columns)
+
+    def load_all():
+        for name in market.tickers:
+            load(name)
+
+    files = [path for path in nd.Paths.DATABASE.rglob('*') if path.is_file() and not path.name.endswith('.json')]
+    return {'files': len(files),
+            'bytes': sum(path.stat().st_size for path in files),
+            'load_database_sec': measure(load_all, repeat=2),
+            'load_ticker_sec': measure(load),
+            'load_month_sec': measure(lambda: load(start_time=month[0], end_time=month[1])),
+            'load_close_sec': measure(lambda: load(columns=['Close']))}
+
+
+def run(args) -> dict:
+    storage_format = nd.StorageFormat[args.format]
+    market = SyntheticMarket(args.tickers, start='2019-01-01', end=f"{2019 + args.years}-01-01")
+    database = nd.Paths.DATABASE
+    with tempfile.TemporaryDirectory() as tmp:
+        nd.Paths.DATABASE = Path(tmp)
+        try:
+            save_market(market, storage_format)
+            expected = {ticker: nd.DataFrameData(ticker, storage_format).load() for ticker in market.tickers[:3]}
+            before = measure_loads(market, storage_format)
+
+            started = time.perf_counter()
+            compaction = compact_database(compress=args.compress, storage_format=storage_format)
+            compaction_sec = time.perf_counter() - started
+
+            after = measure_loads(market, storage_format)
+            for ticker, df in expected.items():
+                nd.partition_cache.clear()
+                pd.testing.assert_frame_equal(nd.DataFrameData(ticker, storage_format).load(), df)
+        finally:
+            nd.Paths.DATABASE = database
+    return {'params': vars(args),
+            'compaction_sec': compaction_sec,
+            'segments_written': compaction.segments_written,
+            'before': before,
+            'after': after}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tickers', type=int, default=20)
+    parser.add_argument('--years', type=int, default=2)
+    parser.add_argument('--format', default='PICKLE', choices=[fmt.name for fmt in nd.StorageFormat])
+    parser.add_argument('--compress', action='store_true', help='pickle segment를 gzip으로 압축한다.')
+    parser.add_argument('--out', type=Path)
+    args = parser.parse_args()
+
+    results = run(args)
+    print(f"{'':<20}{'before':>14}{'after':>14}{'ratio':>8}")
+    for key, before in results['before'].items():
+        after = results['after'][key]
+        print(f"{key:<20}{before:>14,.3f}{after:>14,.3f}{after / before if before else 0:>8.2f}"
+              if isinstance(before, float) else
+              f"{key:<20}{before:>14,}{after:>14,}{after / before if before else 0:>8.2f}")
+    print(f"compaction {results['compaction_sec']:.1f} sec, {results['segments_written']} segments written")
+    if args.out:
+        args.out.write_text(json.dumps(results, indent=2, default=str))
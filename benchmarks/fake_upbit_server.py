@@ -0,0 +1,161 @@
+"""SyntheticMarket을 upbit quotation api처럼 보여주는 로컬 http 서버
+
+    /v1/market/all
+    /v1/candles/minutes/1?market=KRW-C0001&to=2020-01-01 00:00:00&count=200
+
+페이지:
+    to 이전(to 미포함)의 최근 count개(최대 200개) 캔들을 최신순으로 준다.
+    to가 시간대 없이 오면 UTC로 본다. (upbit과 같다)
+
+요청 제한:
+    그룹(market, candles)마다 1초에 requests_per_sec개까지 받고 넘으면 429를 준다.
+    응답에는 Remaining-Req 헤더를 붙인다.
+
+    python benchmarks/fake_upbit_server.py [port]
+"""
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+from synthetic_market import SyntheticMarket
+
+MAX_COUNT = 200
+
+
+class _RateWindow:
+    """그룹별 1초 구간의 요청 수"""
+
+    def __init__(self, requests_per_sec: int):
+        self.requests_per_sec = requests_per_sec
+        self._windows: dict[str, tuple[int, int]] = {}
+        self._lock = threading.Lock()
+
+    def take(self, group: str) -> int:
+        """요청 하나를 쓰고 남은 수를 반환한다. 음수면 제한에 걸린 것이다."""
+        second = int(time.monotonic())
+        with self._lock:
+            window, used = self._windows.get(group, (second, 0))
+            if window != second:
+                window, used = second, 0
+            used += 1
+            self._windows[group] = (window, used)
+            return self.requests_per_sec - used
+
+
+class FakeUpbitServer:
+    """fake upbit 서버
+
+    Notes:
+        stats:
+            requests: 받은 요청 수, throttled: 429로 거절한 수, candles: 보낸 캔들 수
+        latency:
+            응답마다 이 시간(초)만큼 기다린다. 네트워크 지연을 흉내낼 때 쓴다.
+    """
+
+    def __init__(self, market: SyntheticMarket, requests_per_sec: int = 10, latency: float = 0.0,
+                 host: str = '127.0.0.1', port: int = 0):
+        self.market = market
+        self.latency = latency
+        self.stats = {'requests': 0, 'throttled': 0, 'candles': 0}
+        self._rate = _RateWindow(requests_per_sec)
+        self._stats_lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _count(self, key: str, value: int = 1):
+        with self._stats_lock:
+            self.stats[key] += value
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = {key: values[0] for key, values in parse_qs(url.query).items()}
+                if url.path == '/v1/market/all':
+                    self._respond('market', lambda: server.market.markets)
+                elif url.path == '/v1/candles/minutes/1':
+                    self._respond('candles', lambda: server._candles(query))
+                else:
+                    self._send(404, {'error': {'name': 'not_found', 'message': url.path}}, None)
+
+            def _respond(self, group, make_body):
+                server._count('requests')
+                remaining = server._rate.take(group)
+                if server.latency:
+                    time.sleep(server.latency)
+                if remaining < 0:
+                    server._count('throttled')
+                    self._send(429, {'error': {'name': 'too_many_requests'}}, f"group={group}; min=0; sec=0")
+                    return
+                try:
+                    body = make_body()
+                except (KeyError, ValueError) as e:
+                    self._send(400, {'error': {'name': 'invalid_query', 'message': str(e)}}, None)
+                    return
+                self._send(200, body, f"group={group}; min=1800; sec={remaining}")
+
+            def _send(self, status, body, remaining_req):
+                data = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                if remaining_req:
+                    self.send_header('Remaining-Req', remaining_req)
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+    def _candles(self, query: dict) -> list[dict]:
+        ticker = query['market']
+        if ticker not in self.market.tickers:
+            raise ValueError(f"{ticker} is not a market")
+        count = min(int(query.get('count', MAX_COUNT)), MAX_COUNT)
+        to = pd.Timestamp(query['to']) if 'to' in query else pd.Timestamp.now(tz='UTC')
+        if to.tzinfo is None:
+            to = to.tz_localize('UTC')
+        candles = self.market.candles_before(ticker, to.value, count)
+        self._count('candles', len(candles))
+        return candles
+
+
+if __name__ == '__main__':
+    fake = FakeUpbitServer(SyntheticMarket(), port=int(sys.argv[1]) if len(sys.argv) > 1 else 0)
+    print(f"fake upbit at {fake.url}")
+    try:
+        fake._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,114 @@
+"""녹화한 upbit websocket 메시지를 replay 하는 로컬 서버
+
+CoinStreamIngestor를 실제 upbit에 연결하지 않고 확인할 때 쓴다.
+메시지는 CoinStreamIngestor(record_path=...)로 녹화한 jsonl이나 make_trade_messages로 만든다.
+
+    python benchmarks/fake_upbit_websocket.py recorded.jsonl [port]
+"""
+import json
+import sys
+import threading
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from websockets.sync.server import serve
+
+
+def load_messages(path) -> list[dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def make_trade_messages(tickers, start='2024-01-02 09:00', minutes=10, trades_per_minute=20, seed=0) -> list[dict]:
+    """종목들의 체결 메시지를 시간순으로 만든다. (upbit DEFAULT 형식의 필요한 필드만)"""
+    rng = np.random.default_rng(seed)
+    start_ms = pd.Timestamp(start, tz='Asia/Seoul').value // 1_000_000
+    messages = []
+    for i, ticker in enumerate(tickers):
+        count = minutes * trades_per_minute
+        times = start_ms + np.sort(rng.integers(0, minutes * 60_000, count))
+        prices = np.round(1000 * (i + 1) * np.exp(np.cumsum(rng.normal(0, 1e-3, count))), 1)
+        volumes = np.round(rng.exponential(1.0, count), 4)
+        for sequential_id, (t, price, volume) in enumerate(zip(times, prices, volumes)):
+            messages.append({'type': 'trade', 'code': ticker, 'trade_price': float(price),
+                             'trade_volume': float(volume), 'trade_timestamp': int(t),
+                             'timestamp': int(t), 'sequential_id': sequential_id, 'stream_type': 'REALTIME'})
+    messages.sort(key=lambda m: m['trade_timestamp'])
+    return messages
+
+
+class FakeUpbitWebSocketServer:
+    """구독 요청을 받으면 messages를 순서대로 보내는 서버
+
+    Notes:
+        disconnect_after:
+            연결마다 이 개수만큼 보내고 연결을 끊는다. 재연결을 확인할 때 쓴다.
+            다시 연결하면 끊긴 다음 메시지부터 이어서 보낸다.
+        구독한 종목(codes)의 메시지만 보낸다.
+        다 보내면 연결을 유지한 채로 기다린다.
+    """
+
+    def __init__(self, messages: list[dict], host: str = '127.0.0.1', port: int = 0,
+                 disconnect_after: Optional[int] = None):
+        self.messages = messages
+        self.disconnect_after = disconnect_after
+        self.connections = 0
+        self._position = 0
+        self._lock = threading.Lock()
+        self._server = serve(self._handle, host, port)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.socket.getsockname()[:2]
+        return f"ws://{host}:{port}"
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _handle(self, connection):
+        request = json.loads(connection.recv())
+        codes = {code for item in request if 'codes' in item for code in item['codes']}
+        with self._lock:
+            self.connections += 1
+        sent = 0
+        while True:
+            with self._lock:
+                if self._position >= len(self.messages):
+                    break
+                message = self.messages[self._position]
+                self._position += 1
+            if message.get('code') not in codes:
+                continue
+            connection.send(json.dumps(message).encode('utf-8'))
+            sent += 1
+            if self.disconnect_after is not None and sent >= self.disconnect_after:
+                connection.close()
+                return
+        for _ in connection:
+            pass
+
+
+if __name__ == '__main__':
+    server = FakeUpbitWebSocketServer(load_messages(Path(sys.argv[1])),
+                                      port=int(sys.argv[2]) if len(sys.argv) > 2 else 0)
+    print(f"replaying {len(server.messages)} messages at {server.url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,71 @@
+"""nodji import 시간을 잰다.
+
+python -X importtime 으로 새 프로세스에서 import 시간을 여러번 재서 중앙값을 쓴다.
+import nodji 만으로 무거운 모듈(pandas, numpy, requests, loguru ...)이 올라오면 실패로 본다.
+
+    python benchmarks/import_time_bench.py [결과.json] [--budget-ms 50]
+
+budget을 넘거나 무거운 모듈이 올라오면 exit code 1로 끝난다.
+"""
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT = Path(__file__).resolve().parent.parent
+
+SCENARIOS = {
+    'import nodji': 'import nodji',
+    'nd.NTime': 'import nodji as nd; nd.NTime.get_current_time()',
+    'nd.Assets': 'import nodji as nd; nd.Assets',
+}
+
+# import nodji 만으로는 올라오면 안되는 모듈들
+HEAVY_MODULES = ('pandas', 'numpy', 'requests', 'loguru', 'dateutil', 'smtplib', 'pyarrow')
+
+
+def measure_import(code: str, repeat: int = 7) -> dict:
+    """code를 새 프로세스에서 실행하고 nodji import 누적 시간(ms)과 올라온 무거운 모듈을 돌려준다."""
+    times = []
+    heavy = set()
+    for _ in range(repeat):
+        completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                                   cwd=PROJECT, capture_output=True, text=True, check=True)
+        total_us = 0
+        for line in completed.stderr.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            _, cumulative, raw_name = line[len('import time:'):].split('|')
+            name = raw_name.strip()
+            # 들여쓰기가 없는 최상위 nodji import들만 더한다. (lazy 속성으로 나중에 올라온 모듈 포함)
+            if name.split('.')[0] == 'nodji' and not raw_name.startswith('  '):
+                total_us += int(cumulative)
+            if name.split('.')[0] in HEAVY_MODULES:
+                heavy.add(name.split('.')[0])
+        times.append(total_us / 1000)
+    return {'median_ms': statistics.median(times), 'min_ms': min(times), 'heavy_modules': sorted(heavy)}
+
+
+def run() -> dict:
+    return {name: measure_import(code) for name, code in SCENARIOS.items()}
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    budget_ms = None
+    if '--budget-ms' in args:
+        i = args.index('--budget-ms')
+        budget_ms = float(args[i + 1])
+        del args[i:i + 2]
+
+    results = run()
+    print(f"{'scenario':<15}{'median(ms)':>12}{'min(ms)':>10}  heavy modules")
+    for name, r in results.items():
+        print(f"{name:<15}{r['median_ms']:>12.1f}{r['min_ms']:>10.1f}  {', '.join(r['heavy_modules']) or '-'}")
+    if args:
+        Path(args[0]).write_text(json.dumps(results, indent=2))
+
+    bare = results['import nodji']
+    failed = bool(bare['heavy_modules']) or (budget_ms is not None and bare['median_ms'] > budget_ms)
+    sys.exit(1 if failed else 0)
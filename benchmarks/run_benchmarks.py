@@ -0,0 +1,215 @@
+"""가짜 시장 데이터와 로컬 fake upbit 서버로 주요 경로들의 성능을 잰다.
+
+인터넷 연결 없이 돌아간다. 결과는 json으로 저장해서 버전끼리 비교한다.
+
+    python benchmarks/run_benchmarks.py                              # benchmarks/results/<시간>.json
+    python benchmarks/run_benchmarks.py --out result.json --compare benchmarks/results/이전.json
+    python benchmarks/run_benchmarks.py --tickers 300 --years 2 --update-tickers 20 --update-days 2
+    python benchmarks/run_benchmarks.py --metrics metrics.json     # 요청, 변환, 저장 metrics도 저장
+
+측정하는 것:
+    items_converter:
+        market/all 응답 -> CoinTable, db dataframe -> CoinTable
+    save:
+        한 종목 years년치 분봉 전체 저장, 하루치 append 저장
+    load:
+        전체, Close만, 한달 구간 읽기 (partition cache를 비운 경우와 cache에 있는 경우)
+    update:
+        fake 서버에서 update_tickers개 종목의 update_days일치를 처음 받기, 이어서 다시 업데이트 하기
+        요청 수와 429 수도 같이 기록한다.
+    response_cache:
+        응답 cache를 켜고 같은 과거 구간을 새 db에 두번 받기 (두번째는 cache에서 읽는다)
+"""
+import argparse
+import json
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import nodji as nd  # noqa: E402
+from nodji.assets.coin import Coin  # noqa: E402
+from nodji.assets.coin_table import CoinTable  # noqa: E402
+from nodji.assets.price_update_pool import PriceUpdatePool  # noqa: E402
+from nodji.external_apis import UpbitResponseCache, set_default_response_cache, upbit_transport  # noqa: E402
+from fake_upbit_server import FakeUpbitServer  # noqa: E402
+from storage_bench import measure  # noqa: E402
+from synthetic_market import SyntheticMarket  # noqa: E402
+
+RESULTS = Path(__file__).resolve().parent / 'results'
+
+
+def bench_items_converter(market: SyntheticMarket) -> dict:
+    table = CoinTable.from_api(market.markets)
+    df = table.to_dataframe()
+    return {'tickers': len(market.markets),
+            'from_api_sec': measure(lambda: CoinTable.from_api(market.markets)),
+            'from_dataframe_sec': measure(lambda: CoinTable.from_dataframe(df)),
+            'to_dataframe_sec': measure(lambda: table.to_dataframe())}
+
+
+def bench_save_load(market: SyntheticMarket, years: int) -> dict:
+    ticker = market.tickers[1]
+    start = pd.Timestamp(market.start_ns, tz='Asia/Seoul')
+    end = start + pd.DateOffset(years=years)
+    df = market.minute_ohlcv(ticker, start, end)
+    day = market.minute_ohlcv(ticker, end, end + pd.Timedelta(days=1))
+
+    def save_all():
+        shutil.rmtree(nd.Paths.DATABASE / ticker, ignore_errors=True)
+        data = nd.DataFrameData(ticker)
+        data(df)
+        data.save()
+
+    save_sec = measure(save_all, repeat=3)
+    started = time.perf_counter()
+    nd.DataFrameData(ticker).append(day)
+    append_sec = time.perf_counter() - started
+
+    def load(start_time=None, end_time=None, columns=None, cached=False):
+        if not cached:
+            nd.partition_cache.clear()
+        return nd.DataFrameData(ticker).load(start_time, end_time, columns)
+
+    month = nd.NTime(start + pd.Timedelta(days=200)), nd.NTime(start + pd.Timedelta(days=230))
+    return {'rows': len(df),
+            'save_all_sec': save_sec,
+            'append_day_sec': append_sec,
+            'load_all_sec': measure(load),
+            'load_close_sec': measure(lambda: load(columns=['Close'])),
+            'load_month_sec': measure(lambda: load(*month)),
+            'load_all_cached_sec': measure(lambda: load(cached=True))}
+
+
+def bench_update(market: SyntheticMarket, server: FakeUpbitServer, tickers: int, days: int, jobs: int) -> dict:
+    coins = [Coin(ticker, '', '', False) for ticker in market.tickers[:tickers]]
+    end = pd.Timestamp(market.end_ns, tz='Asia/Seoul') - pd.Timedelta(hours=1)
+    start_time, end_time = nd.NTime(end - pd.Timedelta(days=days)), nd.NTime(end)
+    pool = PriceUpdatePool(jobs)
+
+    results = {}
+    for name in ('initial', 'incremental'):
+        before = dict(server.stats)
+        started = time.perf_counter()
+        report = pool(coins, start_time=start_time, end_time=end_time)
+        results[name] = {'sec': time.perf_counter() - started,
+                         'failed': len(report.failed),
+                         'requests': server.stats['requests'] - before['requests'],
+                         'throttled': server.stats['throttled'] - before['throttled'],
+                         'candles': server.stats['candles'] - before['candles']}
+    results.update({'tickers': tickers, 'days': days, 'jobs': jobs})
+    return results
+
+
+def bench_response_cache(market: SyntheticMarket, server: FakeUpbitServer, tickers: int, days: int,
+                         jobs: int) -> dict:
+    """응답 cache를 켜고 같은 구간을 새 db에 두번 받는다. 두번째는 cache에서 읽는다."""
+    coins = [Coin(ticker, '', '', False) for ticker in market.tickers[:tickers]]
+    end = pd.Timestamp(market.end_ns, tz='Asia/Seoul') - pd.Timedelta(days=days + 1)
+    start_time, end_time = nd.NTime(end - pd.Timedelta(days=days)), nd.NTime(end)
+    pool = PriceUpdatePool(jobs)
+    cache = UpbitResponseCache(nd.Paths.DATABASE / '.upbit_cache')
+    set_default_response_cache(cache)
+    results = {}
+    try:
+        for name in ('cold', 'warm'):
+            for coin in coins:
+                shutil.rmtree(nd.Paths.DATABASE / coin.ticker, ignore_errors=True)
+            nd.partition_cache.clear()
+            before = dict(server.stats)
+            started = time.perf_counter()
+            pool(coins, start_time=start_time, end_time=end_time)
+            results[name] = {'sec': time.perf_counter() - started,
+                             'requests': server.stats['requests'] - before['requests']}
+    finally:
+        set_default_response_cache(None)
+    results['cache'] = cache.stats
+    return results
+
+
+def get_version() -> str:
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], capture_output=True, text=True,
+                              cwd=Path(__file__).resolve().parent).stdout.strip()
+    except OSError:
+        return 'unknown'
+
+
+def run(args) -> dict:
+    market = SyntheticMarket(args.tickers, start='2019-01-01', end=f"{2019 + args.years + 1}-01-01")
+    results = {'version': get_version(),
+               'created': pd.Timestamp.now(tz='Asia/Seoul').isoformat(),
+               'python': platform.python_version(),
+               'params': vars(args),
+               'benchmarks': {}}
+
+    database = nd.Paths.DATABASE
+    with tempfile.TemporaryDirectory() as tmp, FakeUpbitServer(market, args.server_rps) as server:
+        nd.Paths.DATABASE = Path(tmp)
+        nd.external_apis.Upbit.BASE_URL = server.url
+        upbit_transport.set_default_transport(upbit_transport.UpbitTransport(requests_per_sec=args.client_rps))
+        try:
+            results['benchmarks']['items_converter'] = bench_items_converter(market)
+            results['benchmarks']['save_load'] = bench_save_load(market, args.years)
+            results['benchmarks']['update'] = bench_update(market, server, args.update_tickers, args.update_days,
+                                                           args.jobs)
+            results['benchmarks']['response_cache'] = bench_response_cache(market, server, args.update_tickers,
+                                                                           args.update_days, args.jobs)
+        finally:
+            nd.Paths.DATABASE = database
+            upbit_transport.set_default_transport(None)
+    return results
+
+
+def compare(results: dict, previous: dict):
+    """이전 결과와 시간(_sec)들을 비교해서 출력한다."""
+    print(f"\ncompare with {previous.get('version')}")
+    for group, values in results['benchmarks'].items():
+        for key, value in _flatten(values):
+            old = dict(_flatten(previous.get('benchmarks', {}).get(group, {}))).get(key)
+            if key.endswith('sec') and old:
+                print(f"{group + '.' + key:<40}{old:>10.3f}{value:>10.3f}{value / old:>8.2f}x")
+
+
+def _flatten(values: dict, prefix=''):
+    for key, value in values.items():
+        if isinstance(value, dict):
+            yield from _flatten(value, f"{prefix}{key}.")
+        else:
+            yield f"{prefix}{key}", value
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tickers', type=int, default=300)
+    parser.add_argument('--years', type=int, default=2)
+    parser.add_argument('--update-tickers', type=int, default=20)
+    parser.add_argument('--update-days', type=int, default=2)
+    parser.add_argument('--jobs', type=int, default=8)
+    parser.add_argument('--server-rps', type=int, default=100, help='fake 서버의 그룹별 초당 요청 제한')
+    parser.add_argument('--client-rps', type=float, default=120, help='transport의 초당 요청 수 (서버보다 크면 429가 난다)')
+    parser.add_argument('--out', type=Path)
+    parser.add_argument('--compare', type=Path)
+    parser.add_argument('--metrics', type=Path, help='nd.metrics를 켜고 json으로 저장할 경로')
+    args = parser.parse_args()
+
+    if args.metrics:
+        nd.metrics.enable()
+    results = run(args)
+    if args.metrics:
+        nd.metrics.write_json(args.metrics)
+    for key, value in _flatten(results['benchmarks']):
+        print(f"{key:<45}{value:>12.3f}" if isinstance(value, float) else f"{key:<45}{value:>12}")
+
+    out = args.out or RESULTS / f"{pd.Timestamp.now():%Y%m%d_%H%M%S}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(results, indent=2, default=str))
+    print(f"\nsaved to {out}")
+    if args.compare:
+        compare(results, json.loads(args.compare.read_text()))
@@ -0,0 +1,96 @@
+"""저장 형식별 디스크 크기와 읽기 시간을 비교한다.
+
+1년치 분단위 ohlcv를 만들어서 형식별로 저장하고
+전체 읽기와 Close, Volume만 읽는 시간을 잰다.
+형식마다 compact schema로 저장한 경우(_COMPACT)도 같이 재고, 읽은 dataframe의 메모리 크기도 기록한다.
+재기 전에 형식마다 업데이트처럼 읽고, 새 행을 더하고, 다시 저장할 수 있는지 확인한다. (check_update)
+
+    python benchmarks/storage_bench.py
+"""
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import nodji as nd  # noqa: E402
+from nodji.common.dataframe_formats import get_dataframe_format  # noqa: E402
+from nodji.data.dataframe_data.compact_schema import decode_compact_schema, encode_compact_schema  # noqa: E402
+
+
+def make_minute_ohlcv(start='2023-01-01', periods=365 * 24 * 60, seed=0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(start, periods=periods, freq='min', tz=nd.TimeZone.SEOUL.value, name='date')
+    close = np.round(30_000_000 * np.exp(np.cumsum(rng.normal(0, 5e-4, periods))), -3)
+    open_ = np.roll(close, 1)
+    open_[0] = close[0]
+    spread = np.round(np.abs(rng.normal(0, 2e-4, periods)) * close, -3)
+    volume = np.round(rng.exponential(0.5, periods), 8)
+    return pd.DataFrame({'Open': open_,
+                         'High': np.maximum(open_, close) + spread,
+                         'Low': np.minimum(open_, close) - spread,
+                         'Close': close,
+                         'TradePrice': np.round(volume * close, 2),
+                         'Volume': volume}, index=index)
+
+
+def measure(func, repeat=5) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def check_update(df: pd.DataFrame, storage_format: nd.StorageFormat, compact_schema: bool, directory: Path):
+    """업데이트와 같은 순서로 저장된 partition을 읽고 새로 받은 행들을 더해서 다시 저장한 뒤 비교한다."""
+    name = f"update_{storage_format.name}_{compact_schema}"
+    half = len(df) // 2
+    nd.DataFrameData(name, storage_format, directory, compact_schema)(df.iloc[:half]).save()
+
+    data = nd.DataFrameData(name, storage_format, directory, compact_schema)
+    data.load()
+    data += df.iloc[half:]
+    data.save()
+
+    nd.partition_cache.clear()
+    loaded = nd.DataFrameData(name, storage_format, directory, compact_schema).load()
+    assert isinstance(loaded.index, pd.DatetimeIndex), f"{name} index is {type(loaded.index).__name__}"
+    pd.testing.assert_frame_equal(loaded, df, check_freq=False, check_dtype=not compact_schema)
+
+
+def run(df: pd.DataFrame) -> dict:
+    results = {}
+    compact_df = encode_compact_schema(df)
+    with tempfile.TemporaryDirectory() as tmp:
+        for storage_format in nd.StorageFormat:
+            for compact_schema in (False, True):
+                check_update(df.iloc[:3 * 24 * 60], storage_format, compact_schema, Path(tmp))
+            fmt = get_dataframe_format(storage_format)
+            for name, saved_df in ((storage_format.name, df), (f"{storage_format.name}_COMPACT", compact_df)):
+                path = Path(tmp) / f"{name}.{fmt.extension}"
+                save_time = measure(lambda: fmt.save(saved_df, path), repeat=1)
+                results[name] = {
+                    'bytes': path.stat().st_size,
+                    'memory_bytes': int(decode_compact_schema(fmt.load(path)).memory_usage(index=True).sum()),
+                    'save_sec': save_time,
+                    'load_sec': measure(lambda: decode_compact_schema(fmt.load(path))),
+                    'load_close_volume_sec': measure(
+                        lambda: decode_compact_schema(fmt.load(path, ['Close', 'Volume']))),
+                }
+    return results
+
+
+if __name__ == '__main__':
+    results = run(make_minute_ohlcv())
+    print(f"{'format':<18}{'MB':>10}{'memory MB':>12}{'save(s)':>10}{'load(s)':>10}{'Close,Volume(s)':>18}")
+    for name, r in results.items():
+        print(f"{name:<18}{r['bytes'] / 2 ** 20:>10.1f}{r['memory_bytes'] / 2 ** 20:>12.1f}{r['save_sec']:>10.3f}"
+              f"{r['load_sec']:>10.3f}{r['load_close_volume_sec']:>18.3f}")
+    if len(sys.argv) > 1:
+        Path(sys.argv[1]).write_text(json.dumps(results, indent=2))
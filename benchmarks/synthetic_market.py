@@ -0,0 +1,140 @@
+"""벤치마크용 가짜 시장 데이터
+
+수백개 종목의 몇 년치 분봉을 미리 만들어두지 않는다.
+(종목, 분)마다 정해진 hash로 값을 만들어서 어떤 구간이든 필요할때 같은 값을 만든다.
+그래서 fake 서버의 페이지 요청도, 저장/읽기 벤치마크의 dataframe도 같은 데이터를 쓴다.
+
+    market = SyntheticMarket(tickers=300, start='2019-01-01', end='2021-01-01')
+    market.markets                       # /v1/market/all 응답
+    market.candles_before('KRW-C0001', to_ns, 200)   # /v1/candles/minutes/1 응답
+    market.minute_ohlcv('KRW-C0001', start, end)     # 같은 구간의 dataframe
+"""
+import numpy as np
+import pandas as pd
+
+MINUTE_NS = 60 * 10 ** 9
+SEOUL = 'Asia/Seoul'
+
+
+def _splitmix64(x: np.ndarray) -> np.ndarray:
+    with np.errstate(over='ignore'):
+        z = x.astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return z ^ (z >> np.uint64(31))
+
+
+def _to_ns(time) -> int:
+    """시간대가 없으면 서울 시간으로 본다."""
+    time = pd.Timestamp(time)
+    return (time.tz_localize(SEOUL) if time.tzinfo is None else time).value
+
+
+class SyntheticMarket:
+    """hash로 만든 여러 종목의 분봉 시장
+
+    Notes:
+        거래가 없는 분:
+            분마다 tradeless_ratio 확률로 캔들이 없다.
+        상장:
+            절반 정도의 종목은 start 이후 중간에 상장한다. 상장 전에는 캔들이 없다.
+        가격:
+            종목마다 다른 주기의 사인파에 잡음을 섞었다. 분끼리 독립적으로 계산할 수 있게 하려고
+            random walk를 쓰지 않았다.
+    """
+    QUOTES = ('KRW', 'KRW', 'KRW', 'BTC', 'USDT')
+
+    def __init__(self, tickers: int = 300, start='2019-01-01', end='2021-01-01', tradeless_ratio: float = 0.3,
+                 seed: int = 0):
+        self.start_ns = _to_ns(start)
+        self.end_ns = _to_ns(end)
+        self.tradeless_ratio = tradeless_ratio
+        rng = np.random.default_rng(seed)
+        self.tickers = [f"{self.QUOTES[i % len(self.QUOTES)]}-C{i:04d}" for i in range(tickers)]
+        self._seeds = {ticker: int(s) for ticker, s in zip(self.tickers, rng.integers(1, 2 ** 62, tickers))}
+        minutes = (self.end_ns - self.start_ns) // MINUTE_NS
+        listing = np.where(rng.random(tickers) < 0.5, 0, rng.integers(0, minutes // 2, tickers))
+        self._listing_minute = dict(zip(self.tickers, listing.tolist()))
+        self._base_price = dict(zip(self.tickers, np.round(10 ** rng.uniform(1, 7, tickers), 0).tolist()))
+        self.markets = [self._market_item(i, ticker, rng) for i, ticker in enumerate(self.tickers)]
+
+    def listing_time(self, ticker: str) -> pd.Timestamp:
+        return pd.Timestamp(self.start_ns + self._listing_minute[ticker] * MINUTE_NS, tz=SEOUL)
+
+    def traded_minutes(self, ticker: str, first: int, last: int) -> np.ndarray:
+        """[first, last) 분 중에 거래가 있는 분들 (start부터 센 분 번호)"""
+        first = max(first, self._listing_minute[ticker])
+        last = min(last, (self.end_ns - self.start_ns) // MINUTE_NS)
+        if first >= last:
+            return np.array([], dtype=np.int64)
+        minutes = np.arange(first, last, dtype=np.int64)
+        u = self._uniform(ticker, minutes, 0)
+        return minutes[u >= self.tradeless_ratio]
+
+    def ohlcv(self, ticker: str, minutes: np.ndarray) -> dict[str, np.ndarray]:
+        base = self._base_price[ticker]
+        t = minutes.astype(np.float64)
+        phase = self._seeds[ticker] % 1000
+        level = base * np.exp(0.3 * np.sin(2 * np.pi * (t + phase) / 43_200) + 0.05 * np.sin(2 * np.pi * t / 1_440))
+        close = np.round(level * (1 + 0.002 * (self._uniform(ticker, minutes, 1) - 0.5)), 2)
+        open_ = np.round(level * (1 + 0.002 * (self._uniform(ticker, minutes, 2) - 0.5)), 2)
+        spread = level * 0.001 * self._uniform(ticker, minutes, 3)
+        volume = np.round(-np.log1p(-self._uniform(ticker, minutes, 4) * 0.999) * 1000 / base, 8)
+        return {'Open': open_,
+                'High': np.round(np.maximum(open_, close) + spread, 2),
+                'Low': np.round(np.minimum(open_, close) - spread, 2),
+                'Close': close,
+                'TradePrice': np.round(volume * close, 2),
+                'Volume': volume}
+
+    def minute_ohlcv(self, ticker: str, start, end) -> pd.DataFrame:
+        """[start, end) 구간의 분봉 dataframe (CoinPriceConverter와 같은 형식)"""
+        first = (_to_ns(start) - self.start_ns) // MINUTE_NS
+        last = (_to_ns(end) - self.start_ns) // MINUTE_NS
+        minutes = self.traded_minutes(ticker, first, last)
+        index = pd.DatetimeIndex(self.start_ns + minutes * MINUTE_NS, tz='UTC').tz_convert(SEOUL).rename('date')
+        return pd.DataFrame(self.ohlcv(ticker, minutes), index=index)
+
+    def candles_before(self, ticker: str, to_ns: int, count: int) -> list[dict]:
+        """to_ns 이전(to_ns 미포함)의 최근 count개 캔들. upbit처럼 최신 캔들이 앞에 온다."""
+        last = -(-(to_ns - self.start_ns) // MINUTE_NS)
+        floor = self._listing_minute.get(ticker, 0)
+        span = int(count / max(1 - self.tradeless_ratio, 0.05) * 1.2) + 1
+        minutes = np.array([], dtype=np.int64)
+        first = last
+        while len(minutes) < count and first > floor:
+            first = max(floor, first - span)
+            minutes = self.traded_minutes(ticker, first, last)
+            span *= 2
+        minutes = minutes[-count:][::-1]
+        values = self.ohlcv(ticker, minutes)
+        times = pd.DatetimeIndex(self.start_ns + minutes * MINUTE_NS, tz='UTC')
+        utc = times.strftime('%Y-%m-%dT%H:%M:%S')
+        kst = times.tz_convert(SEOUL).strftime('%Y-%m-%dT%H:%M:%S')
+        return [{'market': ticker,
+                 'candle_date_time_utc': utc[i],
+                 'candle_date_time_kst': kst[i],
+                 'opening_price': values['Open'][i],
+                 'high_price': values['High'][i],
+                 'low_price': values['Low'][i],
+                 'trade_price': values['Close'][i],
+                 'timestamp': int(times.asi8[i] // 10 ** 6 + 59_000),
+                 'candle_acc_trade_price': values['TradePrice'][i],
+                 'candle_acc_trade_volume': values['Volume'][i],
+                 'unit': 1} for i in range(len(minutes))]
+
+    def _uniform(self, ticker: str, minutes: np.ndarray, k: int) -> np.ndarray:
+        keys = (minutes.astype(np.uint64) * np.uint64(8) + np.uint64(k)) ^ np.uint64(self._seeds[ticker])
+        return (_splitmix64(keys) >> np.uint64(11)).astype(np.float64) / float(2 ** 53)
+
+    def _market_item(self, i: int, ticker: str, rng) -> dict:
+        caution = rng.random(5) < 0.03
+        return {'market': ticker,
+                'korean_name': f"코인{i}",
+                'english_name': f"Coin{i}",
+                'market_event': {'warning': bool(rng.random() < 0.05),
+                                 'caution': {'PRICE_FLUCTUATIONS': bool(caution[0]),
+                                             'TRADING_VOLUME_SOARING': bool(caution[1]),
+                                             'DEPOSIT_AMOUNT_SOARING': bool(caution[2]),
+                                             'GLOBAL_PRICE_DIFFERENCES': bool(caution[3]),
+                                             'CONCENTRATION_OF_SMALL_ACCOUNTS': bool(caution[4])}}}
@@ -0,0 +1,17 @@
+import signal
+import sys
+
+import nodji as nd
+from nodji.data.collectors.price_collectors.coin_stream_ingestor import CoinStreamIngestor
+nd.log(nd.LogLevel.INFO)
+
+# KRW 마켓 전체의 체결을 받아서 분봉으로 저장한다. Ctrl+C로 멈춘다.
+# 로컬 replay 서버에 연결하려면 주소를 넣는다.
+#   python benchmarks/fake_upbit_websocket.py recorded.jsonl 8765
+#   python execute/coin_stream_exec.py ws://127.0.0.1:8765
+coins = nd.Assets().coins.by_quote('KRW')
+ingestor = CoinStreamIngestor(coins, url=sys.argv[1] if len(sys.argv) > 1 else None, record_path=None)
+signal.signal(signal.SIGINT, lambda *_: ingestor.stop())
+signal.signal(signal.SIGTERM, lambda *_: ingestor.stop())
+ingestor.run()
+print(f"{ingestor.bars_saved} bars saved")
@@ -0,0 +1,7 @@
+import nodji as nd
+nd.log(nd.LogLevel.INFO)
+
+# db 폴더 전체에서 이번 달을 뺀 월별 partition들을 연도별 segment로 합친다.
+# 업데이트 scheduler가 돌고 있지 않을 때 실행한다.
+result = nd.compact_database(hot_months=1)
+print(result)
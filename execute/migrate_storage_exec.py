@@ -0,0 +1,7 @@
+
+import nodji as nd
+nd.log(nd.LogLevel.INFO)
+
+# db 폴더 전체를 parquet으로 바꾼다.
+migrated = nd.migrate_database(nd.StorageFormat.PARQUET, remove_old=False)
+print(f"{len(migrated)} files migrated")
@@ -3,6 +3,6 @@ import nodji as nd
 
 time = nd.NTime.get_current_time()
 print(time.min)
-time.min += 6
+time = time.shift(minutes=6)
 print(time.min)
 print(time)
\ No newline at end of file
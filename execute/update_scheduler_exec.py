@@ -0,0 +1,11 @@
+import signal
+
+import nodji as nd
+nd.log(nd.LogLevel.INFO)
+
+# KRW 마켓 전체의 분봉을 계속 최신으로 유지하고, 남는 요청으로 과거 데이터를 받는다. Ctrl+C로 멈춘다.
+# 멈추면 진행 중인 업데이트를 마치고 queue(db/.scheduler/queue.json)를 저장한다.
+scheduler = nd.UpdateScheduler()
+signal.signal(signal.SIGINT, lambda *_: scheduler.stop())
+signal.signal(signal.SIGTERM, lambda *_: scheduler.stop())
+scheduler.run()
@@ -1,7 +1,53 @@
+"""nodji
+
+Notes:
+    import 속도:
+        import nodji 만으로는 pandas, requests, loguru 같은 무거운 모듈을 import 하지 않는다.
+        nd.Assets, nd.NTime 처럼 처음 접근할때 해당 모듈을 import 한다. (__getattr__)
+        무엇을 어디서 가져오는지는 _LAZY_ATTRIBUTES에 적는다.
+
+    로그:
+        nd.log를 직접 부르지 않았다면 처음 lazy 속성에 접근할때 WARNING 레벨로 설정한다.
+
+    startup 시간은 benchmarks/import_time_bench.py로 확인한다.
+"""
 import sys
+from importlib import import_module
 
-from loguru import logger
 from .common.types import *
+from .common.paths import Paths
+
+# 속성 이름 -> (모듈, 모듈 안의 이름), 이름이 None이면 모듈 자체
+_LAZY_ATTRIBUTES = {
+    'Assets': ('.assets', 'Assets'),
+    'consts': ('.common.constants', None),
+    'load_dataframe_file': ('.common.dataframe', 'load_dataframe_file'),
+    'save_dataframe_file': ('.common.dataframe', 'save_dataframe_file'),
+    'merge_dataframe_by_date': ('.common.dataframe', 'merge_dataframe_by_date'),
+    'exists_directory': ('.common.file_utils', 'exists_directory'),
+    'exists_path': ('.common.file_utils', 'exists_path'),
+    'make_directory': ('.common.file_utils', 'make_directory'),
+    'delete_directory': ('.common.file_utils', 'delete_directory'),
+    'get_file_name': ('.common.file_utils', 'get_file_name'),
+    'get_file_extension': ('.common.file_utils', 'get_file_extension'),
+    'NTime': ('.common.ntime', 'NTime'),
+    'NTimeArray': ('.common.ntime_array', 'NTimeArray'),
+    'metrics': ('.common.metrics', 'metrics'),
+    'external_apis': ('.external_apis', None),
+    'DataFrameData': ('.data.dataframe_data.datafame_data', 'DataFrameData'),
+    'migrate_database': ('.data.dataframe_data.storage_migration', 'migrate_database'),
+    'compact_database': ('.data.dataframe_data.partition_compaction', 'compact_database'),
+    'partition_cache': ('.data.dataframe_data.partition_cache', 'partition_cache'),
+    'UpdateScheduler': ('.scheduler', 'UpdateScheduler'),
+    'Email': ('.utils.emailUtil', 'Email'),
+    'email_lotto_numbers': ('.utils.lotto', 'email_lotto_numbers'),
+}
+
+# 가벼워서 로그 설정 없이 바로 가져와도 되는 속성들
+_LIGHT_ATTRIBUTES = {'NTime', 'consts', 'metrics', 'exists_directory', 'exists_path', 'make_directory', 'delete_directory',
+                     'get_file_name', 'get_file_extension'}
+
+_log_configured = False
 
 
 def _custom_formatter(record):
@@ -10,11 +56,15 @@ def _custom_formatter(record):
 
 
 def log(level: LogLevel, output_to_file: bool = False, file_path: str = None):
+    global _log_configured
     assert isinstance(level, LogLevel), 'level should be LogLevel'
+    from loguru import logger
+
+    _log_configured = True
     logger.remove()
     if output_to_file:
         if file_path is None:
-            file_path = Paths.MODULE + '/log.log'
+            file_path = Paths.MODULE / 'log.log'
         logger.add(file_path, format=_custom_formatter, level=str(level.name), rotation="10 MB")
     else:
         logger.add(
@@ -25,15 +75,19 @@ def log(level: LogLevel, output_to_file: bool = False, file_path: str = None):
             colorize=True)
 
 
-log(LogLevel.WARNING)
+def __getattr__(name):
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-from .assets import Assets
-from .common import constants as consts
-from .common.paths import Paths
-from .common.dataframe import *
-from .common.file_utils import *
-from .common.ntime import NTime
-from . import external_apis
-from nodji.data.dataframe_data.datafame_data import DataFrameData
-from .utils.emailUtil import Email
-from .utils.lotto import email_lotto_numbers
+    if not _log_configured and name not in _LIGHT_ATTRIBUTES:
+        log(LogLevel.WARNING)
+
+    module_name, attribute = _LAZY_ATTRIBUTES[name]
+    module = import_module(module_name, __name__)
+    value = module if attribute is None else getattr(module, attribute)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
@@ -1,5 +1,9 @@
+from itertools import chain
+
 from .coins import Coins
-from .assets_base import AssetsBase
+from .assets_base import AssetsBase, TickerAssetsBase
+from ..data.price_datas.price_panel import PricePanel, load_price_panel
+from .price_update_pool import PriceUpdateReport
 
 
 class Assets:
@@ -18,17 +22,35 @@ class Assets:
             if isinstance(assets, AssetsBase):
                 yield assets
 
-    def update(self):
+    def panel(self, field: str = 'Close', start_time=None, end_time=None, freq: str = '1min',
+              jobs: int = 8) -> PricePanel:
+        """ticker가 있는 모든 종목의 가격 field 하나를 (시간, 종목) 행렬로 읽는다."""
+        assets = chain.from_iterable(assets for assets in self._all_asset_sequences
+                                     if isinstance(assets, TickerAssetsBase))
+        return load_price_panel(assets, field, start_time, end_time, freq, jobs)
+
+    def update(self, jobs: int = 1) -> PriceUpdateReport:
         """모든 asset 관련된 정보들을 업데이트 한다."""
         self.update_item()
-        self.update_price()
+        return self.update_price(jobs=jobs)
 
     def update_item(self):
         """종류별로 각 종목들을 업데이트 한다."""
         for assets in self._all_asset_sequences:
             assets.update_item()
 
-    def update_price(self):
-        """모든 종목들의 가격을 업데이트 한다."""
+    def update_price(self, jobs: int = 1) -> PriceUpdateReport:
+        """모든 종목들의 가격을 업데이트 한다.
+
+        Args:
+            jobs:
+                동시에 업데이트 할 종목의 수
+                요청 제한은 모든 종목이 공유하므로 jobs를 늘려도 한도를 넘지 않는다.
+
+        Returns:
+            종목별 성공, 실패를 모은 report
+        """
+        report = PriceUpdateReport()
         for assets in self._all_asset_sequences:
-            assets.update_price()
+            report += assets.update_price(jobs=jobs)
+        return report
@@ -4,15 +4,23 @@ from ..data.price_datas.asset_price_data_base import AssetPriceDataBase
 
 @dataclass
 class AssetBase:
+    __slots__ = ()
+
     @property
     def price(self):
         return AssetPriceDataBase(self)
 
-    def update_price(self, start_time=None, end_time=None):
-        """가격 정보를 업데이트 한다."""
-        self.price.update(start_time=start_time, end_time=end_time)
+    def update_price(self, start_time=None, end_time=None, jobs: int = 1):
+        """가격 정보를 업데이트 한다.
+
+        Args:
+            jobs:
+                동시에 보낼 요청의 수
+        """
+        self.price.update(start_time=start_time, end_time=end_time, jobs=jobs)
 
 
 @dataclass
 class TickerAssetBase(AssetBase):
+    __slots__ = ('ticker',)
     ticker: str
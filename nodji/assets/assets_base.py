@@ -1,6 +1,9 @@
-from typing import Sequence
+from typing import Callable, Iterable, Sequence
 import nodji as nd
 from .asset_base import AssetBase, TickerAssetBase
+from .assets_view import TickerAssetsView
+from .price_update_pool import PriceUpdatePool, PriceUpdateReport
+from ..data.price_datas.price_panel import PricePanel, load_price_panel
 
 
 class AssetsBase(Sequence[AssetBase]):
@@ -12,8 +15,13 @@ class AssetsBase(Sequence[AssetBase]):
         Notes:
             _asset_data_conv:
                 데이터베이스에 저장된 데이터를 asset 객체로 변환하는 함수
+
+            _generation:
+                _set_assets로 어셋 리스트가 바뀔때마다 1씩 늘어난다.
+                view가 만들어진 뒤에 리스트가 바뀌었는지 확인할때 쓴다.
         """
         self._assets = []
+        self._generation = 0
         self._data = nd.DataFrameData(self._name)
         self._load_asset_items()
 
@@ -44,35 +52,102 @@ class AssetsBase(Sequence[AssetBase]):
         """어셋들의 종복 정보들을 업데이트 해준다."""
         raise NotImplementedError(f"update_item method must be implemented in {self.__class__.__name__}")
 
-    def update_price(self):
-        """어셋의 가격정보를 업데이트 한다."""
-        for asset in self:
-            asset.update_price()
+    def update_price(self, start_time=None, end_time=None, jobs: int = 1) -> PriceUpdateReport:
+        """어셋의 가격정보를 업데이트 한다.
+
+        Args:
+            jobs:
+                동시에 업데이트 할 종목의 수
+        """
+        return PriceUpdatePool(jobs)(self, start_time=start_time, end_time=end_time)
 
     def _load_asset_items(self):
         """어셋의 리스트들을 디비에서 읽어온다"""
-        self._assets = self._items_conv.dataframe_to_asset_items(self._data.load())
+        self._set_assets(self._items_conv.dataframe_to_asset_items(self._data.load()))
+
+    def _set_assets(self, assets: list[AssetBase]):
+        """어셋 리스트를 바꾸고 index들을 다시 만든다.
+
+        _assets를 바꿀때는 항상 이 함수를 거쳐야 index가 어긋나지 않는다.
+        """
+        self._assets = assets
+        self._generation += 1
+        self._build_indexes()
+
+    def _build_indexes(self):
+        """어셋 리스트로 조회용 index를 만든다. 필요한 자식 클래스에서 구현한다."""
 
 
 class TickerAssetsBase(AssetsBase):
-    """ticker asset 시퀀스 클래스들의 부모 클래스이다."""
+    """ticker asset 시퀀스 클래스들의 부모 클래스이다.
+
+    Notes:
+        _ticker_index:
+            ticker -> _assets 안에서의 위치
+            coins['KRW-BTC'] 처럼 ticker로 찾을때 선형 탐색을 하지 않게 한다.
+
+        _indexes:
+            secondary index 이름 -> {key -> 위치들}
+            _index_keys에 정의된 함수들로 만들고 filter_by로 view를 얻는다.
+    """
     _assets: list[TickerAssetBase]
+    _view_class = TickerAssetsView
 
     def __repr__(self):
         return ', '.join(self.tickers)
 
     def __getitem__(self, item):
         if isinstance(item, str):
-            for asset in self._assets:
-                if asset.ticker == item:
-                    return asset
-            else:
-                raise KeyError(f"{item} is not in {self._name}")
+            return self._assets[self.position_of(item)]
         elif isinstance(item, (int, slice)):
             return self._assets[item]
         else:
             raise TypeError("ticker must be a string")
 
+    def __contains__(self, item):
+        if isinstance(item, str):
+            return item in self._ticker_index
+        return super().__contains__(item)
+
+    @property
+    def tickers(self) -> list[str]:
+        """ticker 리스트, 다시 만들지 않고 index를 만들때 만든 리스트를 돌려준다. 수정하면 안된다."""
+        return self._tickers
+
     @property
-    def tickers(self):
-        return [asset.ticker for asset in self._assets]
+    def _index_keys(self) -> dict[str, Callable[[TickerAssetBase], Iterable]]:
+        """secondary index 이름 -> asset에서 그 index의 key들을 뽑는 함수"""
+        return {}
+
+    def panel(self, field: str = 'Close', start_time=None, end_time=None, freq: str = '1min',
+              jobs: int = 8) -> PricePanel:
+        """종목들의 가격 field 하나를 (시간, 종목) 행렬로 읽는다. load_price_panel 참고"""
+        return load_price_panel(self, field, start_time, end_time, freq, jobs)
+
+    def position_of(self, ticker: str) -> int:
+        try:
+            return self._ticker_index[ticker]
+        except KeyError:
+            raise KeyError(f"{ticker} is not in {self._name}") from None
+
+    def filter_by(self, index: str, key) -> TickerAssetsView:
+        """secondary index에서 key에 해당하는 종목들의 view를 만든다."""
+        return self._view_class(self, self._get_index_positions(index, key))
+
+    def _get_index_positions(self, index: str, key) -> tuple[int, ...]:
+        if index not in self._indexes:
+            raise KeyError(f"{index} index is not in {self._name}")
+        return self._indexes[index].get(key, ())
+
+    def _build_indexes(self):
+        self._tickers = [asset.ticker for asset in self._assets]
+        self._ticker_index = {ticker: position for position, ticker in enumerate(self._tickers)}
+
+        indexes = {}
+        for index, get_keys in self._index_keys.items():
+            positions = {}
+            for position, asset in enumerate(self._assets):
+                for key in get_keys(asset):
+                    positions.setdefault(key, []).append(position)
+            indexes[index] = {key: tuple(value) for key, value in positions.items()}
+        self._indexes = indexes
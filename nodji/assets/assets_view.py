@@ -0,0 +1,99 @@
+"""asset 시퀀스에서 조건에 맞는 종목들만 골라 보여주는 view
+
+view는 원래 시퀀스의 asset 객체를 복사하지 않고 위치(position)만 가지고 있다.
+그래서 만들기 가볍다.
+
+원래 시퀀스가 update_item으로 다시 만들어지면 위치가 어긋나므로
+view는 만들 때의 ticker들로 새 목록에서 위치를 다시 찾는다. (TickerAssetsView 참고)
+"""
+from typing import Iterable, Sequence, TYPE_CHECKING
+
+from .price_update_pool import PriceUpdatePool, PriceUpdateReport
+from ..data.price_datas.price_panel import PricePanel, load_price_panel
+
+if TYPE_CHECKING:
+    from .asset_base import TickerAssetBase
+    from .assets_base import TickerAssetsBase
+
+
+class TickerAssetsView(Sequence['TickerAssetBase']):
+    """TickerAssetsBase의 일부 종목만 보여주는 view
+
+    Notes:
+        원래 시퀀스가 바뀌었을 때:
+            만들 때 source의 세대(_generation)와 종목 ticker들을 기록해둔다.
+            접근할 때 세대가 바뀌었으면 기록한 ticker들의 위치를 새 목록에서 다시 찾는다.
+            view는 만들 때 고른 종목들을 계속 보여주고, 새 목록에서 빠진 종목은 view에서도 빠진다.
+            조건(filter_by)을 다시 걸지는 않으므로 바뀐 조건을 보려면 view를 다시 만든다.
+    """
+
+    def __init__(self, source: 'TickerAssetsBase', positions: Iterable[int]):
+        """
+
+        Args:
+            source:
+                원래 asset 시퀀스
+            positions:
+                source._assets 안에서의 위치들
+        """
+        self._source = source
+        self._set_positions(tuple(sorted(positions)))
+        self._view_tickers = tuple(source.tickers[position] for position in self._positions)
+
+    def __len__(self):
+        return len(self._get_positions())
+
+    def __repr__(self):
+        return ', '.join(self.tickers)
+
+    def __getitem__(self, item):
+        positions = self._get_positions()
+        if isinstance(item, str):
+            position = self._source.position_of(item)
+            if position not in self._position_set:
+                raise KeyError(f"{item} is not in this view")
+            return self._source._assets[position]
+        elif isinstance(item, int):
+            return self._source._assets[positions[item]]
+        elif isinstance(item, slice):
+            return [self._source._assets[position] for position in positions[item]]
+        else:
+            raise TypeError("ticker must be a string")
+
+    def __contains__(self, item):
+        if isinstance(item, str):
+            self._get_positions()
+            return self._source._ticker_index.get(item) in self._position_set
+        return super().__contains__(item)
+
+    @property
+    def tickers(self) -> list[str]:
+        return [self._source._assets[position].ticker for position in self._get_positions()]
+
+    def filter_by(self, index: str, key) -> 'TickerAssetsView':
+        """view 안에서 secondary index 조건을 한번 더 건다."""
+        self._get_positions()
+        positions = self._position_set.intersection(self._source._get_index_positions(index, key))
+        return self.__class__(self._source, positions)
+
+    def panel(self, field: str = 'Close', start_time=None, end_time=None, freq: str = '1min',
+              jobs: int = 8) -> PricePanel:
+        """종목들의 가격 field 하나를 (시간, 종목) 행렬로 읽는다. load_price_panel 참고"""
+        return load_price_panel(self, field, start_time, end_time, freq, jobs)
+
+    def update_price(self, start_time=None, end_time=None, jobs: int = 1) -> PriceUpdateReport:
+        """view에 있는 종목들의 가격만 업데이트 한다."""
+        return PriceUpdatePool(jobs)(self, start_time=start_time, end_time=end_time)
+
+    def _get_positions(self) -> tuple[int, ...]:
+        """source가 바뀌었으면 만들 때의 ticker들로 위치를 다시 찾고 위치들을 반환한다."""
+        if self._generation != self._source._generation:
+            ticker_index = self._source._ticker_index
+            self._set_positions(tuple(sorted(ticker_index[ticker] for ticker in self._view_tickers
+                                             if ticker in ticker_index)))
+        return self._positions
+
+    def _set_positions(self, positions: tuple[int, ...]):
+        self._positions = positions
+        self._position_set = frozenset(positions)
+        self._generation = self._source._generation
@@ -1,24 +1,74 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
+from typing import Union
 from ..assets.asset_base import TickerAssetBase
 from ..data.price_datas.coin_price_data import CoinPriceData
 
 
 @dataclass
 class CoinMarketCaution:
-    """upbit에서 각 코인에 제공하는 시장 경고 정보를 담고 있는 데이터 클래스이다."""
+    """upbit에서 각 코인에 제공하는 시장 경고 정보를 담고 있는 데이터 클래스이다.
+
+    Notes:
+        저장할때는 필드 순서대로 한 비트씩 써서 정수 하나(bits)로 묶는다.
+    """
     price_fluctuations: bool = False
     trading_volume_soaring: bool = False
     deposit_amount_soaring: bool = False
     global_price_differences: bool = False
     concentration_of_small_accounts: bool = False
 
+    @classmethod
+    def from_bits(cls, bits: int) -> 'CoinMarketCaution':
+        return cls(*(bool(int(bits) >> i & 1) for i in range(len(CAUTION_FLAGS))))
+
+    @property
+    def bits(self) -> int:
+        return sum(1 << i for i, flag in enumerate(CAUTION_FLAGS) if getattr(self, flag))
+
+
+CAUTION_FLAGS = tuple(field.name for field in fields(CoinMarketCaution))
+
 
-@dataclass
 class Coin(TickerAssetBase):
-    kor_name: str
-    eng_name: str
-    warning: bool
-    caution: CoinMarketCaution = CoinMarketCaution()
+    """코인 하나
+
+    Notes:
+        Coins는 종목 정보를 CoinTable에 열(column) 단위로 가지고 있고
+        Coin은 필요할때 한 행을 꺼내서 만드는 가벼운 객체이다.
+        __slots__를 써서 객체마다 __dict__를 만들지 않는다.
+        caution은 비트로 가지고 있다가 접근할때 CoinMarketCaution으로 만든다.
+    """
+    __slots__ = ('kor_name', 'eng_name', 'warning', 'caution_bits')
+
+    def __init__(self, ticker: str, kor_name: str, eng_name: str, warning: bool,
+                 caution: Union[CoinMarketCaution, int, None] = None):
+        self.ticker = ticker
+        self.kor_name = kor_name
+        self.eng_name = eng_name
+        self.warning = bool(warning)
+        if caution is None:
+            self.caution_bits = 0
+        elif isinstance(caution, CoinMarketCaution):
+            self.caution_bits = caution.bits
+        else:
+            self.caution_bits = int(caution)
+
+    def __repr__(self):
+        return (f"Coin(ticker={self.ticker!r}, kor_name={self.kor_name!r}, eng_name={self.eng_name!r}, "
+                f"warning={self.warning}, caution={self.caution})")
+
+    def __eq__(self, other):
+        if isinstance(other, Coin):
+            return ((self.ticker, self.kor_name, self.eng_name, self.warning, self.caution_bits)
+                    == (other.ticker, other.kor_name, other.eng_name, other.warning, other.caution_bits))
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.ticker)
+
+    @property
+    def caution(self) -> CoinMarketCaution:
+        return CoinMarketCaution.from_bits(self.caution_bits)
 
     @property
     def price(self):
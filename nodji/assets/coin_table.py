@@ -0,0 +1,114 @@
+"""Coins의 종목 정보를 열(column) 단위로 저장하는 모듈
+
+종목 하나마다 Coin, CoinMarketCaution 객체를 만들어 두면
+상장 종목이 늘어나는 만큼 객체와 __dict__가 늘어난다.
+CoinTable은 필드별로 numpy 배열 하나씩만 가지고 있고
+Coin은 접근할때 한 행에서 만들어서 돌려준다.
+"""
+from typing import Iterable, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from .coin import CAUTION_FLAGS, Coin
+
+CAUTION_BITS = np.array([1 << i for i in range(len(CAUTION_FLAGS))], dtype=np.uint8)
+
+
+class CoinTable(Sequence[Coin]):
+    """Coin들의 structure of arrays
+
+    Notes:
+        ticker, kor_name, eng_name:
+            문자열 object 배열
+        warning:
+            bool 배열
+        caution:
+            CoinMarketCaution의 필드들을 비트로 묶은 uint8 배열
+            i번째 필드가 i번째 비트이다.
+    """
+    COLUMNS = ('ticker', 'kor_name', 'eng_name', 'warning', 'caution')
+
+    def __init__(self, ticker, kor_name, eng_name, warning, caution):
+        self.ticker = np.asarray(ticker, dtype=object)
+        self.kor_name = np.asarray(kor_name, dtype=object)
+        self.eng_name = np.asarray(eng_name, dtype=object)
+        self.warning = np.asarray(warning, dtype=bool)
+        self.caution = np.asarray(caution, dtype=np.uint8)
+
+    def __len__(self):
+        return len(self.ticker)
+
+    def __repr__(self):
+        return f"CoinTable({len(self)} coins)"
+
+    def __getitem__(self, item: Union[int, slice]):
+        if isinstance(item, slice):
+            return [self[i] for i in range(*item.indices(len(self)))]
+        return Coin(self.ticker[item], self.kor_name[item], self.eng_name[item],
+                    self.warning[item], self.caution[item])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    @classmethod
+    def empty(cls) -> 'CoinTable':
+        return cls([], [], [], [], [])
+
+    @classmethod
+    def from_coins(cls, coins: Iterable[Coin]) -> 'CoinTable':
+        coins = list(coins)
+        return cls([coin.ticker for coin in coins],
+                   [coin.kor_name for coin in coins],
+                   [coin.eng_name for coin in coins],
+                   [coin.warning for coin in coins],
+                   [coin.caution_bits for coin in coins])
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> 'CoinTable':
+        """db에 저장된 dataframe에서 만든다.
+
+        Notes:
+            예전에는 caution을 dict로 저장했었다.
+            그 경우에는 dict 열을 펼쳐서 비트로 바꾼다.
+        """
+        if df.empty:
+            return cls.empty()
+
+        caution = df['caution']
+        if caution.dtype == object:
+            flags = pd.DataFrame(caution.tolist(), index=df.index).reindex(columns=list(CAUTION_FLAGS))
+            caution = pack_caution_flags(flags.fillna(False).to_numpy(dtype=bool))
+        return cls(df['ticker'].to_numpy(), df['kor_name'].to_numpy(), df['eng_name'].to_numpy(),
+                   df['warning'].to_numpy(), caution)
+
+    @classmethod
+    def from_api(cls, coins: list[dict]) -> 'CoinTable':
+        """upbit의 market/all 응답에서 만든다.
+
+        Notes:
+            종목에 따라 market_event나 caution의 일부 필드가 없을 수 있다.
+            없는 값은 False로 둔다. (from_dataframe과 같다)
+        """
+        if not coins:
+            return cls.empty()
+
+        df = pd.json_normalize(coins)
+        flags = df.reindex(columns=[f"market_event.caution.{flag.upper()}" for flag in CAUTION_FLAGS])
+        warning = df.reindex(columns=['market_event.warning'])['market_event.warning']
+        return cls(df['market'].to_numpy(), df['korean_name'].to_numpy(), df['english_name'].to_numpy(),
+                   warning.astype('boolean').fillna(False).to_numpy(dtype=bool),
+                   pack_caution_flags(flags.astype('boolean').fillna(False).to_numpy(dtype=bool)))
+
+    def to_dataframe(self) -> pd.DataFrame:
+        return pd.DataFrame({column: getattr(self, column) for column in self.COLUMNS})
+
+    def has_caution(self, flag: str) -> np.ndarray:
+        """flag 경고가 켜져 있는지를 bool 배열로 돌려준다."""
+        return (self.caution & CAUTION_BITS[CAUTION_FLAGS.index(flag)]) != 0
+
+
+def pack_caution_flags(flags: np.ndarray) -> np.ndarray:
+    """(종목 수, 경고 수) bool 배열을 종목별 비트마스크로 묶는다."""
+    return (flags.astype(np.uint8) * CAUTION_BITS).sum(axis=1).astype(np.uint8)
@@ -10,15 +10,65 @@ Coins <- CoinsDataConverter <- Coin
     CoinsDataConverter에서도 Coin을 불러서 사용했어야 했다.
 """
 
-from .coin import Coin
+import numpy as np
+import pandas as pd
+
+from .coin import CAUTION_FLAGS
+from .coin_table import CoinTable
 from .assets_base import TickerAssetsBase
+from .assets_view import TickerAssetsView
 from ..data.converters.items_converters.coin_items_converter import CoinItemsConverter
 from ..data.collectors.items_collectors.coin_items_collector import CoinItemsCollector
 import nodji as nd
 
 
-class Coins(TickerAssetsBase):
-    _assets: list[Coin]
+class CoinFilters:
+    """Coins와 그 view가 같이 쓰는 필터 함수들
+
+    filter_by가 있는 클래스에 섞어서 쓴다.
+    view에서 다시 부르면 조건이 겹쳐서 걸린다. ex) coins.by_quote('KRW').with_warning()
+    """
+
+    def by_quote(self, quote: str):
+        """기준 화폐(KRW, BTC, USDT)로 거래되는 코인들"""
+        return self.filter_by('quote', quote)
+
+    def with_warning(self, warning: bool = True):
+        """유의 종목 지정 여부로 고른 코인들"""
+        return self.filter_by('warning', bool(warning))
+
+    def with_caution(self, *flags: str):
+        """시장 경고가 있는 코인들
+
+        Args:
+            flags:
+                CoinMarketCaution의 필드 이름들, 모두 켜져 있는 코인만 고른다.
+                없으면 경고가 하나라도 켜져 있는 코인을 고른다.
+        """
+        for flag in flags:
+            if flag not in CAUTION_FLAGS:
+                raise KeyError(f"{flag} is not a caution flag, must be one of {CAUTION_FLAGS}")
+
+        view = self.filter_by('caution', flags[0] if flags else 'any')
+        for flag in flags[1:]:
+            view = view.filter_by('caution', flag)
+        return view
+
+
+class CoinsView(CoinFilters, TickerAssetsView):
+    pass
+
+
+class Coins(CoinFilters, TickerAssetsBase):
+    """코인 시퀀스
+
+    Notes:
+        _assets:
+            CoinTable, 종목 정보를 열 단위로 가지고 있고
+            coins[i], coins['KRW-BTC'] 처럼 접근할때마다 Coin을 만들어서 돌려준다.
+    """
+    _assets: CoinTable
+    _view_class = CoinsView
 
     def __init__(self):
         super().__init__()
@@ -43,7 +93,28 @@ class Coins(TickerAssetsBase):
             생각해보면 무의미한 일이다.
             항상 새롭게 전체 리스트를 서버에서 받아온다.
         """
-        self._assets = self._items_conv.api_to_asset_items(self._items_coll.get_from_upbit())
+        self._set_assets(self._items_conv.api_to_asset_items(self._items_coll.get_from_upbit()))
         df = self._items_conv.asset_items_to_dataframe(self._assets)
         self._data(df)
         self._data.save()
+
+    def _set_assets(self, assets):
+        if not isinstance(assets, CoinTable):
+            assets = CoinTable.from_coins(assets)
+        super()._set_assets(assets)
+
+    def _build_indexes(self):
+        """CoinTable의 열들로 index를 한번에 만든다."""
+        table = self._assets
+        self._tickers = table.ticker.tolist()
+        self._ticker_index = {ticker: position for position, ticker in enumerate(self._tickers)}
+
+        quotes = pd.Series(self._tickers, dtype=object).str.split('-', n=1).str[0]
+        caution = {flag: tuple(np.flatnonzero(table.has_caution(flag)).tolist()) for flag in CAUTION_FLAGS}
+        caution['any'] = tuple(np.flatnonzero(table.caution).tolist())
+        self._indexes = {
+            'quote': {quote: tuple(positions.tolist()) for quote, positions in quotes.groupby(quotes).indices.items()},
+            'warning': {True: tuple(np.flatnonzero(table.warning).tolist()),
+                        False: tuple(np.flatnonzero(~table.warning).tolist())},
+            'caution': caution,
+        }
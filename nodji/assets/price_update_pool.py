@@ -0,0 +1,99 @@
+"""여러 asset의 가격을 동시에 업데이트 하기 위한 모듈
+
+가격 업데이트는 대부분 네트워크 대기 시간이다.
+그래서 스레드 여러개로 종목들을 나눠서 동시에 업데이트 한다.
+요청 제한은 external_apis 쪽에서 모든 스레드가 공유하고 있으므로
+여기서는 작업을 나누고 결과를 모으는 일만 한다.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Iterable, Optional, TYPE_CHECKING
+
+from loguru import logger
+
+from ..common.metrics import metrics
+
+if TYPE_CHECKING:
+    from .asset_base import AssetBase
+
+
+@dataclass
+class PriceUpdateResult:
+    """종목 하나의 가격 업데이트 결과"""
+    name: str
+    elapsed: float
+    error: Optional[BaseException] = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.error is None
+
+
+class PriceUpdateReport:
+    """여러 종목의 가격 업데이트 결과를 모아둔 클래스"""
+
+    def __init__(self, results: Iterable[PriceUpdateResult] = ()):
+        self.results: list[PriceUpdateResult] = list(results)
+
+    def __repr__(self):
+        return f"PriceUpdateReport(succeeded: {len(self.succeeded)}, failed: {len(self.failed)})"
+
+    def __len__(self):
+        return len(self.results)
+
+    def __add__(self, other):
+        if isinstance(other, PriceUpdateReport):
+            return PriceUpdateReport(self.results + other.results)
+        else:
+            raise NotImplementedError(f"other must be PriceUpdateReport but {type(other)}")
+
+    @property
+    def succeeded(self) -> list[PriceUpdateResult]:
+        return [result for result in self.results if result.succeeded]
+
+    @property
+    def failed(self) -> list[PriceUpdateResult]:
+        return [result for result in self.results if not result.succeeded]
+
+
+class PriceUpdatePool:
+    """여러 asset의 가격을 worker 스레드들로 동시에 업데이트 한다.
+
+    Notes:
+        jobs:
+            동시에 업데이트 하는 종목의 수이다.
+            1이면 지금까지처럼 한 종목씩 순서대로 업데이트 한다.
+
+        실패:
+            한 종목이 실패하더라도 나머지 종목들은 계속 업데이트 한다.
+            실패한 종목과 에러는 report에 모아서 반환한다.
+    """
+
+    def __init__(self, jobs: int = 1):
+        assert jobs >= 1, 'jobs should be greater than 0'
+        self._jobs = jobs
+
+    def __call__(self, assets: Iterable['AssetBase'], start_time=None, end_time=None) -> PriceUpdateReport:
+        assets = list(assets)
+        if self._jobs == 1:
+            return PriceUpdateReport(self._update(asset, start_time, end_time) for asset in assets)
+
+        with ThreadPoolExecutor(max_workers=self._jobs) as executor:
+            futures = [executor.submit(self._update, asset, start_time, end_time) for asset in assets]
+            return PriceUpdateReport(future.result() for future in as_completed(futures))
+
+    @staticmethod
+    def _update(asset: 'AssetBase', start_time, end_time) -> PriceUpdateResult:
+        name = str(getattr(asset, 'ticker', asset))
+        start = time.perf_counter()
+        try:
+            asset.update_price(start_time=start_time, end_time=end_time)
+        except Exception as e:
+            logger.error(f"{name} price update failed. {e}")
+            metrics.inc('nodji_price_updates_total', result='failed')
+            return PriceUpdateResult(name, time.perf_counter() - start, e)
+        elapsed = time.perf_counter() - start
+        metrics.inc('nodji_price_updates_total', result='succeeded')
+        metrics.observe('nodji_price_update_seconds', elapsed)
+        return PriceUpdateResult(name, elapsed)
@@ -1,6 +1,9 @@
 class Extensions:
     DATAFRAME_DATA = 'df'
+    PARQUET = 'parquet'
+    FEATHER = 'feather'
 
 
 class Upbit:
-    MAX_UPBIT_MPRICE_QUERY_COUNT = 200
\ No newline at end of file
+    MAX_UPBIT_MPRICE_QUERY_COUNT = 200
+    QUOTATION_REQUESTS_PER_SEC = 10
@@ -1,26 +1,41 @@
 import pandas as pd
-from .file_utils import exists_path
+from .file_utils import atomic_path, exists_path
+from .dataframe_formats import get_dataframe_format_by_path
 
 
-def load_dataframe_file(file_path: str):
-    """경로를 direct로 입력하여 load"""
+def load_dataframe_file(file_path: str, columns: list[str] = None):
+    """경로를 direct로 입력하여 load
+
+    저장 형식은 파일의 확장자로 정한다.
+    columns를 넣으면 해당 column들만 읽는다.
+    """
     if exists_path(file_path):
-        return pd.read_pickle(file_path)
+        return get_dataframe_format_by_path(file_path).load(file_path, columns)
     else:
         raise RuntimeError(f"The path: '{file_path}' is not existed.")
 
 
-def save_dataframe_file(dataframe: pd.DataFrame, file_path: str):
-    """경로를 direct로 입력하여 save."""
+def save_dataframe_file(dataframe: pd.DataFrame, file_path: str, compress: bool = False):
+    """경로를 direct로 입력하여 save.
+
+    저장 형식은 파일의 확장자로 정한다.
+    compress는 압축하지 않는 형식(pickle)을 압축해서 저장할지이다.
+    임시 파일에 쓴 뒤 바꾸므로 저장하다가 죽어도 기존 파일이 깨지지 않는다.
+    """
     try:
-        dataframe.to_pickle(file_path)
+        dataframe_format = get_dataframe_format_by_path(file_path)
+        with atomic_path(file_path) as tmp_path:
+            dataframe_format.save(dataframe, tmp_path, compress)
     except Exception as e:
         raise RuntimeError(f"Failed to save dataframe to {file_path}. {e}")
 
 
 def merge_dataframe_by_date(df_1, df_2):
-    """두개의 dataframe을 병합한다. 겹치는 날짜는 제거한다."""
+    """두개의 dataframe을 병합한다. 겹치는 날짜는 제거한다.
+
+    겹치는 날짜는 df_2의 값을 남긴다.
+    """
     df = pd.concat([df_1, df_2])
-    df.sort_index(inplace=True)
+    df.sort_index(inplace=True, kind='stable')
     df = df[~df.index.duplicated(keep='last')]
     return df
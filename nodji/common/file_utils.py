@@ -1,3 +1,6 @@
+import os
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 
 
@@ -26,3 +29,28 @@ def get_file_name(path):
 
 def get_file_extension(path):
     return Path(path).suffix
+
+
+@contextmanager
+def atomic_path(path, fsync: bool = True):
+    """path에 바로 쓰지 않고 같은 폴더의 임시 파일에 쓴 뒤 path로 바꾼다.
+
+    with 블록 안에서 반환된 임시 경로에 파일을 쓴다.
+    쓰는 도중에 프로세스가 죽어도 path에는 이전 파일이나 새 파일 중 하나만 남는다.
+    블록에서 예외가 나면 임시 파일을 지우고 path는 그대로 둔다.
+
+    Args:
+        fsync:
+            바꾸기 전에 임시 파일을 디스크에 내린다. 전원이 나가도 반쯤 쓴 파일이 남지 않는다.
+    """
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        yield tmp_path
+        if fsync:
+            with open(tmp_path, 'rb+') as f:
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
@@ -0,0 +1,212 @@
+"""업데이트 과정의 수치(요청 수, 지연 시간, 받은 행 수 ...)를 모으는 registry
+
+    nd.metrics.enable()
+    nd.Assets().update()
+    nd.metrics.write_json('metrics.json')
+    nd.metrics.write_prometheus('nodji.prom')   # node_exporter textfile collector
+
+Notes:
+    꺼져 있을 때:
+        기본은 꺼져 있다. 꺼져 있으면 inc, observe는 enabled만 보고 바로 돌아가고
+        time은 아무것도 하지 않는 context manager 하나를 같이 쓴다.
+        페이지마다 부르는 곳에서도 비용이 거의 없다.
+
+    이름:
+        prometheus 형식을 따른다. counter는 _total, 시간은 _seconds로 끝난다.
+        label은 keyword 인자로 넘긴다. ex) metrics.inc('nodji_upbit_requests_total', group='candles', status=200)
+        label 값은 모두 str로 바꿔서 저장한다. (같은 label에 int, str이 섞여도 정렬할 수 있도록)
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Optional
+
+from .file_utils import atomic_path
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_NULL_CONTEXT = nullcontext()
+
+
+class Histogram:
+    """prometheus histogram과 같은 누적 bucket 하나"""
+    __slots__ = ('buckets', 'counts', 'count', 'sum')
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """bucket 경계로 어림한 분위수. 마지막 bucket을 넘으면 inf"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return bound
+        return float('inf')
+
+    def to_dict(self) -> dict:
+        return {'count': self.count,
+                'sum': self.sum,
+                'mean': self.sum / self.count if self.count else None,
+                'p50': self.quantile(0.5),
+                'p99': self.quantile(0.99),
+                'buckets': {str(bound): count for bound, count in
+                            zip(self.buckets + (float('inf'),), self._cumulative_counts())}}
+
+    def _cumulative_counts(self) -> list[int]:
+        counts = []
+        total = 0
+        for count in self.counts:
+            total += count
+            counts.append(total)
+        return counts
+
+
+class MetricsRegistry:
+    """counter와 histogram들을 이름과 label로 모은다."""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._counters: dict[str, dict[tuple, float]] = {}
+        self._histograms: dict[str, dict[tuple, Histogram]] = {}
+        self._buckets: dict[str, tuple[float, ...]] = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"MetricsRegistry(enabled={self.enabled}, counters={len(self._counters)}, " \
+               f"histograms={len(self._histograms)})"
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def set_buckets(self, name: str, buckets: tuple[float, ...]):
+        """histogram name의 bucket 경계를 정한다. 처음 observe 하기 전에 불러야 한다."""
+        self._buckets[name] = tuple(sorted(buckets))
+
+    def inc(self, name: str, value: float = 1, **labels):
+        if not self.enabled:
+            return
+        key = _get_key(labels)
+        with self._lock:
+            values = self._counters.setdefault(name, {})
+            values[key] = values.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        if not self.enabled:
+            return
+        key = _get_key(labels)
+        with self._lock:
+            values = self._histograms.setdefault(name, {})
+            histogram = values.get(key)
+            if histogram is None:
+                histogram = values[key] = Histogram(self._buckets.get(name, DEFAULT_BUCKETS))
+            histogram.observe(value)
+
+    def time(self, name: str, **labels):
+        """with 블록의 실행 시간(초)을 histogram name에 기록한다."""
+        if not self.enabled:
+            return _NULL_CONTEXT
+        return self._time(name, labels)
+
+    @contextmanager
+    def _time(self, name: str, labels: dict):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def get(self, name: str, **labels) -> float:
+        """counter 값. label을 주지 않으면 모든 label의 합"""
+        with self._lock:
+            values = self._counters.get(name, {})
+            if labels:
+                return values.get(_get_key(labels), 0)
+            return sum(values.values())
+
+    def to_dict(self) -> dict:
+        """json으로 바꿀 수 있는 요약"""
+        with self._lock:
+            counters = {name: [{'labels': dict(key), 'value': value} for key, value in sorted(values.items())]
+                        for name, values in sorted(self._counters.items())}
+            histograms = {name: [{'labels': dict(key), **histogram.to_dict()}
+                                 for key, histogram in sorted(values.items())]
+                          for name, values in sorted(self._histograms.items())}
+        return {'counters': counters, 'histograms': histograms}
+
+    def to_prometheus(self) -> str:
+        """prometheus text exposition 형식"""
+        lines = []
+        with self._lock:
+            for name, values in sorted(self._counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                for key, value in sorted(values.items()):
+                    lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+            for name, values in sorted(self._histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                for key, histogram in sorted(values.items()):
+                    bounds = histogram.buckets + (float('inf'),)
+                    for bound, count in zip(bounds, histogram._cumulative_counts()):
+                        le = '+Inf' if bound == float('inf') else _format_value(bound)
+                        lines.append(f"{name}_bucket{_format_labels(key + (('le', le),))} {count}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {_format_value(histogram.sum)}")
+                    lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+        return '\n'.join(lines) + '\n'
+
+    def write_json(self, path):
+        _write_text(Path(path), json.dumps(self.to_dict(), indent=2, ensure_ascii=False))
+
+    def write_prometheus(self, path):
+        _write_text(Path(path), self.to_prometheus())
+
+
+def _get_key(labels: dict) -> tuple:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key: tuple) -> str:
+    if not key:
+        return ''
+    items = ','.join(f'{name}="{_escape(value)}"' for name, value in key)
+    return '{' + items + '}'
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _write_text(path: Path, text: str):
+    """다른 프로세스(node_exporter)가 반쯤 쓴 파일을 읽지 않도록 임시 파일에 쓰고 바꾼다."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with atomic_path(path, fsync=False) as tmp_path:
+        tmp_path.write_text(text, encoding='utf-8')
+
+
+metrics = MetricsRegistry(enabled=os.environ.get('NODJI_METRICS', '') not in ('', '0'))
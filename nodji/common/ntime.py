@@ -1,10 +1,15 @@
 """datetime 을 쓰기 편하도록 wrapping한 클래스"""
-from datetime import datetime, timedelta
-from typing import Union
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import Union, TYPE_CHECKING
 
-import pandas as pd
 import nodji as nd
 
+if TYPE_CHECKING:
+    import pandas as pd
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
 
 class NTime:
     """시간 관리를 쉽게 하려고 내가 이해하기 쉬운 방법으로 WRAPPING 하였다.
@@ -12,12 +17,23 @@ class NTime:
     Notes:
         내부에서는 datetime을 사용하고 있다.
         pd.Timestamp를 datetime으로 변환하여 사용한다.
+
+        불변(immutable):
+            한번 만든 NTime은 바꿀 수 없다. 시간을 옮기려면 shift로 새 NTime을 만든다.
+            예전처럼 time.sec += 1 로 바꾸면 넘겨준 쪽의 객체까지 바뀌었었다.
+            바뀌지 않으므로 hash를 쓸 수 있고 dict, cache의 key로 쓸 수 있다.
+
+        여러 시간을 한번에 다룰 때는 NTimeArray를 쓴다.
     """
+    __slots__ = ('_time', '_time_zone')
 
-    def __init__(self, time: Union[datetime, pd.Timestamp, type(None)], time_zone: nd.TimeZone = nd.TimeZone.SEOUL):
+    def __init__(self, time: Union['NTime', datetime, 'pd.Timestamp', str, type(None)], time_zone: nd.TimeZone = nd.TimeZone.SEOUL):
         time = self._convert_time_value(time, time_zone)
-        self._time = time
-        self.time_zone = time_zone
+        object.__setattr__(self, '_time', time)
+        object.__setattr__(self, '_time_zone', time_zone)
+
+    def __setattr__(self, key, value):
+        raise AttributeError("NTime is immutable, use shift to make a new NTime")
 
     def __bool__(self):
         return not self.is_none
@@ -28,6 +44,9 @@ class NTime:
         else:
             return self._time.strftime("%Y%m%d %H%M%S")
 
+    def __hash__(self):
+        return hash(self._time)
+
     def __gt__(self, other):
         if isinstance(other, NTime):
             return self._time > other._time
@@ -53,77 +72,63 @@ class NTime:
             raise NotImplementedError(other, type(other))
 
     def __eq__(self, other):
+        """NTime이 아닌 값과는 같지 않다. (dict key로 쓸 때 다른 타입과 비교될 수 있다.)"""
         if isinstance(other, NTime):
             return self._time == other._time
         else:
-            raise NotImplementedError(other, type(other))
+            return NotImplemented
 
     @property
     def is_none(self):
         return self._time is None
 
+    @property
+    def time_zone(self) -> nd.TimeZone:
+        return self._time_zone
+
     @classmethod
     def get_current_time(cls):
         return cls(datetime.now(tz=nd.TimeZone.SEOUL.value))
 
+    @classmethod
+    def from_ns(cls, ns: int, time_zone: nd.TimeZone = nd.TimeZone.SEOUL) -> 'NTime':
+        """epoch nanosecond로 만든다. (마이크로초 아래는 버린다)"""
+        ns = int(ns)
+        time = datetime.fromtimestamp(ns // 10 ** 9, tz=time_zone.value)
+        return cls(time + timedelta(microseconds=ns % 10 ** 9 // 1000), time_zone)
+
+    @property
+    def ns(self) -> int:
+        """epoch nanosecond"""
+        return (self._time - _EPOCH) // timedelta(microseconds=1) * 1000
+
     @property
     def year(self):
         return self._time.year
 
-    @year.setter
-    def year(self, value):
-        self._time = self._time.replace(year=value)
+    @property
+    def mon(self):
+        return self._time.month
 
     @property
     def hour(self):
         return self._time.hour
 
-    @hour.setter
-    def hour(self, value):
-        days_to_add = value // 24
-        value = value % 24
-        self._time = self._time.replace(hour=value)
-        if days_to_add > 0:
-            self._time += timedelta(days=days_to_add)
-
     @property
-    def mon(self):
-        return self._time.month
-
-    @mon.setter
-    def mon(self, value):
-        while value > 12:
-            value -= 12
-            self._time = self._time.replace(year=self._time.year + 1)
-        self._time = self._time.replace(month=value)
+    def min(self):
+        return self._time.minute
 
     @property
     def sec(self):
         return self._time.second
 
-    @sec.setter
-    def sec(self, value):
-        minutes_to_add = value // 60
-        value = value % 60
-        self._time = self._time.replace(second=value)
-        if minutes_to_add > 0:
-            self._time += timedelta(minutes=minutes_to_add)
-
-    @property
-    def min(self):
-        return self._time.minute
-
-    @min.setter
-    def min(self, value):
-        hours_to_add = value // 60
-        value = value % 60
-        self._time = self._time.replace(minute=value)
-        if hours_to_add > 0:
-            self._time += timedelta(hours=hours_to_add)
+    def shift(self, days: int = 0, hours: int = 0, minutes: int = 0, seconds: int = 0) -> 'NTime':
+        """시간을 옮긴 새 NTime을 만든다."""
+        return NTime(self._time + timedelta(days=days, hours=hours, minutes=minutes, seconds=seconds),
+                     self._time_zone)
 
     def to_utc(self):
-        self.time_zone = nd.TimeZone.UTC
-        return NTime(self._time.astimezone(self.time_zone.value), self.time_zone)
+        return NTime(self._time.astimezone(nd.TimeZone.UTC.value), nd.TimeZone.UTC)
 
     def to_string(self):
         return self._time.strftime("%Y-%m-%d %H:%M:%S")
@@ -138,10 +143,17 @@ class NTime:
 
             pd.Timestamp:
                 datetime으로 변환하여 사용한다.
+                pandas를 import 하지 않은 상태라면 Timestamp가 들어올 수 없으므로
+                NTime만 쓰는 스크립트에서 pandas를 import 하지 않는다.
+
+            NTime:
+                내부의 datetime을 그대로 사용한다.
         """
         if time is None:
             pass
-        elif isinstance(time, pd.Timestamp):
+        elif isinstance(time, NTime):
+            time = time._time
+        elif 'pandas' in sys.modules and isinstance(time, sys.modules['pandas'].Timestamp):
             time = time.to_pydatetime()
         elif isinstance(time, str):
             if ' ' in time:
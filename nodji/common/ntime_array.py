@@ -0,0 +1,121 @@
+"""여러 시간을 int64 epoch nanosecond 배열 하나로 다루는 클래스
+
+요청 구간(window)을 만들거나 가격 index와 비교할 때
+NTime, datetime을 시간마다 만들지 않고 배열 연산으로 한번에 처리한다.
+"""
+from typing import Iterable, Union
+
+import numpy as np
+import pandas as pd
+
+import nodji as nd
+from .ntime import NTime
+from .time_intervals import MINUTE_NS
+
+
+class NTimeArray:
+    """int64 epoch nanosecond 배열로 된 불변 시간 배열
+
+    Notes:
+        ns:
+            UTC 기준 epoch nanosecond라서 시간대와 상관없이 같은 값이다.
+            시간대는 문자열, index, NTime으로 바꿀 때만 쓴다.
+
+        불변:
+            ns 배열은 쓰기 금지로 만든다. 연산은 항상 새 NTimeArray를 만든다.
+    """
+    __slots__ = ('_ns', '_time_zone')
+
+    def __init__(self, ns: Union[np.ndarray, Iterable[int]], time_zone: nd.TimeZone = nd.TimeZone.SEOUL):
+        ns = np.array(ns, dtype=np.int64)
+        ns.setflags(write=False)
+        self._ns = ns
+        self._time_zone = time_zone
+
+    def __len__(self):
+        return len(self._ns)
+
+    def __repr__(self):
+        return f"NTimeArray({len(self)}, {self.to_index().strftime('%Y%m%d %H%M%S').tolist()[:3]}...)"
+
+    def __getitem__(self, item):
+        if isinstance(item, (int, np.integer)):
+            return NTime.from_ns(self._ns[item], self._time_zone)
+        return NTimeArray(self._ns[item], self._time_zone)
+
+    def __iter__(self):
+        for ns in self._ns:
+            yield NTime.from_ns(ns, self._time_zone)
+
+    def __array__(self, dtype=None, copy=None):
+        return self._ns if dtype is None else self._ns.astype(dtype)
+
+    @property
+    def ns(self) -> np.ndarray:
+        return self._ns
+
+    @property
+    def time_zone(self) -> nd.TimeZone:
+        return self._time_zone
+
+    @classmethod
+    def from_index(cls, index: pd.DatetimeIndex, time_zone: nd.TimeZone = nd.TimeZone.SEOUL) -> 'NTimeArray':
+        return cls(index.asi8, time_zone)
+
+    @classmethod
+    def from_ntimes(cls, times: Iterable[NTime]) -> 'NTimeArray':
+        times = list(times)
+        time_zone = times[0].time_zone if times else nd.TimeZone.SEOUL
+        return cls([time.ns for time in times], time_zone)
+
+    @classmethod
+    def range(cls, start: NTime, end: NTime, step_ns: int = MINUTE_NS) -> 'NTimeArray':
+        """[start, end) 를 step_ns 간격으로 나눈 시간들"""
+        return cls(np.arange(start.ns, end.ns, step_ns, dtype=np.int64), start.time_zone)
+
+    @classmethod
+    def windows(cls, start: NTime, end: NTime, window_ns: int, step_ns: int = MINUTE_NS) -> 'NTimeArray':
+        """[start, end] 를 모두 덮는 window들의 마지막 시간(to)들
+
+        window 하나는 [to - window_ns + step_ns, to] 를 덮는다.
+        window들은 epoch부터 window_ns 간격의 고정된 눈금에 맞춘다. (window 하나는 [k * window_ns, (k + 1) * window_ns))
+        그래서 start, end가 달라도 같은 구간의 window는 항상 같은 to를 가진다. (응답 cache의 key가 다시 쓰인다)
+        마지막 window의 to는 end보다 늦을 수 있다.
+        """
+        first = start.ns // window_ns
+        last = end.ns // step_ns * step_ns // window_ns
+        return cls(np.arange(first + 1, last + 2, dtype=np.int64) * window_ns - step_ns, end.time_zone)
+
+    def floor(self, step_ns: int = MINUTE_NS) -> 'NTimeArray':
+        """step_ns 단위로 내림한다.
+
+        시간대의 offset을 더해서 내림하므로 하루 단위도 그 시간대의 자정으로 내림된다.
+        """
+        offset = self._get_utc_offset_ns()
+        return NTimeArray((self._ns + offset) // step_ns * step_ns - offset, self._time_zone)
+
+    def shift(self, ns: int) -> 'NTimeArray':
+        return NTimeArray(self._ns + ns, self._time_zone)
+
+    def to_time_zone(self, time_zone: nd.TimeZone) -> 'NTimeArray':
+        """같은 시간을 다른 시간대로 보여준다. (ns는 그대로다)"""
+        return NTimeArray(self._ns, time_zone)
+
+    def to_utc(self) -> 'NTimeArray':
+        return self.to_time_zone(nd.TimeZone.UTC)
+
+    def to_index(self) -> pd.DatetimeIndex:
+        return pd.DatetimeIndex(self._ns.view('datetime64[ns]'), tz='UTC').tz_convert(self._time_zone.value)
+
+    def to_strings(self, fmt: str = "%Y-%m-%d %H:%M:%S") -> list[str]:
+        return self.to_index().strftime(fmt).tolist()
+
+    def searchsorted(self, index: pd.DatetimeIndex, side: str = 'left') -> np.ndarray:
+        """정렬된 가격 index에서 각 시간이 들어갈 위치"""
+        return np.searchsorted(index.asi8, self._ns, side=side)
+
+    def _get_utc_offset_ns(self) -> np.ndarray:
+        if self._time_zone is nd.TimeZone.UTC or len(self._ns) == 0:
+            return np.zeros(len(self._ns), dtype=np.int64)
+        index = self.to_index()
+        return (index.tz_localize(None).asi8 - self._ns).astype(np.int64)
@@ -0,0 +1,97 @@
+"""시간 구간 배열을 다루는 함수들
+
+구간은 epoch nanosecond int64 배열 (k, 2) 로 표현하고 [start, end) 반열린 구간이다.
+분단위 데이터에서 [12:00, 12:03) 은 12:00, 12:01, 12:02 세 분을 뜻한다.
+모든 함수는 구간들을 한번에 numpy 연산으로 처리한다.
+"""
+import numpy as np
+
+MINUTE_NS = 60 * 10 ** 9
+
+
+def empty_intervals() -> np.ndarray:
+    return np.empty((0, 2), dtype=np.int64)
+
+
+def find_missing_intervals(times_ns: np.ndarray, step_ns: int = MINUTE_NS) -> np.ndarray:
+    """정렬된 시간 배열에서 step 간격으로 있어야 하는데 빠진 구간들을 찾는다."""
+    times_ns = np.asarray(times_ns, dtype=np.int64)
+    if len(times_ns) < 2:
+        return empty_intervals()
+    diffs = np.diff(times_ns)
+    positions = np.flatnonzero(diffs > step_ns)
+    return np.column_stack([times_ns[positions] + step_ns, times_ns[positions + 1]])
+
+
+def merge_intervals(intervals: np.ndarray) -> np.ndarray:
+    """겹치거나 맞닿은 구간들을 합친다."""
+    intervals = np.asarray(intervals, dtype=np.int64).reshape(-1, 2)
+    if len(intervals) == 0:
+        return empty_intervals()
+    intervals = intervals[np.argsort(intervals[:, 0], kind='stable')]
+    max_ends = np.maximum.accumulate(intervals[:, 1])
+    is_new = np.empty(len(intervals), dtype=bool)
+    is_new[0] = True
+    is_new[1:] = intervals[1:, 0] > max_ends[:-1]
+    starts = intervals[is_new, 0]
+    ends = np.maximum.reduceat(intervals[:, 1], np.flatnonzero(is_new))
+    return np.column_stack([starts, ends])
+
+
+def _covered(points: np.ndarray, merged: np.ndarray) -> np.ndarray:
+    """각 점이 합쳐진(서로 겹치지 않는) 구간들 중 하나에 들어가는지"""
+    if len(merged) == 0:
+        return np.zeros(len(points), dtype=bool)
+    positions = np.searchsorted(merged[:, 0], points, side='right') - 1
+    return (positions >= 0) & (points < merged[np.maximum(positions, 0), 1])
+
+
+def _combine(a: np.ndarray, b: np.ndarray, keep) -> np.ndarray:
+    a = merge_intervals(a)
+    b = merge_intervals(b)
+    points = np.unique(np.concatenate([a.ravel(), b.ravel()]))
+    if len(points) < 2:
+        return empty_intervals()
+    starts = points[:-1]
+    selected = keep(_covered(starts, a), _covered(starts, b))
+    return merge_intervals(np.column_stack([starts[selected], points[1:][selected]]))
+
+
+def subtract_intervals(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """a 구간들에서 b 구간들을 뺀다."""
+    return _combine(a, b, lambda in_a, in_b: in_a & ~in_b)
+
+
+def intersect_intervals(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """a 구간들과 b 구간들이 겹치는 부분"""
+    return _combine(a, b, lambda in_a, in_b: in_a & in_b)
+
+
+def points_to_intervals(times_ns: np.ndarray, step_ns: int = MINUTE_NS) -> np.ndarray:
+    """시간 점들을 [t, t + step) 구간으로 바꾸고 맞닿은 구간들을 합친다."""
+    times_ns = np.unique(np.asarray(times_ns, dtype=np.int64))
+    return merge_intervals(np.column_stack([times_ns, times_ns + step_ns]))
+
+
+def plan_windows(intervals: np.ndarray, window_ns: int, step_ns: int = MINUTE_NS) -> np.ndarray:
+    """구간들을 모두 덮는 최소한의 window들의 마지막 시간(to)을 구한다.
+
+    window 하나는 [to - window + step, to] 를 덮는다.
+    가장 늦은 구간부터 window의 끝을 맞춰가며 덮으면 window 수가 가장 적다.
+    가까이 붙은 빈 구간들은 window 하나로 같이 받는다.
+    """
+    intervals = merge_intervals(intervals)
+    to_times = []
+    i = len(intervals) - 1
+    end = intervals[i, 1] if i >= 0 else 0
+    while i >= 0:
+        to = end - step_ns
+        first = to - window_ns + step_ns
+        to_times.append(to)
+        if intervals[i, 0] < first:
+            end = first
+            continue
+        i = np.searchsorted(intervals[:, 0], first, side='left') - 1
+        if i >= 0:
+            end = min(intervals[i, 1], first)
+    return np.array(to_times[::-1], dtype=np.int64)
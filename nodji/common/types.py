@@ -17,6 +17,18 @@ class DataStorageFrequency(Enum):
     ANNUALLY = auto()
 
 
+class StorageFormat(Enum):
+    PICKLE = auto()
+    PARQUET = auto()
+    FEATHER = auto()
+
+
 class TimeZone(Enum):
     SEOUL = ZoneInfo("Asia/Seoul")
     UTC = ZoneInfo("UTC")
+
+
+class ResponseCacheMode(Enum):
+    CACHE = auto()
+    RECORD = auto()
+    REPLAY = auto()
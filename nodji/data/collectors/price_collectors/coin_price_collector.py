@@ -1,19 +1,36 @@
-from typing import TYPE_CHECKING, cast
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Optional, cast
 
+import numpy as np
 import pandas as pd
 
 import nodji as nd
 from .price_collector_base import AsssetPriceCollectorBase
+from ...dataframe_data.dataframe_accumulator import DataFrameAccumulator
+from ....common.ntime_array import NTimeArray
+from ....common.time_intervals import (MINUTE_NS, empty_intervals, intersect_intervals, plan_windows,
+                                       points_to_intervals, subtract_intervals)
 from ...converters.price_converters.coin_price_converter import CoinPriceConverter
 
 if TYPE_CHECKING:
     from ...price_datas.coin_price_data import CoinPriceData
+    from ...updaters.progress_journal import Checkpoint
     from ....common.ntime import NTime
 
 
 class CoinPriceCollector(AsssetPriceCollectorBase):
-    """가격 데이터를 수집하는 클래스"""
+    """가격 데이터를 수집하는 클래스
+
+    Notes:
+        checkpoint:
+            받는 함수들은 checkpoint를 받을 수 있다. checkpoint가 due가 되면
+            그때까지 받은 페이지들을 데이터에 더하고 받은 구간을 checkpoint에 알려준다.
+            (checkpoint가 데이터와 진행 기록을 저장한다.)
+            동시에 받을 때는 window들을 CHECKPOINT_WINDOWS * jobs 개씩 최신 것부터 나눠서 받는다.
+    """
     _price_data: 'CoinPriceData'
+    EARLIEST_TIME = pd.Timestamp('2017-01-01', tz=nd.TimeZone.SEOUL.value)
+    CHECKPOINT_WINDOWS = 8
 
     def __init__(self, price_data: 'CoinPriceData'):
         super().__init__(price_data)
@@ -23,8 +40,19 @@ class CoinPriceCollector(AsssetPriceCollectorBase):
     def _conv(self):
         return CoinPriceConverter(self._price_data)
 
-    def get_from_upbit(self, start_time: 'NTime', end_time: 'NTime'):
-        """upbit에서 가격 데이터를 가져온다."""
+    def get_from_upbit(self, start_time: 'NTime', end_time: 'NTime', checkpoint: Optional['Checkpoint'] = None):
+        """upbit에서 가격 데이터를 가져온다.
+
+        Notes:
+            페이지 모으기:
+                페이지마다 DataFrameData에 더하지 않고 accumulator에 모아뒀다가 한번에 더한다.
+
+            checkpoint:
+                end_time부터 과거로 받으므로 [지금까지 받은 가장 과거 캔들, end_time] 을 받은 구간으로 알려준다.
+        """
+        acc = DataFrameAccumulator(self._data)
+        end_ns = end_time.ns // MINUTE_NS * MINUTE_NS + MINUTE_NS if end_time else None
+        first_time = None
         while True:
             new_data = self._ub.get_minute_candles(self._price_data._coin.ticker, end_time)
             new_df: pd.DataFrame = self._conv.api_to_dataframe(new_data)
@@ -32,12 +60,191 @@ class CoinPriceCollector(AsssetPriceCollectorBase):
             if new_df.empty:
                 break
 
-            self._data += new_df
+            # 시작 시간 이전의 캔들은 버린다. 이미 있던 데이터는 건드리지 않는다.
+            if start_time and start_time >= nd.NTime(new_df.index[0]):
+                acc.append(new_df.loc[start_time._time:])
+                break
+
+            acc.append(new_df)
+            if checkpoint is not None and end_ns is not None and checkpoint.due:
+                acc.flush()
+                checkpoint.add([[new_df.index[0].value, end_ns]])
 
-            if start_time and start_time >= self._data.start_time:
-                self._data.start_time = start_time
+            # 상장 시간에 도달하면 같은 첫 캔들만 계속 돌아온다.
+            if first_time is not None and new_df.index[0] >= first_time:
                 break
 
-            end_time = nd.NTime(new_df.index[0])
+            first_time = new_df.index[0]
+            end_time = nd.NTime(first_time)
+
+        acc.flush()
+
+    def get_from_upbit_by_windows(self, start_time: 'NTime', end_time: 'NTime', jobs: int = 4,
+                                  checkpoint: Optional['Checkpoint'] = None):
+        """upbit에서 가격 데이터를 구간을 나눠서 동시에 가져온다.
+
+        Notes:
+            구간 나누기:
+                get_from_upbit은 이전 페이지의 가장 과거 시간을 알아야 다음 요청을 보낼 수 있다.
+                그래서 [start_time, end_time]을 200분 단위 구간으로 미리 나눠서
+                각 구간의 to를 먼저 정해두고 동시에 요청한다.
+                구간들은 고정된 200분 눈금에 맞추므로 다시 받을 때 같은 요청이 되어 응답 cache에서 읽는다.
+                (NTimeArray.windows 참고)
+
+            거래가 없는 분:
+                거래가 없던 분은 캔들이 없으므로 200개를 받으면 200분보다 더 과거까지 내려간다.
+                각 구간의 결과를 자기 구간 (to - 200분, to] 으로 잘라서 합치므로
+                구간끼리 겹치거나 비는 곳 없이 이어진다.
+        """
+        assert start_time and end_time, 'start_time and end_time are required'
+        window = pd.Timedelta(minutes=nd.consts.Upbit.MAX_UPBIT_MPRICE_QUERY_COUNT)
+        to_times = NTimeArray.windows(start_time, end_time, window.value)
+        bounds = NTimeArray([start_time.ns, end_time.ns]).floor()
+
+        frames = []
+        for chunk in self._split_windows(to_times, jobs, checkpoint):
+            frames += self._get_windows(chunk, jobs)
+            if checkpoint is not None and checkpoint.due:
+                self._add_frames(frames, bounds)
+                frames = []
+                checkpoint.add([[max(chunk.ns[0] - window.value + MINUTE_NS, bounds.ns[0]),
+                                 bounds.ns[1] + MINUTE_NS]])
+        self._add_frames(frames, bounds)
+
+    def _split_windows(self, to_times: NTimeArray, jobs: int, checkpoint: Optional['Checkpoint']):
+        """checkpoint가 있으면 window들을 최신 것부터 나눠서 반환한다."""
+        size = len(to_times) if checkpoint is None else max(1, jobs) * self.CHECKPOINT_WINDOWS
+        for end in range(len(to_times), 0, -max(1, size)):
+            yield to_times[max(0, end - size):end]
+
+    def _add_frames(self, frames: list[pd.DataFrame], bounds: NTimeArray):
+        """받은 window들을 [bounds[0], bounds[1]] 로 잘라서 데이터에 더한다."""
+        if not frames:
+            return
+        df = pd.concat(frames).sort_index()
+        start = bounds.searchsorted(df.index, side='left')[0]
+        end = bounds.searchsorted(df.index, side='right')[1]
+        self._data += df.iloc[start:end]
+
+    def find_listing_time(self, before: 'NTime') -> Optional['NTime']:
+        """가격 데이터가 처음 시작되는 시간(상장 시간)을 찾는다.
+
+        Args:
+            before:
+                이 시간 이전 중에서 찾는다. 보통 가지고 있는 데이터의 처음 시간이다.
+
+        Returns:
+            가장 처음 캔들의 시간. before 이전에 캔들이 없으면 None
+
+        Notes:
+            탐색:
+                빈 페이지가 나올 때까지 200개씩 과거로 내려가지 않는다.
+                캔들 1개만 요청하는 probe로 하루, 이틀, 나흘.. 씩 과거로 건너뛰다가
+                캔들이 없는 시간을 만나면 그 사이를 이진 탐색한다.
+                몇 년치 이력이어도 수십번의 요청으로 찾는다.
+
+            기록:
+                찾은 시간은 manifest에 기록해두고 다음부터는 요청하지 않는다.
+        """
+        manifest = self._data.manifest
+        if manifest.listing_time is not None:
+            return nd.NTime(manifest.listing_time)
+
+        hi = self._probe(pd.Timestamp(before._time))
+        if hi is None:
+            return None
+
+        lo = None
+        step = pd.Timedelta(days=1)
+        while lo is None and hi > self.EARLIEST_TIME:
+            probe_time = max(hi - step, self.EARLIEST_TIME)
+            candle_time = self._probe(probe_time)
+            if candle_time is None:
+                lo = probe_time
+            else:
+                hi = candle_time
+                step *= 2
+
+        while lo is not None and hi - lo > pd.Timedelta(minutes=1):
+            mid = (lo + (hi - lo) / 2).floor('min')
+            candle_time = self._probe(mid)
+            if candle_time is None:
+                lo = mid
+            else:
+                hi = candle_time
+
+        manifest.listing_time = hi
+        manifest.save()
+        return nd.NTime(hi)
+
+    def _probe(self, to: pd.Timestamp) -> Optional[pd.Timestamp]:
+        """to 이전(to 포함)의 가장 최근 캔들 시간을 반환한다. 없으면 None"""
+        new_data = self._ub.get_minute_candles(self._price_data._coin.ticker, nd.NTime(to), count=1)
+        df = self._conv.api_to_dataframe(new_data)
+        return None if df.empty else df.index[-1]
+
+    def fill_missing_intervals(self, intervals: np.ndarray, jobs: int = 4,
+                               checkpoint: Optional['Checkpoint'] = None) -> np.ndarray:
+        """빈 구간들을 최소한의 요청으로 동시에 받아서 채운다.
+
+        Args:
+            intervals:
+                빈 구간들 (epoch ns [start, end))
+
+        Returns:
+            요청해서 받았는데도 캔들이 없었던 구간들.
+            거래가 없었던 분들이므로 다음에는 다시 요청하지 않도록 기록해두면 된다.
+
+        Notes:
+            가까이 붙은 빈 구간들은 200분 window 하나로 묶어서 한번에 요청한다.
+        """
+        window = pd.Timedelta(minutes=nd.consts.Upbit.MAX_UPBIT_MPRICE_QUERY_COUNT)
+        to_times = plan_windows(intervals, window.value)
+        if len(to_times) == 0:
+            return empty_intervals()
+
+        requested = intersect_intervals(intervals, self._get_window_intervals(to_times, window.value))
+        bounds = NTimeArray([requested[0, 0], requested[-1, 1] - MINUTE_NS])
+        received = [empty_intervals()]
+        frames = []
+        for chunk in self._split_windows(NTimeArray(to_times), jobs, checkpoint):
+            frames += self._get_windows(chunk, jobs)
+            if checkpoint is not None and checkpoint.due:
+                received.append(self._add_missing_frames(frames, bounds))
+                frames = []
+                checkpoint.add(intersect_intervals(requested, self._get_window_intervals(chunk.ns, window.value)))
+        received.append(self._add_missing_frames(frames, bounds))
+        return subtract_intervals(requested, np.concatenate(received))
+
+    def _add_missing_frames(self, frames: list[pd.DataFrame], bounds: NTimeArray) -> np.ndarray:
+        """빈 구간을 채우려고 받은 window들을 데이터에 더하고 캔들이 있던 분들을 구간으로 반환한다."""
+        if not frames:
+            return empty_intervals()
+        df = pd.concat(frames).sort_index()
+        start = bounds.searchsorted(df.index, side='left')[0]
+        end = bounds.searchsorted(df.index, side='right')[1]
+        df = df.iloc[start:end]
+        self._data += df
+        return points_to_intervals(df.index.asi8)
+
+    @staticmethod
+    def _get_window_intervals(to_times: np.ndarray, window_ns: int) -> np.ndarray:
+        """각 to 까지의 window가 덮는 구간들 [to - window + 1분, to + 1분)"""
+        to_times = np.asarray(to_times, dtype=np.int64)
+        return np.column_stack([to_times - window_ns + MINUTE_NS, to_times + MINUTE_NS])
 
+    def _get_windows(self, to_times: NTimeArray, jobs: int) -> list[pd.DataFrame]:
+        """각 to 까지 200분 구간의 가격 데이터를 동시에 가져온다."""
+        window = pd.Timedelta(minutes=nd.consts.Upbit.MAX_UPBIT_MPRICE_QUERY_COUNT)
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            frames = list(executor.map(lambda to: self._get_window(to, window.value), to_times))
+        return [df for df in frames if not df.empty]
 
+    def _get_window(self, to: 'NTime', window_ns: int) -> pd.DataFrame:
+        """to 까지 window 길이 구간의 가격 데이터를 가져온다."""
+        new_data = self._ub.get_minute_candles(self._price_data._coin.ticker, to)
+        df = self._conv.api_to_dataframe(new_data)
+        if df.empty:
+            return df
+        times = df.index.asi8
+        return df[(times > to.ns - window_ns) & (times <= to.ns)]
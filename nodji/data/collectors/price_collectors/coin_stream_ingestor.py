@@ -0,0 +1,231 @@
+"""upbit websocket 체결 스트림으로 여러 코인의 분봉을 실시간으로 저장한다.
+
+REST로 최근 분봉을 유지하려면 종목마다 매분 요청해야 해서 요청 제한에 걸린다.
+여기서는 연결 하나로 모든 종목의 체결을 받아서 메모리에서 1분봉을 만들고
+주기적으로 닫힌 봉들을 각 코인의 DataFrameData에 append 한다.
+"""
+import json
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterable, Optional, TYPE_CHECKING
+
+import pandas as pd
+from loguru import logger
+
+import nodji as nd
+from .minute_bar_builder import MINUTE_MS, MinuteBarBuilder
+from ....assets.price_update_pool import PriceUpdatePool
+from ....external_apis.upbit_websocket import UpbitWebSocket
+
+if TYPE_CHECKING:
+    from ....assets.coin import Coin
+
+
+class CoinStreamIngestor:
+    """체결 스트림으로 분봉을 만들어 저장한다.
+
+    Notes:
+        flush:
+            flush_interval초마다 닫힌 봉들을 종목별로 DataFrameData.append로 저장한다.
+            (partition 끝 이후의 행들이므로 append 파일로 저장된다.)
+            저장한 뒤에는 rollup도 갱신한다.
+
+        연결 직후의 분:
+            연결 후 첫 체결의 분은 연결 전의 체결이 빠져 있을 수 있으므로 스트림으로 봉을 만들지 않는다.
+            대신 그 분이 끝난 뒤에 REST로 받는다. (backfill)
+            벽시계가 아닌 체결 시간을 쓰므로 녹화한 메시지를 replay 해도 똑같이 동작한다.
+
+        backfill thread:
+            backfill은 worker thread 하나에서 돌린다. 받는 loop에서 돌리면 그동안 recv를 못해서
+            websocket의 받는 queue가 차고 ping에 응답하지 못해 연결이 끊긴다.
+            backfill이 도는 동안에는 같은 DataFrameData에 동시에 쓰지 않도록 닫힌 봉들을 저장하지 않고
+            builder에 두었다가 backfill이 끝난 뒤의 flush에서 저장한다.
+
+        재연결:
+            연결이 끊기면 만들던 봉은 버리고 reconnect_delay부터 두배씩 기다렸다가 다시 연결한다.
+            끊긴 동안의 분봉은 다시 연결된 분이 끝난 뒤에 REST로 한번에 받는다.
+
+        녹화:
+            record_path를 넣으면 받은 메시지를 jsonl로 저장한다.
+            benchmarks/fake_upbit_websocket.py로 그대로 replay 할 수 있다.
+    """
+
+    def __init__(self,
+                 coins: Iterable['Coin'],
+                 url: Optional[str] = None,
+                 flush_interval: float = 60.0,
+                 backfill_jobs: int = 4,
+                 reconnect_delay: float = 1.0,
+                 max_reconnect_delay: float = 60.0,
+                 record_path: Optional[Path] = None,
+                 clock: Callable[[], float] = time.time):
+        self._coins = {coin.ticker: coin for coin in coins}
+        self.url = url
+        self.flush_interval = flush_interval
+        self.backfill_jobs = backfill_jobs
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.record_path = record_path
+        self._clock = clock
+        self._builder = MinuteBarBuilder()
+        self._stop = threading.Event()
+        self._watermark_ms = 0
+        self._pending_backfills: list[tuple[int, int]] = []
+        self._backfill_executor: Optional[ThreadPoolExecutor] = None
+        self._backfill_future: Optional[Future] = None
+        self._disconnected_ms: Optional[int] = None
+        self._connected = False
+        self.bars_saved = 0
+
+    @property
+    def tickers(self) -> list[str]:
+        return list(self._coins)
+
+    def stop(self):
+        """run을 멈춘다. 다른 스레드나 signal handler에서 호출한다."""
+        self._stop.set()
+
+    def run(self, max_connections: Optional[int] = None):
+        """stop이 호출될 때까지 스트림을 받아서 저장한다.
+
+        Args:
+            max_connections:
+                연결할 최대 횟수. 없으면 계속 다시 연결한다.
+        """
+        self._stop.clear()
+        delay = self.reconnect_delay
+        connections = 0
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            self._backfill_executor = executor
+            try:
+                while not self._stop.is_set():
+                    connections += 1
+                    try:
+                        with UpbitWebSocket(self.url) as ws:
+                            ws.subscribe(self.tickers)
+                            self._connected = False
+                            delay = self.reconnect_delay
+                            self._receive(ws)
+                    except ConnectionError as e:
+                        logger.warning(f"upbit websocket disconnected: {e}")
+
+                    self._on_disconnected()
+                    if max_connections is not None and connections >= max_connections:
+                        break
+                    self._stop.wait(delay)
+                    delay = min(delay * 2, self.max_reconnect_delay)
+            finally:
+                if self._backfill_future is not None:
+                    self._backfill_future.result()
+                self.flush()
+        self._backfill_executor = None
+
+    def flush(self):
+        """닫힌 봉들을 저장하고 끝난 분의 backfill을 시작한다.
+
+        backfill이 아직 돌고 있으면 아무것도 하지 않는다.
+        run 밖에서 호출하면 backfill을 바로 실행한다.
+        """
+        if self._backfill_future is not None and not self._backfill_future.done():
+            return
+
+        for ticker, df in self._builder.pop_closed().items():
+            try:
+                price = self._coins[ticker].price
+                price._data.append(df)
+                price._after_update(df.index[0])
+                self.bars_saved += len(df)
+            except Exception as e:
+                logger.error(f"{ticker} failed to save streamed bars. {e}")
+
+        ready = [(start, end) for start, end in self._pending_backfills if self._watermark_ms >= end + MINUTE_MS]
+        if not ready:
+            return
+        if self._backfill_executor is None:
+            self._run_backfills(ready)
+        else:
+            self._backfill_future = self._backfill_executor.submit(self._run_backfills, ready)
+
+    def _run_backfills(self, ready: list[tuple[int, int]]):
+        """backfill들을 실행하고 끝난 것은 예약에서 뺀다. 실패한 것은 다음 flush에서 다시 한다."""
+        for start, end in ready:
+            try:
+                self._backfill(start, end)
+            except Exception as e:
+                logger.error(f"backfill failed. {e}")
+                continue
+            self._pending_backfills.remove((start, end))
+
+    def _on_connected(self, connected_ms: int):
+        """연결 후 첫 체결을 받았을 때 호출된다.
+
+        첫 체결의 분까지는 스트림으로 봉을 만들지 않고
+        끊겼던 시간(처음 연결이면 첫 체결의 분)부터 그 분까지 backfill을 예약한다.
+        """
+        self._connected = True
+        self._builder.skip_before(connected_ms)
+        connected_minute = connected_ms // MINUTE_MS * MINUTE_MS
+        start = connected_minute if self._disconnected_ms is None else min(self._disconnected_ms, connected_minute)
+        self._pending_backfills.append((start, connected_minute))
+        self._disconnected_ms = None
+
+    def _on_disconnected(self):
+        """만들던 봉을 버리고 끊긴 시간을 기록한다."""
+        discarded_ms = self._builder.discard_open()
+        if self._disconnected_ms is None:
+            self._disconnected_ms = (discarded_ms if discarded_ms is not None
+                                     else self._now_ms() // MINUTE_MS * MINUTE_MS)
+
+    def _receive(self, ws: UpbitWebSocket):
+        last_flush = self._clock()
+        record = open(self.record_path, 'a') if self.record_path else None
+        try:
+            while not self._stop.is_set():
+                message = ws.recv()
+                if message is None:
+                    self._advance(self._clock() * 1000)
+                else:
+                    if record is not None:
+                        record.write(json.dumps(message) + '\n')
+                    self._on_message(message)
+
+                if self._clock() - last_flush >= self.flush_interval:
+                    self.flush()
+                    last_flush = self._clock()
+        finally:
+            if record is not None:
+                record.close()
+
+    def _on_message(self, message: dict):
+        if message.get('type') != 'trade' or message.get('code') not in self._coins:
+            return
+        timestamp_ms = int(message['trade_timestamp'])
+        if not self._connected:
+            self._on_connected(timestamp_ms)
+        self._watermark_ms = max(self._watermark_ms, timestamp_ms)
+        self._builder.add_trade(message['code'], float(message['trade_price']), float(message['trade_volume']),
+                                timestamp_ms)
+
+    def _advance(self, now_ms: float):
+        self._watermark_ms = max(self._watermark_ms, int(now_ms))
+        self._builder.advance(self._watermark_ms)
+
+    def _now_ms(self) -> int:
+        """체결 시간 기준의 현재 시간, 아직 체결을 받지 않았으면 벽시계"""
+        return self._watermark_ms or int(self._clock() * 1000)
+
+    def _backfill(self, start_ms: int, end_ms: int):
+        """start_ms 분부터 end_ms 분까지를 REST로 받는다.
+
+        업데이트는 start_time < end_time 이어야 하므로 end_ms 다음 분까지 요청한다.
+        다음 분은 스트림으로 만든 봉이 나중에 저장되면서 덮어쓴다.
+        """
+        start_time = nd.NTime(pd.Timestamp(start_ms, unit='ms', tz='UTC').tz_convert(nd.TimeZone.SEOUL.value))
+        end_time = nd.NTime(pd.Timestamp(end_ms + MINUTE_MS, unit='ms', tz='UTC').tz_convert(nd.TimeZone.SEOUL.value))
+        logger.info(f"backfill {len(self._coins)} coins from {start_time} to {end_time}")
+        report = PriceUpdatePool(self.backfill_jobs)(list(self._coins.values()), start_time=start_time,
+                                                     end_time=end_time)
+        for result in report.failed:
+            logger.error(f"{result.name} backfill failed. {result.error}")
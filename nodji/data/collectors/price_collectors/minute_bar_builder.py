@@ -0,0 +1,118 @@
+"""체결(trade)들로 1분봉을 만드는 모듈"""
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+import nodji as nd
+
+MINUTE_MS = 60_000
+COLUMNS = ['Open', 'High', 'Low', 'Close', 'TradePrice', 'Volume']
+
+
+class MinuteBarBuilder:
+    """종목별로 체결을 모아서 1분봉을 만든다.
+
+    Notes:
+        열린 봉, 닫힌 봉:
+            종목마다 지금 만들고 있는 봉(열린 봉)은 하나뿐이다.
+            다음 분의 체결이 오거나, 시간이 봉의 끝 + grace_ms를 지나면 닫힌 봉이 된다.
+            닫힌 봉만 pop_closed로 꺼내서 저장한다.
+
+        시간:
+            벽시계가 아닌 체결 시간(trade_timestamp)으로 시간을 잰다.
+            그래서 녹화한 메시지를 replay 해도 같은 봉이 만들어진다.
+            메시지가 없을때는 호출하는 쪽에서 advance로 시간을 넘겨준다.
+
+        늦은 체결:
+            이미 닫힌 봉의 체결이 늦게 오면 버리고 late_trades만 센다.
+            그 분의 값은 나중에 REST 업데이트로 맞춰진다.
+
+        columns:
+            CoinPriceConverter와 같다.
+            TradePrice는 체결 금액(가격 * 수량)의 합, Volume은 수량의 합이다.
+    """
+
+    def __init__(self, grace_ms: int = 2_000):
+        self.grace_ms = grace_ms
+        self.late_trades = 0
+        self._open: dict[str, list] = {}
+        self._closed: dict[str, list[list]] = {}
+        self._last_closed: dict[str, int] = {}
+        self._skip_before: int = 0
+        self._next_close_ms: Optional[int] = None
+
+    def __len__(self):
+        """닫혔지만 아직 꺼내지 않은 봉의 수"""
+        return sum(len(bars) for bars in self._closed.values())
+
+    def skip_before(self, time_ms: int):
+        """time_ms가 속한 분과 그 이전의 봉은 만들지 않는다.
+
+        연결한 직후의 분은 연결 전의 체결이 빠져 있어서 온전한 봉이 아니다.
+        """
+        self._skip_before = time_ms // MINUTE_MS * MINUTE_MS + MINUTE_MS
+
+    def add_trade(self, ticker: str, price: float, volume: float, timestamp_ms: int):
+        minute = timestamp_ms // MINUTE_MS * MINUTE_MS
+        if minute < self._skip_before:
+            return
+
+        bar = self._open.get(ticker)
+        if bar is not None and minute > bar[0]:
+            self._close(ticker)
+            bar = None
+
+        if bar is None:
+            if minute <= self._last_closed.get(ticker, -1):
+                self.late_trades += 1
+                return
+            self._open[ticker] = [minute, price, price, price, price, price * volume, volume]
+            close_ms = minute + MINUTE_MS + self.grace_ms
+            if self._next_close_ms is None or close_ms < self._next_close_ms:
+                self._next_close_ms = close_ms
+        elif minute < bar[0]:
+            self.late_trades += 1
+        else:
+            bar[2] = max(bar[2], price)
+            bar[3] = min(bar[3], price)
+            bar[4] = price
+            bar[5] += price * volume
+            bar[6] += volume
+        self.advance(timestamp_ms)
+
+    def advance(self, now_ms: int):
+        """now_ms 기준으로 끝난 봉들을 닫는다."""
+        if self._next_close_ms is None or now_ms < self._next_close_ms:
+            return
+        for ticker in [ticker for ticker, bar in self._open.items()
+                       if bar[0] + MINUTE_MS + self.grace_ms <= now_ms]:
+            self._close(ticker)
+        self._next_close_ms = min((bar[0] + MINUTE_MS + self.grace_ms for bar in self._open.values()), default=None)
+
+    def discard_open(self) -> Optional[int]:
+        """열린 봉들을 버린다. 연결이 끊겼을 때 호출한다.
+
+        Returns:
+            버린 봉들 중 가장 이른 분(ms), 버린 봉이 없으면 None
+        """
+        earliest = min((bar[0] for bar in self._open.values()), default=None)
+        self._open.clear()
+        self._next_close_ms = None
+        return earliest
+
+    def pop_closed(self) -> dict[str, pd.DataFrame]:
+        """닫힌 봉들을 종목별 dataframe으로 꺼낸다."""
+        closed, self._closed = self._closed, {}
+        frames = {}
+        for ticker, bars in closed.items():
+            array = np.asarray(bars, dtype=np.float64)
+            index = pd.to_datetime(array[:, 0].astype(np.int64), unit='ms', utc=True)
+            index = index.tz_convert(nd.TimeZone.SEOUL.value).rename('date')
+            frames[ticker] = pd.DataFrame(array[:, 1:], index=index, columns=COLUMNS)
+        return frames
+
+    def _close(self, ticker: str):
+        bar = self._open.pop(ticker)
+        self._closed.setdefault(ticker, []).append(bar)
+        self._last_closed[ticker] = bar[0]
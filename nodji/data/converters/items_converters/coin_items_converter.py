@@ -1,40 +1,26 @@
-from dataclasses import asdict
+from typing import Iterable
 
 import pandas as pd
 
-from nodji.assets.coin import Coin, CoinMarketCaution
+from nodji.assets.coin import Coin
+from nodji.assets.coin_table import CoinTable
 from nodji.data.converters.items_converters.items_converter_base import AssetItemsConverterBase
 
 
 class CoinItemsConverter(AssetItemsConverterBase):
-    def dataframe_to_asset_items(self, dataframe: pd.DataFrame) -> list['Coin']:
-        if dataframe.empty:
-            return []
-        else:
-            coins = []
-            for _, row in dataframe.iterrows():
-                caution = CoinMarketCaution(**row['caution'])
-                coin = Coin(
-                    ticker=row['ticker'],
-                    kor_name=row['kor_name'],
-                    eng_name=row['eng_name'],
-                    warning=row['warning'],
-                    caution=caution
-                )
-                coins.append(coin)
-            return coins
-
-    def asset_items_to_dataframe(self, assets: list[Coin]) -> pd.DataFrame:
-        return pd.DataFrame([asdict(asset) for asset in assets])
-
-    def api_to_asset_items(self, coins: list[dict]) -> list['Coin']:
-        return [Coin(ticker=coin['market'],
-                     kor_name=coin['korean_name'],
-                     eng_name=coin['english_name'],
-                     warning=coin['market_event']['warning'],
-                     caution=CoinMarketCaution(coin['market_event']['caution']['PRICE_FLUCTUATIONS'],
-                                               coin['market_event']['caution']['TRADING_VOLUME_SOARING'],
-                                               coin['market_event']['caution']['DEPOSIT_AMOUNT_SOARING'],
-                                               coin['market_event']['caution']['GLOBAL_PRICE_DIFFERENCES'],
-                                               coin['market_event']['caution']['CONCENTRATION_OF_SMALL_ACCOUNTS']))
-                for coin in coins]
+    """코인 종목 정보 변환
+
+    Notes:
+        종목 하나씩 Coin을 만들지 않고 열 단위로 CoinTable을 만든다.
+    """
+
+    def dataframe_to_asset_items(self, dataframe: pd.DataFrame) -> CoinTable:
+        return CoinTable.from_dataframe(dataframe)
+
+    def asset_items_to_dataframe(self, assets: Iterable[Coin]) -> pd.DataFrame:
+        if not isinstance(assets, CoinTable):
+            assets = CoinTable.from_coins(assets)
+        return assets.to_dataframe()
+
+    def api_to_asset_items(self, coins: list[dict]) -> CoinTable:
+        return CoinTable.from_api(coins)
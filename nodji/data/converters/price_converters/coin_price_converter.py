@@ -1,12 +1,37 @@
+import time
+
 import pandas as pd
 import requests
 import nodji as nd
 from .asset_price_converter_base import AssetPriceConverterBase
+from ....common.metrics import metrics
 
 
 class CoinPriceConverter(AssetPriceConverterBase):
     def api_to_dataframe(self, response: requests.Response) -> pd.DataFrame:
-        df = pd.DataFrame(response.json())
+        """
+        Notes:
+            빈 응답:
+                요청한 시간 이전에 캔들이 없으면 빈 리스트가 온다.
+                그럴때는 column과 index 형식만 있는 빈 dataframe을 반환한다.
+
+            metrics:
+                변환에 걸린 시간과 종목별로 받은 행 수를 기록한다.
+        """
+        started = time.perf_counter()
+        df = self._to_dataframe(response.json())
+        if metrics.enabled:
+            metrics.observe('nodji_convert_seconds', time.perf_counter() - started, converter='coin_price')
+            metrics.inc('nodji_rows_received_total', len(df), ticker=self._assets._coin.ticker)
+        return df
+
+    @staticmethod
+    def _to_dataframe(candles: list[dict]) -> pd.DataFrame:
+        if not candles:
+            index = pd.DatetimeIndex([], tz=nd.TimeZone.SEOUL.value, name='date')
+            return pd.DataFrame(columns=['Open', 'High', 'Low', 'Close', 'TradePrice', 'Volume'],
+                                index=index, dtype='float64')
+        df = pd.DataFrame(candles)
         df = df[['candle_date_time_kst',
                  'opening_price',
                  'high_price',
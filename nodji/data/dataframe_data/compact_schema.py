@@ -0,0 +1,129 @@
+"""시계열 dataframe을 작은 dtype으로 바꿔서 저장하는 compact schema
+
+저장할 때 encode_compact_schema로 바꾸고 읽을 때 decode_compact_schema로 되돌린다.
+(DatetimeIndexSaver, read_partition)
+
+column:
+    float32:
+        float32로 바꿨다가 되돌려도 값이 같으면 float32로 저장한다.
+        정수 원화 가격처럼 유효 숫자가 적은 값들이다. 읽을 때도 float32로 두므로 메모리도 절반이 된다.
+    scaled int32:
+        float32로는 안되지만 10^scale을 곱한 정수가 int32에 들어가고 되돌려도 값이 같으면
+        int32로 저장한다. 0.00001234 같은 소수 가격이다. 읽을 때는 10^scale로 나눠서 float64로 되돌린다.
+    그대로:
+        둘 다 안되는 column(거래대금처럼 자리수가 많은 값)은 float64로 둔다.
+
+index:
+    분 단위 시간이면 epoch로부터의 분(int32)으로 저장한다. 시간대와 이름은 attrs에 적어둔다.
+
+검증:
+    바꾼 dataframe을 다시 되돌려서 원래 값과 모두 같은지 확인한다.
+    하나라도 다르면 바꾸지 않은 dataframe을 그대로 저장한다.
+
+어떻게 바꿨는지는 dataframe의 attrs에 적어둔다. pickle, parquet, feather 모두 attrs를 같이 저장한다.
+attrs가 없는 파일(예전 파일)은 decode_compact_schema가 그대로 반환한다.
+"""
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pandas as pd
+
+from ...common.time_intervals import MINUTE_NS
+
+ATTRS_KEY = 'nodji_compact_schema'
+MAX_SCALE = 8
+
+_INT32_MAX = np.iinfo(np.int32).max
+
+
+def is_compact_schema(df: pd.DataFrame) -> bool:
+    return ATTRS_KEY in df.attrs
+
+
+def encode_compact_schema(df: pd.DataFrame) -> Optional[pd.DataFrame]:
+    """df를 compact schema로 바꾼다. 값을 그대로 되돌릴 수 없으면 None"""
+    if not isinstance(df.index, pd.DatetimeIndex):
+        return None
+    minutes = _encode_index(df.index)
+    if minutes is None:
+        return None
+
+    columns = {}
+    scales = {}
+    for name in df.columns:
+        values = df[name].to_numpy()
+        if values.dtype.kind != 'f':
+            columns[name] = values
+            continue
+        encoded, scale = _encode_column(values)
+        columns[name] = encoded
+        if scale is not None:
+            scales[name] = scale
+
+    encoded_df = pd.DataFrame(columns, index=pd.Index(minutes, name=df.index.name), copy=False)
+    encoded_df.attrs[ATTRS_KEY] = {'scales': scales, 'tz': None if df.index.tz is None else str(df.index.tz)}
+    if not _verify(df, decode_compact_schema(encoded_df)):
+        return None
+    return encoded_df
+
+
+def decode_compact_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """compact schema로 저장된 df를 되돌린다. compact schema가 아니면 그대로 반환한다."""
+    schema = df.attrs.get(ATTRS_KEY)
+    if schema is None:
+        return df
+    index = pd.DatetimeIndex(df.index.to_numpy(dtype=np.int64) * MINUTE_NS, name=df.index.name)
+    if schema['tz']:
+        # nd.TimeZone과 같은 zoneinfo 객체로 되돌려야 새로 받은 데이터와 합칠 때 index가 object로 바뀌지 않는다.
+        index = index.tz_localize('UTC').tz_convert(ZoneInfo(schema['tz']))
+    columns = {}
+    for name in df.columns:
+        scale = schema['scales'].get(name)
+        values = df[name].to_numpy()
+        columns[name] = values if scale is None else values / 10.0 ** scale
+    return pd.DataFrame(columns, index=index, columns=df.columns, copy=False)
+
+
+def _encode_index(index: pd.DatetimeIndex) -> Optional[np.ndarray]:
+    """분 단위 시간이면 epoch로부터의 분 (int32)"""
+    ns = index.as_unit('ns').asi8
+    if len(ns) and (ns.min() < 0 or ns.max() // MINUTE_NS > _INT32_MAX):
+        return None
+    if (ns % MINUTE_NS).any():
+        return None
+    return (ns // MINUTE_NS).astype(np.int32)
+
+
+def _encode_column(values: np.ndarray) -> tuple[np.ndarray, Optional[int]]:
+    """(저장할 값, scale). scale이 None이면 scaled int가 아니다."""
+    as_float32 = values.astype(np.float32)
+    if np.array_equal(as_float32.astype(values.dtype), values, equal_nan=True):
+        return as_float32, None
+
+    if np.isnan(values).any():
+        return values, None
+    for scale in range(MAX_SCALE + 1):
+        scaled = np.round(values * 10.0 ** scale)
+        if np.abs(scaled).max(initial=0) > _INT32_MAX:
+            break
+        if np.array_equal(scaled / 10.0 ** scale, values):
+            return scaled.astype(np.int32), scale
+    return values, None
+
+
+def _verify(df: pd.DataFrame, decoded: pd.DataFrame) -> bool:
+    """되돌린 값이 원래 값과 모두 같은지
+
+    시간대는 이름만 비교한다. (같은 시간대라도 pytz, zoneinfo 객체가 섞여 있을 수 있다)
+    """
+    if list(decoded.columns) != list(df.columns) or str(decoded.index.tz) != str(df.index.tz):
+        return False
+    if not np.array_equal(decoded.index.asi8, df.index.as_unit('ns').asi8):
+        return False
+    for name in df.columns:
+        original = df[name].to_numpy()
+        restored = decoded[name].to_numpy().astype(original.dtype)
+        if not np.array_equal(restored, original, equal_nan=original.dtype.kind == 'f'):
+            return False
+    return True
@@ -7,11 +7,15 @@ from pathlib import Path
 from typing import Optional
 
 import nodji as nd
+import numpy as np
 import pandas as pd
 
 from loguru import logger
 from ...common.ntime import NTime
 from .dataframe_data_saver import DataFrameDataSaverBase
+from .partitions import PartitionManifest, iter_partition_frames, list_partitions, read_partition
+from ...common.time_intervals import find_missing_intervals, subtract_intervals
+from ...common.dataframe_formats import get_dataframe_format
 
 
 class DataFrameData:
@@ -28,11 +32,38 @@ class DataFrameData:
             일반 데이터와 분당 시간데이터가 있다.
             index가 시계열인 데이터는 Monlty로 저장한다.
             이것도 나중에는 직접 지정할 수 있어야 할것이다.
+
+        변경된 월
+            load, save 이후에 데이터가 더해진 월들과 그 월에서 가장 이른 변경 시간을
+            dirty_months로 기록한다. 저장할 때는 그 월들의 partition만 저장한다.
+            __call__로 dataframe을 통째로 바꾸면 어떤 월이 바뀌었는지 모르므로 None이 된다.
+
+        저장 형식
+            storage_format으로 pickle, parquet, feather 중에 고를 수 있다.
+            지정하지 않으면 default_storage_format을 따른다.
+            parquet, feather는 column 일부만 읽을 수 있고 압축해서 저장한다.
+
+        compact schema
+            compact_schema로 partition 데이터를 작은 dtype(float32, scaled int32, 분 단위 int32 index)으로
+            바꿔서 저장할 수 있다. 값이 하나라도 달라지면 바꾸지 않고 저장한다.
+            지정하지 않으면 default_compact_schema를 따른다. (compact_schema 모듈 참고)
     """
+    default_storage_format = nd.StorageFormat.PICKLE
+    default_compact_schema = False
 
-    def __init__(self, name: str):
+    def __init__(self, name: str, storage_format: Optional[nd.StorageFormat] = None, directory: Optional[Path] = None,
+                 compact_schema: Optional[bool] = None):
+        """
+        Args:
+            directory:
+                저장할 폴더. 지정하지 않으면 db 폴더에 저장한다.
+        """
         self.name = name
+        self._directory = directory
+        self.storage_format = self.default_storage_format if storage_format is None else storage_format
+        self.compact_schema = self.default_compact_schema if compact_schema is None else compact_schema
         self._df = pd.DataFrame()
+        self.dirty_months: Optional[dict[tuple[int, int], pd.Timestamp]] = None
 
     def __repr__(self):
         return self._df.__repr__()
@@ -65,13 +96,22 @@ class DataFrameData:
         """
         assert isinstance(df, pd.DataFrame), f"df must be pd.DataFrame but {type(df)}"
         self._df = df
+        self.dirty_months = None
         return self
 
     def __add__(self, other):
-        """데이터를 더한다."""
+        """데이터를 더한다.
+
+        시계열 데이터는 시간으로 중복을 없앤다. 같은 시간이 있으면 더하는 데이터(other)의 행을 남긴다.
+        값으로 중복을 없애면 값이 같은 다른 시간의 행이 사라지고, 값이 다른 같은 시간의 행은 둘 다 남는다.
+        """
         if isinstance(other, pd.DataFrame):
-            self._df = pd.concat([self._df, other]).drop_duplicates()
-            self._df.sort_index(inplace=True)
+            if isinstance(other.index, pd.DatetimeIndex):
+                self._df = nd.merge_dataframe_by_date(self._df, other)
+            else:
+                self._df = pd.concat([self._df, other]).drop_duplicates()
+                self._df.sort_index(inplace=True)
+            self._mark_dirty(other)
             return self
         else:
             raise NotImplementedError(f"other must be pd.DataFrame but {type(other)}")
@@ -87,6 +127,17 @@ class DataFrameData:
         else:
             raise NotImplementedError("item type must be NTime")
 
+    def _mark_dirty(self, df: pd.DataFrame):
+        """df가 걸친 월들과 각 월에서 가장 이른 변경 시간을 기록한다."""
+        if self.dirty_months is None or df.empty:
+            return
+        if isinstance(df.index, pd.DatetimeIndex):
+            keys = np.asarray(df.index.year * 100 + df.index.month)
+            for key, changed_time in pd.Series(df.index, index=keys).groupby(level=0).min().items():
+                month = int(key) // 100, int(key) % 100
+                if month not in self.dirty_months or changed_time < self.dirty_months[month]:
+                    self.dirty_months[month] = changed_time
+
     @property
     def exists_file(self):
         return nd.exists_path(self.path)
@@ -96,11 +147,81 @@ class DataFrameData:
         return not self._df.empty
 
     @property
-    def path(self):
+    def storage(self):
+        """저장 형식에 맞는 파일 읽기, 쓰기 객체"""
+        return get_dataframe_format(self.storage_format)
+
+    @property
+    def is_partitioned(self) -> bool:
+        """월별 partition으로 나눠서 저장하는 데이터인지
+
+        메모리의 dataframe이 비어있더라도 partition 폴더가 있으면 partition 데이터로 본다.
+        """
         if isinstance(self._df.index, pd.DatetimeIndex):
-            return nd.Paths.DATABASE / f"{self.name}"
+            return True
+        return nd.exists_directory(self.directory / f"{self.name}")
+
+    @property
+    def directory(self) -> Path:
+        return nd.Paths.DATABASE if self._directory is None else Path(self._directory)
+
+    @property
+    def path(self):
+        if self.is_partitioned:
+            return self.directory / f"{self.name}"
         else:
-            return nd.Paths.DATABASE / f"{self.name}.{nd.consts.Extensions.DATAFRAME_DATA}"
+            return self.directory / f"{self.name}.{self.storage.extension}"
+
+    @property
+    def manifest(self) -> PartitionManifest:
+        """partition 데이터에 대한 기록
+
+        아직 데이터가 없어서 path가 partition 폴더가 아니더라도 항상 partition 폴더의 manifest를 쓴다.
+        (상장 시간처럼 첫 데이터를 받기 전에 기록하는 값들이 있다)
+        """
+        return PartitionManifest(self.directory / self.name, self.name)
+
+    @property
+    def stored_start_time(self) -> NTime:
+        """파일에 저장된 partition 데이터의 처음 시간. 메모리의 데이터와 상관없이 첫 파일의 index만 읽는다."""
+        frames = iter_partition_frames(self.directory / self.name, self.name, self.storage.extension, columns=[])
+        for df in frames:
+            if len(df):
+                return NTime(df.index[0])
+        return NTime(None)
+
+    @property
+    def stored_end_time(self) -> NTime:
+        """파일에 저장된 partition 데이터의 마지막 시간. manifest에 기록된 시간을 쓴다."""
+        manifest = PartitionManifest(self.directory / self.name, self.name)
+        last_end = manifest.last_end
+        if last_end is not None:
+            return NTime(last_end)
+        partitions = list_partitions(self.directory / self.name, self.name, self.storage.extension)
+        if not partitions:
+            return NTime(None)
+        index = read_partition(partitions[-1], columns=[]).index
+        return NTime(index[-1]) if len(index) else NTime(None)
+
+    @property
+    def missing_intervals(self) -> np.ndarray:
+        """처음부터 마지막 시간 사이에 분단위 행이 빠진 구간들 (epoch ns [start, end))
+
+        거래가 없다고 이미 확인된 구간들은 뺀다.
+        """
+        if not isinstance(self._df.index, pd.DatetimeIndex) or self._df.empty:
+            return find_missing_intervals([])
+        index = self._df.index
+        if not index.is_monotonic_increasing:
+            index = index.sort_values()
+        return subtract_intervals(find_missing_intervals(index.asi8), self.manifest.tradeless_intervals)
+
+    @property
+    def missing_times(self) -> list[tuple[NTime, NTime]]:
+        """빠진 구간들을 [처음, 마지막] 분의 NTime으로 반환한다."""
+        tz = self._df.index.tz if isinstance(self._df.index, pd.DatetimeIndex) else None
+        return [(nd.NTime(pd.Timestamp(start, tz=tz)), nd.NTime(pd.Timestamp(end, tz=tz) - pd.Timedelta(minutes=1)))
+                for start, end in self.missing_intervals]
 
     @property
     def cols(self) -> list[str]:
@@ -114,7 +235,7 @@ class DataFrameData:
 
     @property
     def start_time(self) -> Optional[nd.NTime]:
-        if isinstance(self._df.index, pd.DatetimeIndex):
+        if isinstance(self._df.index, pd.DatetimeIndex) and len(self._df):
             return nd.NTime(self._df.index[0])
         return nd.NTime(None)
 
@@ -127,7 +248,7 @@ class DataFrameData:
 
     @property
     def end_time(self) -> Optional[nd.NTime]:
-        if isinstance(self._df.index, pd.DatetimeIndex):
+        if isinstance(self._df.index, pd.DatetimeIndex) and len(self._df):
             return nd.NTime(self._df.index[-1])
         return nd.NTime(None)
 
@@ -138,14 +259,43 @@ class DataFrameData:
         else:
             raise NotImplementedError("value type must be NTime")
 
-    def load(self) -> pd.DataFrame:
-        if nd.exists_path(self.path):
-            return pd.read_pickle(self.path)
+    def load(self,
+             start_time: Optional[NTime] = None,
+             end_time: Optional[NTime] = None,
+             columns: Optional[list[str]] = None) -> pd.DataFrame:
+        """저장된 데이터를 읽어서 설정하고 반환한다.
+
+        Args:
+            start_time, end_time:
+                partition 데이터일 때 읽을 시간 범위. 지정하지 않으면 처음 혹은 끝까지 읽는다.
+            columns:
+                읽을 column들. 지정하지 않으면 모든 column을 읽는다.
+
+        Notes:
+            partition 데이터:
+                시간 범위에 걸치는 월의 partition 파일(혹은 연도별 segment)만 열어서 한번에 합친다.
+                범위의 처음과 끝 파일은 정렬된 index에서 이진 탐색으로 자른다. (iter_partition_frames 참고)
+        """
+        if not nd.exists_path(self.path):
+            df = pd.DataFrame()
+        elif self.is_partitioned:
+            df = self._load_partitions(start_time, end_time, columns)
         else:
+            df = nd.load_dataframe_file(self.path, columns)
+        self._df = df
+        self.dirty_months = {}
+        return df
+
+    def _load_partitions(self, start_time: Optional[NTime], end_time: Optional[NTime], columns) -> pd.DataFrame:
+        start = pd.Timestamp(start_time._time) if start_time else None
+        end = pd.Timestamp(end_time._time) if end_time else None
+        frames = list(iter_partition_frames(self.path, self.name, self.storage.extension, start, end, columns))
+        if not frames:
             return pd.DataFrame()
+        return pd.concat(frames)
 
     def copy(self) -> 'DataFrameData':
-        new_data = DataFrameData(self.name)
+        new_data = DataFrameData(self.name, self.storage_format, self._directory, self.compact_schema)
         new_data(self._df.copy())
         return new_data
 
@@ -153,5 +303,17 @@ class DataFrameData:
         for cls in DataFrameDataSaverBase.__subclasses__():
             if cls.is_match(self._df):
                 cls(self).save()
+                self.dirty_months = {}
                 logger.info(f"{self.name}'s dataframe saved at {self.path}")
                 return
+
+    def append(self, df: pd.DataFrame):
+        """저장된 데이터를 읽지 않고 df의 행들만 더해서 저장한다.
+
+        실시간으로 들어온 행들처럼 저장된 데이터 뒤에 붙는 행들을 저장할 때 쓴다.
+        df가 걸친 월만 저장하므로 partition 끝 이후의 행들은 append 파일로 저장된다.
+        """
+        if self.dirty_months is None:
+            self.dirty_months = {}
+        self += df
+        self.save()
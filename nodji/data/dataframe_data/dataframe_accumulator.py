@@ -0,0 +1,45 @@
+from typing import TYPE_CHECKING
+
+import pandas as pd
+
+if TYPE_CHECKING:
+    from .datafame_data import DataFrameData
+
+
+class DataFrameAccumulator:
+    """페이지 단위로 받은 dataframe들을 모아뒀다가 한번에 DataFrameData에 더한다.
+
+    Notes:
+        이유:
+            DataFrameData에 페이지를 하나씩 더하면 더할 때마다
+            지금까지 모은 전체 데이터를 concat, drop_duplicates, sort_index 한다.
+            페이지가 N개면 O(N^2)이 되므로 페이지들을 모아뒀다가 한번에 더한다.
+
+        flush:
+            모은 행의 수가 flush_rows를 넘으면 그때까지 모은 페이지들을 더한다.
+            마지막에는 꼭 flush를 호출해야 한다.
+            결과는 페이지를 하나씩 더했을 때와 같다.
+    """
+
+    def __init__(self, data: 'DataFrameData', flush_rows: int = 500_000):
+        self._data = data
+        self._flush_rows = flush_rows
+        self._chunks: list[pd.DataFrame] = []
+        self._rows = 0
+
+    def __len__(self):
+        return self._rows
+
+    def append(self, df: pd.DataFrame):
+        assert isinstance(df, pd.DataFrame), f"df must be pd.DataFrame but {type(df)}"
+        self._chunks.append(df)
+        self._rows += len(df)
+        if self._rows >= self._flush_rows:
+            self.flush()
+
+    def flush(self):
+        """모아둔 페이지들을 DataFrameData에 더한다."""
+        if self._chunks:
+            self._data += pd.concat(self._chunks)
+            self._chunks = []
+            self._rows = 0
@@ -1,10 +1,15 @@
-from typing import TYPE_CHECKING
-from dateutil.rrule import rrule, MONTHLY
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
 
+import numpy as np
 import pandas as pd
-import calendar
 
 import nodji as nd
+from .partition_cache import partition_cache
+from ...common.metrics import metrics
+from .partitions import (MonthlyPartition, PartitionManifest, YearlySegment, get_delta_file_path,
+                         get_monthly_file_path, get_segment_file_path, list_delta_files, list_monthly_partitions,
+                         read_partition, write_partition_file)
 
 if TYPE_CHECKING:
     from .datafame_data import DataFrameData
@@ -12,8 +17,8 @@ if TYPE_CHECKING:
 
 def make_database_folder(func):
     def wrapper(self, *args, **kwargs):
-        if not nd.exists_path(nd.Paths.DATABASE):
-            nd.make_directory(nd.Paths.DATABASE)
+        if not nd.exists_path(self._data.directory):
+            nd.make_directory(self._data.directory)
         return func(self, *args, **kwargs)
 
     return wrapper
@@ -36,6 +41,32 @@ class DataFrameDataSaverBase:
 
 
 class DatetimeIndexSaver(DataFrameDataSaverBase):
+    """시계열 데이터를 월별 partition으로 나눠서 저장한다.
+
+    Notes:
+        변경된 월만 저장:
+            DataFrameData가 load, save 이후에 바뀐 월을 기록하고 있다.
+            그 월의 partition만 다시 저장한다.
+            어떤 월이 바뀌었는지 모를때는 데이터가 있는 모든 월을 저장한다.
+
+        append:
+            바뀐 행들이 모두 partition의 마지막 시간 이후라면
+            partition을 읽고 합쳐서 다시 쓰지 않고 append 파일로 저장한다.
+            append 파일이 MAX_DELTAS개가 되면 partition을 합쳐서 다시 쓴다.
+
+        연도별 segment:
+            compaction으로 segment에 합쳐진 월을 다시 저장할 때는
+            segment에서 그 월의 행들을 읽어서 합친 뒤 partition 파일로 쓴다.
+            읽을 때는 partition 파일이 segment의 그 월을 덮어쓴다.
+
+        compact schema:
+            DataFrameData.compact_schema면 partition, append 파일을 작은 dtype으로 바꿔서 저장한다.
+
+        metrics:
+            저장에 걸린 시간과 방식(append, rewrite, new)별로 쓴 partition 수를 기록한다.
+    """
+    MAX_DELTAS = 16
+
     @classmethod
     def is_match(cls, dataframe: pd.DataFrame) -> bool:
         return isinstance(dataframe.index, pd.DatetimeIndex)
@@ -47,23 +78,99 @@ class DatetimeIndexSaver(DataFrameDataSaverBase):
         if self._df.empty:
             return
 
-        start_date = self._df.index[0]
-        end_date = self._df.index[-1]
-        last_day = calendar.monthrange(end_date.year, end_date.month)[1]
-
-        for date in rrule(MONTHLY, dtstart=start_date.replace(day=1), until=end_date.replace(day=last_day)):
-            new_df = self._df[(self._df.index.year == date.year) &
-                              (self._df.index.month == date.month)]
-
-            file_path = self._get_monthly_file_path(date.year, date.month)
-            if nd.exists_path(file_path):
-                old_df = nd.load_dataframe_file(file_path)
-                new_df = nd.merge_dataframe_by_date(new_df, old_df)
-            nd.save_dataframe_file(new_df, file_path)
+        df = self._df if self._df.index.is_monotonic_increasing else self._df.sort_index()
+        keys = np.asarray(df.index.year * 100 + df.index.month)
+        dirty_months = self._data.dirty_months
+        if dirty_months is None:
+            dirty_months = {(int(key) // 100, int(key) % 100): None for key in np.unique(keys)}
+
+        with metrics.time('nodji_save_seconds'):
+            manifest = PartitionManifest(self._path, self._name)
+            stale_files = []
+            for (year, month), changed_time in sorted(dirty_months.items()):
+                start = np.searchsorted(keys, year * 100 + month, side='left')
+                end = np.searchsorted(keys, year * 100 + month, side='right')
+                if start < end:
+                    stale_files += self._save_month(year, month, df.iloc[start:end], changed_time, manifest)
+            manifest.save()
+            # manifest에 append 파일 수를 0으로 기록한 뒤에 지운다. 중간에 멈춰서 남더라도 읽지 않는다.
+            for path in stale_files:
+                path.unlink(missing_ok=True)
+
+    def _save_month(self, year: int, month: int, new_df: pd.DataFrame, changed_time: Optional[pd.Timestamp],
+                    manifest: PartitionManifest) -> list[Path]:
+        """한 월의 partition을 저장한다.
+
+        Args:
+            changed_time:
+                이 월에서 가장 이른 변경 시간. 모르면 None이다.
+                이 시간 이후의 행들만 바뀐 행이다.
+
+        Returns:
+            partition 파일을 다시 써서 더 이상 읽지 않는 append 파일들.
+            manifest에 기록되지 않은 순번의 남은 파일들도 같이 반환한다.
+        """
+        file_path = self._get_monthly_file_path(year, month)
+        partition_end = manifest.get_end(year, month)
+        deltas = manifest.get_deltas(year, month)
+
+        if nd.exists_path(file_path):
+            if self._can_append(changed_time, partition_end, deltas):
+                delta_df = new_df.iloc[new_df.index.searchsorted(changed_time, side='left'):]
+                delta_path = get_delta_file_path(self._path, self._name, year, month, deltas + 1,
+                                                 self._data.storage.extension)
+                self._write(delta_df, delta_path)
+                partition_cache.invalidate(file_path)
+                manifest.set(year, month, max(partition_end, delta_df.index[-1]), deltas + 1)
+                metrics.inc('nodji_partitions_written_total', mode='append')
+                return []
+
+            partition = self._get_partition(year, month)
+            new_df = nd.merge_dataframe_by_date(read_partition(partition), new_df)
+            self._write(new_df, file_path)
+            metrics.inc('nodji_partitions_written_total', mode='rewrite')
+        else:
+            segment_df = self._read_segment_month(year, month)
+            if not segment_df.empty:
+                new_df = nd.merge_dataframe_by_date(segment_df, new_df)
+            self._write(new_df, file_path)
+            metrics.inc('nodji_partitions_written_total', mode='new' if segment_df.empty else 'rewrite')
+        partition_cache.invalidate(file_path)
+        manifest.set(year, month, new_df.index[-1], 0)
+        return list_delta_files(self._path, self._name, year, month, self._data.storage.extension)
+
+    def _write(self, df: pd.DataFrame, path):
+        write_partition_file(df, path, self._data.compact_schema)
+
+    def _can_append(self, changed_time, partition_end, deltas) -> bool:
+        """바뀐 행들이 모두 partition의 마지막 시간 이후라서 append 파일로 저장할 수 있는지
+
+        마지막 시간과 같은 행은 append 파일 쪽 값이 읽을 때 남는다.
+        (실시간으로 받은 마지막 캔들은 나중에 값이 바뀔 수 있다.)
+        """
+        if changed_time is None or partition_end is None:
+            return False
+        return changed_time >= partition_end and deltas < self.MAX_DELTAS
+
+    def _get_partition(self, year, month) -> MonthlyPartition:
+        for partition in list_monthly_partitions(self._path, self._name, self._data.storage.extension):
+            if partition.key == (year, month):
+                return partition
+        return MonthlyPartition(year, month, self._get_monthly_file_path(year, month))
+
+    def _read_segment_month(self, year, month) -> pd.DataFrame:
+        """연도별 segment에 들어있는 그 월의 행들"""
+        segment_path = get_segment_file_path(self._path, self._name, year, self._data.storage.extension)
+        if not nd.exists_path(segment_path):
+            return pd.DataFrame()
+        df = read_partition(YearlySegment(year, segment_path))
+        month_start = pd.Timestamp(year=year, month=month, day=1, tz=df.index.tz)
+        lo = df.index.searchsorted(month_start, side='left')
+        hi = df.index.searchsorted(month_start + pd.DateOffset(months=1), side='left')
+        return df.iloc[lo:hi]
 
     def _get_monthly_file_path(self, year, month):
-        file_name = self._name + '_' + str(year) + str(month).zfill(2)
-        return self._path / f"{file_name}.{nd.consts.Extensions.DATAFRAME_DATA}"
+        return get_monthly_file_path(self._path, self._name, year, month, self._data.storage.extension)
 
 
 class NonDatetimeIndexSaver(DataFrameDataSaverBase):
@@ -73,5 +180,5 @@ class NonDatetimeIndexSaver(DataFrameDataSaverBase):
 
     @make_database_folder
     def save(self):
-        self._df.to_pickle(self._path)
+        nd.save_dataframe_file(self._df, self._path)
 
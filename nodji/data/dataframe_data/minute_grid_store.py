@@ -0,0 +1,214 @@
+"""분단위 캔들을 고정된 시간 격자 위의 배열로 저장하는 store
+
+    db/<name>.grid/
+        meta.json           : column, dtype, capacity, 마지막으로 쓴 시간(end) 정보
+        <column>.bin        : column별 값 배열. epoch부터 몇 분째인지가 배열의 위치이다.
+        valid.bin           : 그 분에 캔들이 있는지 기록한 bitmap
+
+분단위 캔들은 시간 간격이 일정하므로 시간을 index로 찾을 필요 없이
+epoch로부터의 분 수로 바로 위치를 계산할 수 있다.
+파일은 memory map으로 열어서 범위를 읽을 때 복사 없이 slice를 반환한다.
+읽기만 할 때는 읽기 전용으로 열고 write를 할 때만 쓰기 모드로 다시 연다.
+"""
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+
+import nodji as nd
+from ...common.ntime import NTime
+
+_NS_PER_MINUTE = 60 * 10 ** 9
+
+
+@dataclass
+class MinuteGridSlice:
+    """store에서 읽은 범위
+
+    Notes:
+        values:
+            column별 값 배열이다. memory map의 slice이므로 복사본이 아니다.
+            캔들이 없는 분의 값은 의미가 없으므로 valid로 걸러서 써야 한다.
+        valid:
+            각 분에 캔들이 있는지
+        start_offset:
+            범위의 첫 분이 epoch로부터 몇 분째인지
+    """
+    values: dict[str, np.ndarray]
+    valid: np.ndarray
+    start_offset: int
+    epoch: pd.Timestamp
+
+    def __len__(self):
+        return len(self.valid)
+
+    @property
+    def index(self) -> pd.DatetimeIndex:
+        start = self.epoch + pd.Timedelta(minutes=self.start_offset)
+        return pd.date_range(start, periods=len(self), freq='min').tz_convert(nd.TimeZone.SEOUL.value)
+
+    @property
+    def missing_count(self) -> int:
+        return int(len(self.valid) - np.count_nonzero(self.valid))
+
+    def to_dataframe(self, drop_missing: bool = True) -> pd.DataFrame:
+        df = pd.DataFrame(self.values, index=self.index)
+        df.index.name = 'date'
+        return df[self.valid] if drop_missing else df.where(pd.Series(self.valid, index=df.index), axis=0)
+
+
+class MinuteGridStore:
+    """종목 하나의 분단위 ohlcv를 memory map 배열로 저장한다.
+
+    Notes:
+        epoch:
+            모든 종목이 같은 epoch를 쓴다. 그래서 같은 시간은 모든 종목에서 같은 위치이다.
+        capacity:
+            배열은 필요한만큼 GROW_MINUTES 단위로 늘린다.
+            파일을 늘릴 때 앞부분의 빈 공간은 sparse file이라 실제 디스크를 차지하지 않는다.
+        갱신:
+            store는 DataFrameData를 저장할 때 같이 쓰이지 않는다.
+            MinutePriceData가 업데이트 뒤에(_after_update) 바뀐 부분을 써준다.
+            그 밖의 방법으로 저장한 데이터는 end_time과 데이터의 마지막 시간을 비교해서(is_stale) 다시 쓴다.
+    """
+    EPOCH = pd.Timestamp('2017-01-01', tz='UTC')
+    COLUMNS = ('Open', 'High', 'Low', 'Close', 'Volume', 'TradePrice')
+    GROW_MINUTES = 60 * 24 * 32
+
+    def __init__(self, name: str, columns: tuple[str, ...] = COLUMNS, dtype: str = 'float64'):
+        self.name = name
+        self._meta = {'columns': list(columns), 'dtype': dtype, 'capacity': 0}
+        if self._meta_path.exists():
+            self._meta = json.loads(self._meta_path.read_text())
+        self._arrays: dict[str, np.memmap] = {}
+        self._valid: Optional[np.memmap] = None
+        self._writable = False
+
+    def __repr__(self):
+        return f"MinuteGridStore({self.name}, capacity: {self.capacity})"
+
+    @property
+    def path(self) -> Path:
+        return nd.Paths.DATABASE / f"{self.name}.grid"
+
+    @property
+    def _meta_path(self) -> Path:
+        return self.path / 'meta.json'
+
+    @property
+    def columns(self) -> list[str]:
+        return self._meta['columns']
+
+    @property
+    def capacity(self) -> int:
+        return self._meta['capacity']
+
+    @property
+    def exists(self) -> bool:
+        return self._meta_path.exists()
+
+    @property
+    def end_time(self) -> Optional[pd.Timestamp]:
+        """지금까지 쓴 가장 마지막 분"""
+        end = self._meta.get('end')
+        return None if end is None else pd.Timestamp(end)
+
+    def is_stale(self, data_end: Optional[pd.Timestamp]) -> bool:
+        """데이터의 마지막 시간(data_end)까지 store에 쓰지 않았는지"""
+        if data_end is None:
+            return False
+        return self.end_time is None or self.end_time < pd.Timestamp(data_end)
+
+    @classmethod
+    def offset(cls, time: Union[NTime, pd.Timestamp]) -> int:
+        """epoch로부터 몇 분째인지"""
+        return int((pd.Timestamp(time._time if isinstance(time, NTime) else time).value - cls.EPOCH.value)
+                   // _NS_PER_MINUTE)
+
+    def write(self, df: pd.DataFrame):
+        """DatetimeIndex dataframe의 값들을 격자에 쓴다."""
+        assert isinstance(df.index, pd.DatetimeIndex), 'index of df should be DatetimeIndex'
+        if df.empty:
+            return
+        offsets = (df.index.asi8 - self.EPOCH.value) // _NS_PER_MINUTE
+        assert offsets.min() >= 0, f"{self.name} has data before epoch {self.EPOCH}"
+        self._ensure_capacity(int(offsets.max()) + 1)
+
+        for col in self.columns:
+            if col in df.columns:
+                self._arrays[col][offsets] = df[col].to_numpy()
+        np.bitwise_or.at(self._valid, offsets >> 3, np.left_shift(1, offsets & 7).astype(np.uint8))
+        self.flush()
+
+        end = df.index.max()
+        if self.end_time is None or self.end_time < end:
+            self._meta['end'] = end.isoformat()
+            self._write_meta()
+
+    def read(self,
+             start_time: Union[NTime, pd.Timestamp],
+             end_time: Union[NTime, pd.Timestamp],
+             columns: Optional[list[str]] = None) -> MinuteGridSlice:
+        """[start_time, end_time] 범위를 복사 없이 읽는다."""
+        start = max(self.offset(start_time), 0)
+        end = min(self.offset(end_time) + 1, self.capacity)
+        end = max(start, end)
+        self._open()
+
+        columns = self.columns if columns is None else columns
+        values = {col: self._arrays[col][start:end] for col in columns} if self.capacity else \
+            {col: np.empty(0, dtype=self._meta['dtype']) for col in columns}
+        return MinuteGridSlice(values, self._read_valid(start, end), start, self.EPOCH)
+
+    def flush(self):
+        for array in self._arrays.values():
+            array.flush()
+        if self._valid is not None:
+            self._valid.flush()
+
+    def _read_valid(self, start: int, end: int) -> np.ndarray:
+        if start >= end:
+            return np.zeros(0, dtype=bool)
+        bits = np.unpackbits(self._valid[start >> 3:((end - 1) >> 3) + 1], bitorder='little')
+        return bits[start & 7:(start & 7) + end - start].astype(bool)
+
+    def _ensure_capacity(self, minutes: int):
+        if minutes <= self.capacity:
+            self._open(writable=True)
+            return
+        capacity = -(-minutes // self.GROW_MINUTES) * self.GROW_MINUTES
+        nd.make_directory(self.path)
+        itemsize = np.dtype(self._meta['dtype']).itemsize
+        for col in self.columns:
+            self._resize_file(self.path / f"{col}.bin", capacity * itemsize)
+        self._resize_file(self.path / 'valid.bin', -(-capacity // 8))
+        self._meta['capacity'] = capacity
+        self._write_meta()
+        self._arrays = {}
+        self._valid = None
+        self._open(writable=True)
+
+    def _write_meta(self):
+        self._meta_path.write_text(json.dumps(self._meta))
+
+    @staticmethod
+    def _resize_file(file_path: Path, size: int):
+        with open(file_path, 'ab') as f:
+            f.truncate(size)
+
+    def _open(self, writable: bool = False):
+        """memory map을 연다. 읽기 전용으로 열려 있는데 writable이면 쓰기 모드로 다시 연다."""
+        if not self.capacity:
+            return
+        if self._valid is not None and (self._writable or not writable):
+            return
+        mode = 'r+' if writable else 'r'
+        for col in self.columns:
+            self._arrays[col] = np.memmap(self.path / f"{col}.bin", dtype=self._meta['dtype'], mode=mode,
+                                          shape=(self.capacity,))
+        self._valid = np.memmap(self.path / 'valid.bin', dtype=np.uint8, mode=mode,
+                                shape=(-(-self.capacity // 8),))
+        self._writable = writable
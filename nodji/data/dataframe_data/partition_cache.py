@@ -0,0 +1,141 @@
+"""읽어온 partition dataframe을 프로세스 안에서 공유하는 cache
+
+Coin.price는 접근할 때마다 새 CoinPriceData를 만들기 때문에
+같은 partition 파일을 계속 다시 읽게 된다.
+partition을 읽는 곳(read_partition)에서 이 cache를 거치게 해서 다시 읽지 않게 한다.
+"""
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+
+class PartitionCache:
+    """partition dataframe의 LRU cache
+
+    Notes:
+        key:
+            (partition 파일 경로, 읽은 columns)
+            모든 column을 읽어둔 partition이 있으면 일부 column 요청도 거기서 잘라서 준다.
+
+        무효화:
+            saver가 partition을 다시 쓰면 invalidate로 해당 경로의 세대(generation)를 올린다.
+            다른 프로세스가 파일을 바꾼 경우를 위해 파일들의 mtime, 크기도 같이 비교한다.
+            세대와 mtime, 크기는 파일을 읽기 전에 get_version으로 받아서 put에 넘긴다.
+            읽는 동안 invalidate 되었다면 put은 읽은 dataframe을 넣지 않는다.
+            (put할 때의 세대를 쓰면 invalidate 전에 읽은 예전 데이터가 유효한 것으로 남는다)
+
+        메모리:
+            dataframe의 memory_usage 합이 max_bytes를 넘으면 가장 오래 쓰지 않은 것부터 버린다.
+
+        주의:
+            cache에서 받은 dataframe은 다른 곳과 공유하므로 직접 수정하면 안된다.
+    """
+
+    def __init__(self, max_bytes: int = 512 * 2 ** 20):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[tuple, tuple] = OrderedDict()
+        self._generations: dict[str, int] = {}
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"PartitionCache({self.stats})"
+
+    @property
+    def stats(self) -> dict:
+        return {'hits': self._hits,
+                'misses': self._misses,
+                'evictions': self._evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes}
+
+    def get(self, files: tuple[Path, ...], columns: Optional[list[str]] = None) -> Optional[pd.DataFrame]:
+        base = str(files[0])
+        signature = self._get_signature(files)
+        with self._lock:
+            for key in self._get_candidate_keys(base, columns):
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                df, entry_signature, generation, _ = entry
+                if entry_signature != signature or generation != self._generations.get(base, 0):
+                    self._remove(key)
+                    continue
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return df if key[1] == self._get_columns_key(columns) else df[columns]
+            self._misses += 1
+            return None
+
+    def get_version(self, files: tuple[Path, ...]) -> tuple[int, tuple]:
+        """파일을 읽기 전의 (세대, mtime과 크기). 읽은 뒤에 put에 넘긴다."""
+        signature = self._get_signature(files)
+        with self._lock:
+            return self._generations.get(str(files[0]), 0), signature
+
+    def put(self, files: tuple[Path, ...], columns: Optional[list[str]], df: pd.DataFrame, version: tuple[int, tuple]):
+        """version은 df를 읽기 전에 get_version으로 받은 값이다."""
+        nbytes = int(df.memory_usage(index=True, deep=False).sum())
+        if nbytes > self.max_bytes:
+            return
+        base = str(files[0])
+        key = (base, self._get_columns_key(columns))
+        generation, signature = version
+        with self._lock:
+            if generation != self._generations.get(base, 0):
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (df, signature, generation, nbytes)
+            self._bytes += nbytes
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._evictions += 1
+
+    def invalidate(self, path: Path):
+        """partition 파일이 다시 쓰였을 때 호출한다."""
+        base = str(path)
+        with self._lock:
+            self._generations[base] = self._generations.get(base, 0) + 1
+            for key in [key for key in self._entries if key[0] == base]:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    @staticmethod
+    def _get_columns_key(columns: Optional[list[str]]):
+        return None if columns is None else tuple(columns)
+
+    def _get_candidate_keys(self, base: str, columns: Optional[list[str]]):
+        keys = [(base, self._get_columns_key(columns))]
+        if columns is not None:
+            keys.append((base, None))
+        return keys
+
+    @staticmethod
+    def _get_signature(files: tuple[Path, ...]) -> tuple:
+        signature = []
+        for path in files:
+            try:
+                stat = Path(path).stat()
+            except FileNotFoundError:
+                return ()
+            signature.append((str(path), stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def _remove(self, key):
+        _, _, _, nbytes = self._entries.pop(key)
+        self._bytes -= nbytes
+
+
+partition_cache = PartitionCache()
@@ -0,0 +1,161 @@
+"""오래된 월별 partition들을 연도별 segment로 합친다.
+
+    db/KRW-BTC/KRW-BTC_202301.df ... KRW-BTC_202312.df (+ append 파일들)
+        -> db/KRW-BTC/KRW-BTC_2023.df
+
+종목이 수백개이고 몇 년치가 쌓이면 db 폴더에 작은 파일이 수만개가 되고
+읽을 때 파일을 찾고 여는 시간이 대부분을 차지한다.
+더 이상 바뀌지 않는 월들을 한 해에 하나씩 파일로 합쳐서 파일 수를 줄인다.
+최근 월들은 append가 싸도록 그대로 월별 partition으로 둔다.
+
+압축:
+    segment는 데이터의 저장 형식으로 쓴다. parquet, feather는 항상 압축하고 파일이 클수록 더 잘 줄어든다.
+    pickle은 compress를 주면 gzip으로 압축한다.
+    결과는 benchmarks/compaction_bench.py로 확인한다.
+"""
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+from loguru import logger
+
+import nodji as nd
+from .partition_cache import partition_cache
+from .partitions import (PartitionManifest, get_segment_file_path, list_delta_files, list_monthly_partitions,
+                         list_yearly_segments, read_partition, write_partition_file)
+
+
+@dataclass
+class CompactionResult:
+    """compaction 전후의 파일 수와 크기"""
+    name: str
+    files_before: int = 0
+    files_after: int = 0
+    bytes_before: int = 0
+    bytes_after: int = 0
+    segments_written: int = 0
+
+    def __add__(self, other: 'CompactionResult') -> 'CompactionResult':
+        return CompactionResult('total',
+                                self.files_before + other.files_before,
+                                self.files_after + other.files_after,
+                                self.bytes_before + other.bytes_before,
+                                self.bytes_after + other.bytes_after,
+                                self.segments_written + other.segments_written)
+
+
+def compact_partitions(data: 'nd.DataFrameData',
+                       hot_months: int = 1,
+                       compress: bool = False,
+                       now: Optional[pd.Timestamp] = None) -> CompactionResult:
+    """data의 오래된 월별 partition들을 연도별 segment로 합친다.
+
+    Args:
+        hot_months:
+            지금부터 몇 개월을 월별 partition으로 남길지. 1이면 이번 달만 남긴다.
+        compress:
+            segment를 압축해서 저장할지. pickle일 때만 의미가 있다. (parquet, feather는 항상 압축한다)
+            pickle을 gzip으로 압축하면 크기는 절반 정도가 되지만 읽는 시간이 몇 배 걸린다.
+            자주 읽지 않는 데이터를 보관할 때만 쓴다.
+        now:
+            지금 시간. 지정하지 않으면 현재 시간
+
+    Notes:
+        합치는 순서:
+            이미 segment가 있으면 segment에 합친다. 같은 월은 partition 파일의 행들을 쓴다.
+            segment를 다 쓴 뒤에 합친 월의 partition 파일을 먼저 지우고 append 파일들을 지운다.
+            중간에 멈추더라도 partition 파일이 남아 있으면 그 파일이 segment의 그 월을 덮어쓰므로 데이터가 바뀌지 않는다.
+            partition 파일 없이 남은 append 파일은 읽지 않고 그 월을 다시 저장할 때 지운다. (partitions 참고)
+
+        compact schema:
+            data.compact_schema면 segment도 작은 dtype으로 바꿔서 저장한다.
+
+        manifest:
+            합친 월들의 append 파일 수를 0으로 기록한다. 마지막 시간은 그대로 둔다.
+
+        주의:
+            같은 종목을 업데이트 하는 중에는 부르지 않는다.
+    """
+    directory = data.directory / data.name
+    extension = data.storage.extension
+    now = pd.Timestamp.now(tz=nd.TimeZone.SEOUL.value) if now is None else pd.Timestamp(now)
+    hot_start = now - pd.DateOffset(months=hot_months - 1)
+    hot_key = hot_start.year, hot_start.month
+
+    before = _get_files(directory, data.name, extension)
+    result = CompactionResult(data.name, len(before), len(before), _get_bytes(before), _get_bytes(before))
+
+    cold = {}
+    for partition in list_monthly_partitions(directory, data.name, extension):
+        if partition.key < hot_key:
+            cold.setdefault(partition.year, []).append(partition)
+    if not cold:
+        return result
+
+    segments = {segment.year: segment for segment in list_yearly_segments(directory, data.name, extension)}
+    manifest = PartitionManifest(directory, data.name)
+    for year, partitions in sorted(cold.items()):
+        frames = [read_partition(partition) for partition in partitions]
+        if year in segments:
+            months = [partition.month for partition in partitions]
+            segment_df = read_partition(segments[year])
+            frames.insert(0, segment_df[~segment_df.index.month.isin(months)])
+        df = pd.concat(frames).sort_index(kind='stable')
+
+        segment_path = get_segment_file_path(directory, data.name, year, extension)
+        write_partition_file(df, segment_path, data.compact_schema, compress)
+        partition_cache.invalidate(segment_path)
+        for partition in partitions:
+            partition.path.unlink()
+            for path in list_delta_files(directory, data.name, partition.year, partition.month, extension):
+                path.unlink()
+            partition_cache.invalidate(partition.path)
+            end = manifest.get_end(partition.year, partition.month)
+            manifest.set(partition.year, partition.month, df.index[-1] if end is None else end, 0)
+        result.segments_written += 1
+        logger.info(f"{data.name} compacted {len(partitions)} months of {year} into {segment_path.name}")
+    manifest.save()
+
+    after = _get_files(directory, data.name, extension)
+    result.files_after = len(after)
+    result.bytes_after = _get_bytes(after)
+    return result
+
+
+def compact_database(hot_months: int = 1,
+                     compress: bool = False,
+                     root: Optional[Path] = None,
+                     storage_format: Optional[nd.StorageFormat] = None) -> CompactionResult:
+    """root 아래의 모든 partition 데이터를 compact_partitions로 합친다.
+
+    Args:
+        root:
+            합칠 폴더. 지정하지 않으면 db 폴더 전체를 합친다.
+        storage_format:
+            합칠 파일의 저장 형식. 지정하지 않으면 DataFrameData.default_storage_format
+
+    Returns:
+        모든 데이터의 결과를 더한 CompactionResult
+    """
+    root = nd.Paths.DATABASE if root is None else Path(root)
+    total = CompactionResult('total')
+    for manifest_path in sorted(root.rglob('*.manifest.json')):
+        name = manifest_path.name[:-len('.manifest.json')]
+        if manifest_path.parent.name != name:
+            continue
+        data = nd.DataFrameData(name, storage_format, directory=manifest_path.parent.parent)
+        total = total + compact_partitions(data, hot_months, compress)
+    logger.info(f"compacted {total.files_before} files ({total.bytes_before:,} bytes) "
+                f"-> {total.files_after} files ({total.bytes_after:,} bytes)")
+    return total
+
+
+def _get_files(directory: Path, name: str, extension: str) -> list[Path]:
+    files = [path for segment in list_yearly_segments(directory, name, extension) for path in segment.files]
+    files += [path for partition in list_monthly_partitions(directory, name, extension) for path in partition.files]
+    return files
+
+
+def _get_bytes(files: list[Path]) -> int:
+    return sum(path.stat().st_size for path in files)
@@ -0,0 +1,328 @@
+"""시계열 데이터의 월별 partition 파일들을 다루는 함수들
+
+월별 partition 파일은 다음과 같이 저장된다.
+    db/<name>/<name>_YYYYMM.<ext>
+
+append 파일:
+    partition의 마지막 시간보다 새로운 행들은 partition을 다시 쓰지 않고
+    순번을 붙인 append 파일로 따로 저장한다.
+        db/<name>/<name>_YYYYMM.<seq>.<ext>
+    읽을 때는 partition 파일 뒤에 순번대로 이어 붙인다.
+    같은 시간의 행이 있으면 나중 파일의 행을 남긴다.
+    manifest에 기록된 수보다 큰 순번의 append 파일은 저장이나 compaction이 중간에 멈춰서 남은 파일이므로
+    읽지 않는다. 그 월의 partition 파일을 다시 쓸 때 지운다.
+
+연도별 segment:
+    오래된 월들은 compaction으로 한 해씩 압축한 segment 파일 하나로 합친다.
+        db/<name>/<name>_YYYY.<ext>
+    segment와 같은 월의 partition 파일이 있으면 그 월은 partition 파일을 읽는다.
+    (compaction 이후에 그 월이 다시 저장된 경우이다. partition_compaction 참고)
+
+compact schema:
+    DataFrameData.compact_schema면 작은 dtype으로 바꿔서 저장한다. (write_partition_file)
+    읽을 때는 파일마다 저장된 형식을 보고 되돌리므로 두 형식이 섞여 있어도 된다. (compact_schema 참고)
+
+manifest:
+    partition별 마지막 시간과 append 파일 수를 기록해둔다.
+    partition 파일을 열지 않고도 append 할 수 있는지 알 수 있다.
+        db/<name>/<name>.manifest.json
+"""
+import json
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from ...common.dataframe import load_dataframe_file, save_dataframe_file
+from ...common.metrics import metrics
+from .compact_schema import decode_compact_schema, encode_compact_schema
+from ...common.file_utils import atomic_path
+from ...common.time_intervals import MINUTE_NS, merge_intervals
+from .partition_cache import partition_cache
+
+
+@dataclass(frozen=True)
+class MonthlyPartition:
+    year: int
+    month: int
+    path: Path
+    deltas: tuple[Path, ...] = field(default=())
+
+    @property
+    def key(self) -> tuple[int, int]:
+        return self.year, self.month
+
+    @property
+    def files(self) -> tuple[Path, ...]:
+        return (self.path,) + self.deltas
+
+
+@dataclass(frozen=True)
+class YearlySegment:
+    """한 해의 오래된 월들을 합친 파일. 읽을 때는 MonthlyPartition과 같이 다룬다."""
+    year: int
+    path: Path
+    deltas: tuple[Path, ...] = field(default=())
+
+    @property
+    def key(self) -> tuple[int, int]:
+        """같은 해의 월별 partition들보다 앞에 정렬되도록 월을 0으로 둔다."""
+        return self.year, 0
+
+    @property
+    def files(self) -> tuple[Path, ...]:
+        return (self.path,)
+
+
+def get_monthly_file_path(directory: Path, name: str, year: int, month: int, extension: str) -> Path:
+    file_name = name + '_' + str(year) + str(month).zfill(2)
+    return Path(directory) / f"{file_name}.{extension}"
+
+
+def get_delta_file_path(directory: Path, name: str, year: int, month: int, seq: int, extension: str) -> Path:
+    file_name = name + '_' + str(year) + str(month).zfill(2)
+    return Path(directory) / f"{file_name}.{seq}.{extension}"
+
+
+def get_segment_file_path(directory: Path, name: str, year: int, extension: str) -> Path:
+    return Path(directory) / f"{name}_{year}.{extension}"
+
+
+def list_monthly_partitions(directory: Path, name: str, extension: str) -> list[MonthlyPartition]:
+    """폴더 안의 월별 partition들을 시간 순서대로 반환한다.
+
+    append 파일은 manifest에 기록된 수까지만 붙인다. 그보다 큰 순번의 파일은 남은 파일이라 빼고 반환한다.
+    """
+    directory = Path(directory)
+    if not directory.is_dir():
+        return []
+    pattern = _get_monthly_file_pattern(name, extension)
+    bases = {}
+    deltas = {}
+    for path in directory.iterdir():
+        matched = pattern.match(path.name)
+        if not matched:
+            continue
+        key = int(matched.group(1)), int(matched.group(2))
+        if matched.group(3) is None:
+            bases[key] = path
+        else:
+            deltas.setdefault(key, []).append((int(matched.group(3)), path))
+
+    manifest = PartitionManifest(directory, name) if deltas else None
+    partitions = []
+    for key in sorted(bases):
+        count = manifest.get_deltas(*key) if manifest is not None else 0
+        delta_paths = tuple(path for seq, path in sorted(deltas.get(key, [])) if seq <= count)
+        partitions.append(MonthlyPartition(key[0], key[1], bases[key], delta_paths))
+    return partitions
+
+
+def list_delta_files(directory: Path, name: str, year: int, month: int, extension: str) -> list[Path]:
+    """그 월의 append 파일들을 manifest와 상관없이 모두 반환한다. (지울 때 쓴다)"""
+    directory = Path(directory)
+    if not directory.is_dir():
+        return []
+    pattern = _get_monthly_file_pattern(name, extension)
+    files = []
+    for path in directory.glob(f"{name}_{year}{str(month).zfill(2)}.*.{extension}"):
+        matched = pattern.match(path.name)
+        if matched and matched.group(3) is not None:
+            files.append((int(matched.group(3)), path))
+    return [path for _, path in sorted(files)]
+
+
+def _get_monthly_file_pattern(name: str, extension: str) -> re.Pattern:
+    return re.compile(rf"^{re.escape(name)}_(\d{{4}})(\d{{2}})(?:\.(\d+))?\.{re.escape(extension)}$")
+
+
+def list_yearly_segments(directory: Path, name: str, extension: str) -> list[YearlySegment]:
+    """폴더 안의 연도별 segment들을 시간 순서대로 반환한다."""
+    directory = Path(directory)
+    if not directory.is_dir():
+        return []
+    pattern = re.compile(rf"^{re.escape(name)}_(\d{{4}})\.{re.escape(extension)}$")
+    segments = []
+    for path in directory.iterdir():
+        matched = pattern.match(path.name)
+        if matched:
+            segments.append(YearlySegment(int(matched.group(1)), path))
+    return sorted(segments, key=lambda segment: segment.year)
+
+
+def list_partitions(directory: Path, name: str, extension: str) -> list[Union[YearlySegment, MonthlyPartition]]:
+    """연도별 segment와 월별 partition들을 시간 순서대로 반환한다. 같은 해에서는 segment가 앞에 온다."""
+    partitions = list_yearly_segments(directory, name, extension) + list_monthly_partitions(directory, name, extension)
+    return sorted(partitions, key=lambda partition: partition.key)
+
+
+def iter_partition_frames(directory: Path, name: str, extension: str,
+                          start: Optional[pd.Timestamp] = None,
+                          end: Optional[pd.Timestamp] = None,
+                          columns: Optional[list[str]] = None) -> Iterator[pd.DataFrame]:
+    """[start, end] 범위에 걸치는 segment와 partition들을 시간 순서대로 읽는다.
+
+    Notes:
+        범위:
+            범위에 걸치지 않는 파일은 열지 않는다.
+            처음과 끝 파일은 정렬된 index에서 이진 탐색으로 자른다.
+
+        segment의 월을 partition 파일이 덮어쓸 때:
+            segment를 월 경계에서 나눠서 그 월만 빼고, partition 파일과 시간 순서대로 섞는다.
+    """
+    start_key = None if start is None else (start.year, start.month)
+    end_key = None if end is None else (end.year, end.month)
+    partitions = list_partitions(directory, name, extension)
+    monthly_keys = {partition.key for partition in partitions if isinstance(partition, MonthlyPartition)}
+
+    # 한 해 안에서만 순서가 섞이므로 해가 바뀔 때마다 정렬해서 내보낸다.
+    year, pieces = None, []
+    for partition in partitions:
+        if isinstance(partition, YearlySegment):
+            first_key, last_key = (partition.year, 1), (partition.year, 12)
+        else:
+            first_key = last_key = partition.key
+        if start_key is not None and last_key < start_key:
+            continue
+        if end_key is not None and first_key > end_key:
+            break
+        if partition.key[0] != year:
+            yield from _sorted_frames(pieces)
+            year, pieces = partition.key[0], []
+
+        df = read_partition(partition, columns)
+        if start_key is not None and first_key <= start_key:
+            df = df.iloc[df.index.searchsorted(start, side='left'):]
+        if end_key is not None and last_key >= end_key:
+            df = df.iloc[:df.index.searchsorted(end, side='right')]
+
+        if isinstance(partition, YearlySegment):
+            overridden = [key for key in monthly_keys if key[0] == partition.year]
+            if overridden:
+                pieces.extend(_split_by_month(df, partition.year, overridden))
+                continue
+        pieces.append((partition.key, df))
+    yield from _sorted_frames(pieces)
+
+
+def _sorted_frames(pieces: list[tuple]) -> Iterator[pd.DataFrame]:
+    for _, df in sorted(pieces, key=lambda piece: piece[0]):
+        yield df
+
+
+def _split_by_month(df: pd.DataFrame, year: int, skipped: list[tuple[int, int]]) -> list[tuple]:
+    """segment를 월별로 나누고 skipped 월들은 뺀다."""
+    pieces = []
+    for month in range(1, 13):
+        if (year, month) in skipped:
+            continue
+        month_start = pd.Timestamp(year=year, month=month, day=1, tz=df.index.tz)
+        lo = df.index.searchsorted(month_start, side='left')
+        hi = df.index.searchsorted(month_start + pd.DateOffset(months=1), side='left')
+        if lo < hi:
+            pieces.append(((year, month), df.iloc[lo:hi]))
+    return pieces
+
+
+def read_partition(partition: Union[MonthlyPartition, YearlySegment],
+                   columns: Optional[list[str]] = None) -> pd.DataFrame:
+    """partition 파일과 append 파일들을 읽어서 하나로 합친다.
+
+    한번 읽은 partition은 partition_cache에 두고 다시 읽지 않는다.
+    반환된 dataframe은 cache와 공유하므로 수정하면 안된다.
+    """
+    df = partition_cache.get(partition.files, columns)
+    if df is not None:
+        return df
+
+    version = partition_cache.get_version(partition.files)
+    if not partition.deltas:
+        df = decode_compact_schema(load_dataframe_file(partition.path, columns))
+    else:
+        df = pd.concat([decode_compact_schema(load_dataframe_file(path, columns)) for path in partition.files])
+        df = df[~df.index.duplicated(keep='last')]
+    partition_cache.put(partition.files, columns, df, version)
+    return df
+
+
+def write_partition_file(df: pd.DataFrame, path: Path, compact_schema: bool = False, compress: bool = False):
+    """partition, append, segment 파일을 저장한다.
+
+    compact_schema면 작은 dtype으로 바꿔서 저장한다. 값을 그대로 되돌릴 수 없으면 바꾸지 않고 저장한다.
+    """
+    if compact_schema:
+        encoded = encode_compact_schema(df)
+        metrics.inc('nodji_compact_schema_total', result='fallback' if encoded is None else 'encoded')
+        if encoded is not None:
+            df = encoded
+    save_dataframe_file(df, path, compress)
+
+
+class PartitionManifest:
+    """partition별 마지막 시간과 append 파일 수, 데이터에 대한 기록들을 저장하는 클래스
+
+    Notes:
+        tradeless:
+            거래가 없어서 캔들이 없다고 확인된 구간들이다.
+            빈 시간을 찾을 때 이 구간들은 빼서 같은 구간을 매번 다시 요청하지 않게 한다.
+            epoch 분 단위 [start, end) 구간 목록으로 저장한다.
+
+        listing_time:
+            데이터가 시작되는 시간(상장 시간)이다. 한번 찾으면 기록해두고 다시 찾지 않는다.
+    """
+
+    def __init__(self, directory: Path, name: str):
+        self._path = Path(directory) / f"{name}.manifest.json"
+        self._manifest: dict = {}
+        if self._path.exists():
+            self._manifest = json.loads(self._path.read_text())
+        self._partitions: dict[str, dict] = self._manifest.setdefault('partitions', {})
+
+    @staticmethod
+    def _key(year: int, month: int) -> str:
+        return str(year) + str(month).zfill(2)
+
+    def get_end(self, year: int, month: int) -> Optional[pd.Timestamp]:
+        entry = self._partitions.get(self._key(year, month))
+        return None if entry is None else pd.Timestamp(entry['end'])
+
+    def get_deltas(self, year: int, month: int) -> int:
+        entry = self._partitions.get(self._key(year, month))
+        return 0 if entry is None else entry['deltas']
+
+    @property
+    def last_end(self) -> Optional[pd.Timestamp]:
+        """가장 마지막 partition의 마지막 시간"""
+        if not self._partitions:
+            return None
+        return pd.Timestamp(self._partitions[max(self._partitions)]['end'])
+
+    def set(self, year: int, month: int, end: pd.Timestamp, deltas: int):
+        self._partitions[self._key(year, month)] = {'end': end.isoformat(), 'deltas': deltas}
+
+    @property
+    def tradeless_intervals(self) -> np.ndarray:
+        """거래가 없다고 확인된 구간들 (epoch ns [start, end))"""
+        intervals = np.array(self._manifest.get('tradeless', []), dtype=np.int64).reshape(-1, 2)
+        return intervals * MINUTE_NS
+
+    def add_tradeless_intervals(self, intervals: np.ndarray):
+        intervals = merge_intervals(np.concatenate([self.tradeless_intervals, intervals]))
+        self._manifest['tradeless'] = (intervals // MINUTE_NS).tolist()
+
+    @property
+    def listing_time(self) -> Optional[pd.Timestamp]:
+        listing_time = self._manifest.get('listing_time')
+        return None if listing_time is None else pd.Timestamp(listing_time)
+
+    @listing_time.setter
+    def listing_time(self, value: pd.Timestamp):
+        self._manifest['listing_time'] = value.isoformat()
+
+    def save(self):
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        with atomic_path(self._path) as tmp_path:
+            tmp_path.write_text(json.dumps(self._manifest, indent=1, sort_keys=True))
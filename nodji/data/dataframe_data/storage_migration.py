@@ -0,0 +1,70 @@
+"""db 폴더에 저장된 dataframe 파일들을 다른 저장 형식으로 바꾼다."""
+from pathlib import Path
+from typing import Optional
+
+import nodji as nd
+import pandas as pd
+from loguru import logger
+
+from ...common.dataframe import merge_dataframe_by_date
+from ...common.dataframe_formats import DataFrameFormatBase, get_dataframe_format, get_dataframe_format_by_path
+
+
+def migrate_database(storage_format: nd.StorageFormat,
+                     root: Optional[Path] = None,
+                     remove_old: bool = False) -> list[tuple[Path, Path]]:
+    """root 아래의 모든 dataframe 파일을 storage_format으로 바꿔서 저장한다.
+
+    Args:
+        storage_format:
+            바꿀 저장 형식
+        root:
+            바꿀 폴더. 지정하지 않으면 db 폴더 전체를 바꾼다.
+        remove_old:
+            바꾼 뒤에 기존 파일을 지울지
+
+    Returns:
+        (기존 파일, 새 파일) 목록
+
+    Notes:
+        파일 이름은 그대로 두고 확장자만 바뀐다.
+            db/KRW-BTC/KRW-BTC_202401.df -> db/KRW-BTC/KRW-BTC_202401.parquet
+        이후에 DataFrameData.default_storage_format을 같은 형식으로 바꿔서 사용하면 된다.
+
+        확인:
+            바꾼 파일을 다시 읽어서 업데이트처럼 기존 행들과 합쳐보고 기존 파일과 같은지 확인한다.
+            다르면 기존 파일을 지우지 않고 RuntimeError를 낸다.
+    """
+    root = nd.Paths.DATABASE if root is None else Path(root)
+    target = get_dataframe_format(storage_format)
+    migrated = []
+    for old_path in sorted(root.rglob('*')):
+        if not old_path.is_file():
+            continue
+        try:
+            source = get_dataframe_format_by_path(old_path)
+        except NotImplementedError:
+            continue
+        if source.storage_format == storage_format:
+            continue
+
+        new_path = old_path.with_suffix(f".{target.extension}")
+        df = source.load(old_path)
+        target.save(df, new_path)
+        _check_migrated(df, target, new_path)
+        if remove_old:
+            old_path.unlink()
+        migrated.append((old_path, new_path))
+        logger.info(f"migrated {old_path} -> {new_path}")
+    return migrated
+
+
+def _check_migrated(df: pd.DataFrame, target: DataFrameFormatBase, new_path: Path):
+    """바꾼 파일을 읽어서 새로 받은 행들과 합쳐도 index가 그대로인지, 값이 기존 파일과 같은지 확인한다."""
+    loaded = target.load(new_path)
+    if isinstance(df.index, pd.DatetimeIndex):
+        loaded = merge_dataframe_by_date(loaded, df.iloc[-1:])
+        if not isinstance(loaded.index, pd.DatetimeIndex):
+            raise RuntimeError(f"{new_path} index can't be merged with new data. ({type(loaded.index).__name__})")
+    if not loaded.equals(df):
+        raise RuntimeError(f"{new_path} is different from the original file.")
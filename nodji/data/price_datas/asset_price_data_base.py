@@ -3,6 +3,8 @@ from typing import TYPE_CHECKING
 import pandas as pd
 
 import nodji as nd
+from ..dataframe_data.minute_grid_store import MinuteGridStore
+from .price_rollup import PriceRollup
 
 if TYPE_CHECKING:
     from ...assets.asset_base import AssetBase, TickerAssetBase
@@ -33,6 +35,15 @@ class AssetPriceDataBase:
     def load(self):
         raise NotImplementedError("load_price method must be implemented in PriceDataBase")
 
+    def _after_update(self, since):
+        """가격 데이터가 업데이트 되어 저장된 뒤에 호출된다.
+
+        Args:
+            since:
+                이번 업데이트에서 바뀐 가장 이른 시간. 모르면 None
+        """
+        pass
+
     def _set_initial_data_columns(self):
         """PriceTypeBase 서브 클래스에서 구현한다"""
         raise NotImplementedError("make_empty_data method must be implemented in PriceTypeBase")
@@ -45,6 +56,16 @@ class TickerPriceDataBase(AssetPriceDataBase):
         super().__init__(asset)
         self._data = nd.DataFrameData(self._asset.ticker)
 
+    @property
+    def start_time(self) -> 'nd.NTime':
+        """저장된 가격 데이터의 처음 시간. 없으면 NTime(None)"""
+        return self._data.stored_start_time
+
+    @property
+    def end_time(self) -> 'nd.NTime':
+        """저장된 가격 데이터의 마지막 시간. 없으면 NTime(None)"""
+        return self._data.stored_end_time
+
 
 class PriceTypeBase(TickerPriceDataBase):
     """가격의 형식 base class"""
@@ -76,4 +97,48 @@ class TimeTypeBase(TickerPriceDataBase):
 
 
 class MinutePriceData(TimeTypeBase):
-    pass
+
+    @property
+    def grid(self) -> MinuteGridStore:
+        """분단위 가격을 고정된 시간 격자로 저장한 store
+
+        update_grid로 처음 만든 뒤에는 업데이트 할 때마다 바뀐 부분을 같이 쓴다. (_after_update)
+        업데이트를 거치지 않고 저장한 데이터가 있으면 grid_is_stale로 확인하고 update_grid를 다시 부른다.
+        """
+        return MinuteGridStore(self._asset.ticker)
+
+    @property
+    def grid_is_stale(self) -> bool:
+        """저장된 데이터의 마지막 시간(manifest)까지 grid에 쓰지 않았는지"""
+        return self.grid.is_stale(self._data.manifest.last_end)
+
+    def rollup(self, freq: str) -> PriceRollup:
+        """freq 단위로 묶은 가격 데이터. ex) '5min', '15min', '1h', '1d'"""
+        return PriceRollup(self, freq)
+
+    def resample(self, freq: str, start_time=None, end_time=None, columns=None) -> pd.DataFrame:
+        """freq 단위의 ohlcv를 저장된 rollup에서 읽는다.
+
+        분단위 데이터를 매번 resample 하지 않는다.
+        처음 요청할 때 rollup을 만들어 저장하고 이후에는 업데이트 때마다 바뀐 부분만 갱신한다.
+        """
+        return self.rollup(freq).load(start_time, end_time, columns)
+
+    def _after_update(self, since):
+        """이미 만들어진 rollup들과 grid를 갱신한다."""
+        for freq in PriceRollup.FREQS:
+            rollup = self.rollup(freq)
+            if rollup.exists:
+                rollup.update(since)
+
+        grid = self.grid
+        if grid.exists:
+            # 가격 데이터가 가지고 있는 dataframe을 건드리지 않도록 읽기용 DataFrameData를 따로 만든다.
+            data = nd.DataFrameData(self._data.name, self._data.storage_format, self._data.directory)
+            grid.write(data.load(nd.NTime(since)))
+
+    def update_grid(self, start_time=None, end_time=None) -> MinuteGridStore:
+        """저장된 가격 데이터를 격자 store에 옮겨 쓴다."""
+        grid = self.grid
+        grid.write(self._data.load(nd.NTime(start_time), nd.NTime(end_time)))
+        return grid
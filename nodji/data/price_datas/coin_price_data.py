@@ -21,5 +21,13 @@ class CoinPriceData(MinutePriceData, OHLCVData):
     def update(self):
         return CoinPriceUpdater(self)
 
-    def load(self):
-        self._data.load()
+    def load(self, start_time=None, end_time=None, columns=None) -> pd.DataFrame:
+        """저장된 가격 데이터를 읽는다.
+
+        Args:
+            start_time, end_time:
+                읽을 시간 범위. NTime 혹은 NTime으로 바꿀 수 있는 값('20240830' 등)
+            columns:
+                읽을 column들. ex) ['Close', 'Volume']
+        """
+        return self._data.load(nd.NTime(start_time), nd.NTime(end_time), columns)
@@ -0,0 +1,129 @@
+"""여러 종목의 가격 한 필드를 같은 시간 격자 위의 2차원 배열로 모은다.
+
+횡단면(cross-sectional) 분석은 (시간, 종목) 행렬이 필요하다.
+종목마다 dataframe을 읽어서 concat, reindex 하지 않고
+미리 만든 격자 배열에 각 종목의 값을 위치 계산으로 한번에 흩뿌린다(scatter).
+"""
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Iterable, Optional, TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+import nodji as nd
+
+if TYPE_CHECKING:
+    from ...assets.asset_base import TickerAssetBase
+
+
+@dataclass
+class PricePanel:
+    """(시간, 종목) 가격 행렬
+
+    Notes:
+        values:
+            (len(index), len(tickers)) 배열, 값이 없는 칸은 nan. 기본은 float64
+        mask:
+            values와 같은 모양의 bool 배열, 값이 있는 칸이 True
+            거래가 없어서 비어 있는 칸과 값이 nan인 칸을 구분할 때 쓴다.
+    """
+    field: str
+    index: pd.DatetimeIndex
+    tickers: list[str]
+    values: np.ndarray
+    mask: np.ndarray
+
+    def __repr__(self):
+        return (f"PricePanel({self.field}, {len(self.index)} times x {len(self.tickers)} tickers, "
+                f"filled: {self.mask.mean() if self.mask.size else 0:.1%})")
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """index가 시간, column이 ticker인 wide dataframe으로 바꾼다. (값은 복사하지 않는다)"""
+        return pd.DataFrame(self.values, index=self.index, columns=self.tickers, copy=False)
+
+
+def load_price_panel(assets: Iterable['TickerAssetBase'],
+                     field: str = 'Close',
+                     start_time=None,
+                     end_time=None,
+                     freq: str = '1min',
+                     jobs: int = 8,
+                     dtype=np.float64) -> PricePanel:
+    """여러 종목의 가격 field 하나를 PricePanel로 읽는다.
+
+    Args:
+        assets:
+            ticker가 있는 asset들
+        field:
+            읽을 column 하나. ex) 'Close'
+        start_time, end_time:
+            읽을 시간 범위 (양 끝 포함). 없으면 읽은 데이터의 처음, 끝까지
+        freq:
+            격자 간격. 1min이 아니면 저장된 rollup에서 읽는다.
+            rollup을 아직 만들지 않은 종목은 분단위 데이터를 메모리에서 묶는다. (파일은 쓰지 않는다)
+        jobs:
+            동시에 읽을 종목의 수
+        dtype:
+            values의 dtype. compact schema로 저장해서 field가 float32로 읽히는 가격이라면
+            np.float32로 모아도 값이 같고 메모리는 절반이 된다.
+
+    Notes:
+        종목별로 field column만 읽는다. (column projection)
+        가격 데이터가 없는 종목은 전부 비어 있는(mask가 False인) 열이 된다.
+    """
+    assets = list(assets)
+    tickers = [asset.ticker for asset in assets]
+    start_time, end_time = nd.NTime(start_time), nd.NTime(end_time)
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        series = list(executor.map(lambda asset: _load_field(asset, field, start_time, end_time, freq), assets))
+
+    index = _make_grid(series, start_time, end_time, freq)
+    values = np.full((len(index), len(assets)), np.nan, dtype=dtype)
+    mask = np.zeros((len(index), len(assets)), dtype=bool)
+    if len(index):
+        origin = index.asi8[0]
+        step = pd.Timedelta(freq).value
+        for column, s in enumerate(series):
+            if s is None or s.empty:
+                continue
+            offsets = s.index.asi8 - origin
+            rows = offsets // step
+            on_grid = (offsets % step == 0) & (rows >= 0) & (rows < len(index))
+            values[rows[on_grid], column] = s.to_numpy(dtype=dtype)[on_grid]
+            mask[rows[on_grid], column] = True
+    return PricePanel(field, index, tickers, values, mask)
+
+
+def _has_price_data(asset: 'TickerAssetBase') -> bool:
+    data = asset.price._data
+    return data.is_partitioned or data.exists_file
+
+
+def _load_field(asset: 'TickerAssetBase', field: str, start_time, end_time, freq: str) -> Optional[pd.Series]:
+    if not _has_price_data(asset):
+        return None
+    if pd.Timedelta(freq) == pd.Timedelta(minutes=1):
+        df = asset.price.load(start_time, end_time, columns=[field])
+    else:
+        df = asset.price.rollup(freq).read(start_time, end_time, columns=[field])
+    return df[field] if field in df else None
+
+
+def _make_grid(series: list[Optional[pd.Series]], start_time, end_time, freq: str) -> pd.DatetimeIndex:
+    """모든 종목이 같이 쓰는 시간 격자를 만든다."""
+    loaded = [s for s in series if s is not None and not s.empty]
+    if start_time.is_none:
+        if not loaded:
+            return pd.DatetimeIndex([], tz=nd.TimeZone.SEOUL.value, name='date')
+        start = min(s.index[0] for s in loaded)
+    else:
+        start = pd.Timestamp(start_time._time)
+    if end_time.is_none:
+        if not loaded:
+            return pd.DatetimeIndex([], tz=nd.TimeZone.SEOUL.value, name='date')
+        end = max(s.index[-1] for s in loaded)
+    else:
+        end = pd.Timestamp(end_time._time)
+    return pd.date_range(start.ceil(freq), end, freq=freq, name='date')
@@ -0,0 +1,116 @@
+"""분단위 ohlcv로 더 긴 시간 단위(5분, 15분, 1시간, 1일)의 가격을 만들어 저장한다.
+
+    db/<ticker>/rollups/<ticker>_<freq>/<ticker>_<freq>_YYYYMM.<ext>
+
+한번 만든 rollup은 분단위 데이터가 업데이트될 때 바뀐 부분만 다시 계산한다.
+"""
+from typing import TYPE_CHECKING, Optional
+
+import pandas as pd
+
+import nodji as nd
+from ..dataframe_data.partitions import iter_partition_frames
+
+if TYPE_CHECKING:
+    from .asset_price_data_base import MinutePriceData
+
+
+class PriceRollup:
+    """분단위 ohlcv 하나를 freq 단위로 묶은 가격 데이터
+
+    Notes:
+        묶는 방법:
+            Open: 처음 값, High: 최대값, Low: 최소값, Close: 마지막 값
+            Volume, TradePrice: 합
+            캔들이 하나도 없는 구간은 행을 만들지 않는다.
+
+        시간:
+            구간의 시작 시간을 index로 쓴다. 1일은 한국시간 0시부터 시작한다.
+    """
+    FREQS = ('5min', '15min', '1h', '1d')
+    AGGREGATIONS = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum',
+                    'TradePrice': 'sum'}
+
+    def __init__(self, price_data: 'MinutePriceData', freq: str):
+        assert freq in self.FREQS, f"freq should be one of {self.FREQS} but {freq}"
+        data = price_data._data
+        self.freq = freq
+        # 가격 데이터가 가지고 있는 dataframe을 건드리지 않도록 읽기용 DataFrameData를 따로 만든다.
+        self._minute_data = nd.DataFrameData(data.name, data.storage_format, data.directory)
+        self.data = nd.DataFrameData(f"{data.name}_{freq}", data.storage_format,
+                                     directory=data.directory / data.name / 'rollups')
+
+    def __repr__(self):
+        return f"PriceRollup({self.data.name})"
+
+    @property
+    def exists(self) -> bool:
+        return self.data.exists_file
+
+    def load(self, start_time=None, end_time=None, columns: Optional[list[str]] = None) -> pd.DataFrame:
+        """저장된 rollup을 읽는다. 아직 만들지 않았으면 먼저 만든다."""
+        if not self.exists:
+            self.build()
+        return self.data.load(nd.NTime(start_time), nd.NTime(end_time), columns)
+
+    def read(self, start_time=None, end_time=None, columns: Optional[list[str]] = None) -> pd.DataFrame:
+        """저장된 rollup을 읽는다. 아직 만들지 않았으면 파일을 만들지 않고 분단위 데이터를 읽어서 묶는다.
+
+        파일을 쓰지 않으므로 여러 스레드에서 같이 불러도 된다. (load_price_panel)
+        rollup 파일을 만드는 것은 load, build와 업데이트(_after_update)가 한다.
+        """
+        start_time, end_time = nd.NTime(start_time), nd.NTime(end_time)
+        if self.exists:
+            return self.data.load(start_time, end_time, columns)
+
+        # 범위 양 끝의 구간도 저장된 rollup과 같도록 구간 전체의 분단위 데이터를 읽는다.
+        start = pd.Timestamp(start_time._time) if start_time else None
+        end = pd.Timestamp(end_time._time) if end_time else None
+        minute_start = nd.NTime(start.floor(self.freq)) if start is not None else start_time
+        minute_end = nd.NTime(end.floor(self.freq) + pd.Timedelta(self.freq) - pd.Timedelta(minutes=1)) \
+            if end is not None else end_time
+        minute_columns = None if columns is None else list(dict.fromkeys([*columns, 'Close']))
+        df = self._resample(self._minute_data.load(minute_start, minute_end, minute_columns))
+        if df.empty:
+            return df
+        df = df.loc[start:end]
+        return df if columns is None else df[[col for col in columns if col in df.columns]]
+
+    def build(self):
+        """저장된 분단위 데이터 전체로 rollup을 새로 만든다.
+
+        분단위 데이터는 월별 partition(혹은 연도별 segment) 하나씩 읽어서 묶는다.
+        하루, 한시간 구간은 월 경계를 넘지 않으므로 파일별로 묶어도 결과가 같다.
+        """
+        frames = [self._resample(df)
+                  for df in iter_partition_frames(self._minute_data.path, self._minute_data.name,
+                                                  self._minute_data.storage.extension)]
+        frames = [df for df in frames if not df.empty]
+        if frames:
+            self.data(pd.concat(frames))
+            self.data.save()
+
+    def update(self, since: Optional[pd.Timestamp] = None):
+        """since 이후로 바뀐 분단위 데이터로 rollup을 갱신한다.
+
+        since가 속한 구간의 처음부터 다시 묶어서 기존 rollup에 덮어쓴다.
+        since를 모르면 전체를 다시 만든다.
+        """
+        if since is None or not self.exists:
+            return self.build()
+
+        start = pd.Timestamp(since).floor(self.freq)
+        minute_df = self._minute_data.load(nd.NTime(start))
+        if minute_df.empty:
+            return
+        new_df = self._resample(minute_df)
+        old_df = self.data.load(nd.NTime(start))
+        self.data(nd.merge_dataframe_by_date(old_df, new_df) if not old_df.empty else new_df)
+        self.data.save()
+
+    def _resample(self, minute_df: pd.DataFrame) -> pd.DataFrame:
+        if minute_df.empty:
+            return minute_df
+        aggregations = {col: func for col, func in self.AGGREGATIONS.items() if col in minute_df.columns}
+        df = minute_df.resample(self.freq, label='left', closed='left').agg(aggregations)
+        return df[minute_df['Close'].resample(self.freq, label='left', closed='left').count() > 0]
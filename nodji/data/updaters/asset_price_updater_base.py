@@ -1,4 +1,10 @@
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from .progress_journal import Checkpoint, ProgressJournal
 from ..price_datas.asset_price_data_base import AssetPriceDataBase
+from ...common.time_intervals import empty_intervals, intersect_intervals, subtract_intervals
 import nodji as nd
 
 
@@ -15,18 +21,75 @@ class AssetPriceDataUpdaterBase:
                 b. 가장 처음 시간의 가격에서 더 이전의 가격의 데이터가 있는지 확인하여 업데이트를 한다.
                 c. 기존의 데이터에서 처음부터 마지막의 중간에 빈 시간의 부분을 한번씩 업데이트 해준다.
                     ex) 코인이라면 분단위 정보가 저장되어야 하는데 중간에 분단위로 빈 시간이 있다면 그것을 채워준다.
+
+        checkpoint:
+            받는 도중에 CHECKPOINT_SEC 마다 그때까지 받은 데이터를 저장하고
+            저장까지 끝난 구간들을 ProgressJournal에 기록한다.
+            중간에 죽어도 저장한 데이터는 남고, 다시 업데이트 하면 남은 데이터의 앞, 뒤부터 이어서 받는다.
+            journal의 구간들은 이미 받은 구간으로 보고 그 안의 빈 시간은 다시 요청하지 않는다.
+            업데이트가 끝까지 성공하면 journal을 지운다.
     """
+    CHECKPOINT_SEC = 60.0
 
     def __init__(self, price_data: 'AssetPriceDataBase'):
         self._price_data = price_data
         self._data: nd.DataFrameData = price_data._data
 
-    def __call__(self, start_time=None, end_time=None):
+    def __call__(self, start_time=None, end_time=None, jobs: int = 1):
+        """
+        Args:
+            jobs:
+                한 종목의 가격을 받을 때 동시에 보낼 요청의 수
+                1보다 크고 시작 시간이 정해져 있으면 구간을 나눠서 동시에 받는다.
+        """
         self._start_time = nd.NTime(start_time)
         self._end_time = nd.NTime(end_time)
+        self._jobs = jobs
         self._validate_times()
+        self._checkpoint = Checkpoint(self._save_checkpoint, self.CHECKPOINT_SEC)
+        self._changed_since = False
         self._update()
+        self._merge_changed_time()
+        if self._changed_since is not False:
+            self._data.save()
+            self._price_data._after_update(self._changed_since)
+        self._journal.delete()
+
+    def _save_checkpoint(self, intervals: np.ndarray):
+        """받는 도중에 지금까지 받은 데이터를 저장하고 저장한 구간을 journal에 기록한다.
+
+        아직 받은 행이 하나도 없으면 저장하지 않고 journal에도 기록하지 않는다.
+        (빈 dataframe은 시간 index가 아니어서 partition으로 저장되지 않는다)
+        """
+        if not self._data.exists_data:
+            return
+        self._merge_changed_time()
         self._data.save()
+        self._journal.add_fetched_intervals(intervals)
+        self._journal.save()
+        logger.info(f"{self._data.name} checkpoint saved. {self._data.start_time} ~ {self._data.end_time}")
+
+    def _merge_changed_time(self):
+        """checkpoint에서 저장하면 dirty_months가 비므로 가장 이른 변경 시간을 따로 모아둔다."""
+        since = self._get_changed_time()
+        if since is False or self._changed_since is None:
+            return
+        if since is None or self._changed_since is False:
+            self._changed_since = since
+        else:
+            self._changed_since = min(self._changed_since, since)
+
+    def _get_changed_time(self):
+        """이번 업데이트에서 바뀐 가장 이른 시간
+
+        바뀐 것이 없으면 False, 어디가 바뀌었는지 모르면 None을 반환한다.
+        """
+        dirty_months = self._data.dirty_months
+        if dirty_months is None:
+            return None
+        if not dirty_months:
+            return False
+        return min(dirty_months.values())
 
     @property
     def _coll(self):
@@ -39,11 +102,19 @@ class AssetPriceDataUpdaterBase:
     def _update(self):
         if not self._data.exists_file:
             self._price_data._set_initial_data_columns()
+        else:
+            self._data.load(self._start_time, self._end_time)
+        # 처음 받을 때는 아직 index가 시간이 아니어서 path가 파일 경로이므로 partition 폴더를 직접 정한다.
+        self._journal = ProgressJournal(self._data.directory / self._data.name, self._data.name)
         self._orig_data = self._data.copy()
+        self._fetched_intervals = empty_intervals()
+        if self._journal.exists:
+            logger.info(f"{self._data.name} resumes the update stopped at {self._journal.updated_at}")
+            self._fetched_intervals = self._journal.fetched_intervals
 
         self._add_price_after_data()
-        # self._add_price_before_data(old_end_time)
-        # self._add_price_missing_time(old_start_time, old_end_time)
+        self._add_price_before_data()
+        self._add_price_missing_time()
 
     def _validate_times(self):
         if not self._start_time.is_none and not self._end_time.is_none:
@@ -54,6 +125,7 @@ class AssetPriceDataUpdaterBase:
         if self._needs_update_after_data():
             start_time, end_time = self._get_time_range_of_add_after_data()
             self._update_data_from_time_range(start_time, end_time)
+            self._record_fetched_interval(start_time, end_time)
 
     def _needs_update_after_data(self):
         """데이터를 추가해야 하는지 확인한다."""
@@ -80,12 +152,84 @@ class AssetPriceDataUpdaterBase:
 
         return start_time, end_time
 
-    def _add_price_missing_time(self, old_start_time, old_end_time):
-        data = self._data[old_start_time:old_end_time]
-        for start_time, end_time in data.missing_times:
-            self._data += self._coll.get_from_upbit(start_time, end_time)
+    def _add_price_missing_time(self):
+        """데이터의 처음부터 마지막 사이에 빈 시간들을 채운다.
+
+        이번에 처음부터 끝까지 받아온 구간 안의 빈 시간이나
+        채우려고 요청했는데도 값이 없던 구간은 거래가 없었던 구간이므로
+        manifest에 기록해서 다음 업데이트 때 다시 요청하지 않는다.
+        """
+        if not self._data.exists_data:
+            return
+        intervals = self._data.missing_intervals
+        tradeless = intersect_intervals(np.concatenate([intervals, self._get_leading_interval()]),
+                                        self._fetched_intervals)
+        intervals = subtract_intervals(intervals, self._fetched_intervals)
+        if len(intervals):
+            tradeless = np.concatenate([tradeless, self._fill_missing_intervals(intervals)])
+        if len(tradeless):
+            manifest = self._data.manifest
+            manifest.add_tradeless_intervals(tradeless)
+            manifest.save()
+
+    def _get_leading_interval(self) -> np.ndarray:
+        """시작 시간부터 데이터의 처음 시간 전까지의 구간
+
+        이 구간을 받아왔는데도 데이터가 없다면 거래가 없던 구간이다.
+        """
+        if not self._start_time or self._start_time >= self._data.start_time:
+            return empty_intervals()
+        start = pd.Timestamp(self._start_time._time).floor('min').value
+        return np.array([[start, pd.Timestamp(self._data.start_time._time).value]], dtype=np.int64)
+
+    def _fill_missing_intervals(self, intervals):
+        """collector를 이용하여 빈 구간들을 채우고 값이 없던 구간들을 반환한다."""
+        raise NotImplementedError("fill_missing_intervals method must be implemented in PriceUpdaterBase")
+
+    def _add_price_before_data(self):
+        """기존 데이터의 처음 시간보다 이전의 데이터를 상장 시간까지 추가한다.
+
+        시작 시간이 정해져 있으면 상장 시간을 찾지 않고 시작 시간부터 받는다.
+        그 구간이 이미 거래가 없던 구간으로 기록되어 있으면 요청하지 않는다.
+        """
+        if not self._orig_data.exists_data:
+            return
+        end_time = self._orig_data.start_time
+        if self._start_time and self._start_time >= end_time:
+            return
 
-    def _add_price_before_data(self, old_start_time):
-        start_time = self._get_time_range_of_add_after_data(old_end_time)
-        end_time = self._get_end_time_of_add_after_data(old_end_time)
-        self._data += self._coll.get_from_upbit(start_time, end_time)
+        if self._start_time:
+            if self._is_tradeless(self._start_time, end_time):
+                return
+            start_time = self._start_time
+        else:
+            start_time = self._find_first_time(end_time)
+            if not start_time:
+                return
+        if start_time < end_time:
+            self._update_data_from_time_range(start_time, end_time)
+            self._record_fetched_interval(start_time, end_time)
+
+    def _is_tradeless(self, start_time, end_time) -> bool:
+        """[start_time, end_time) 이 모두 거래가 없던 구간으로 기록되어 있는지"""
+        start = pd.Timestamp(start_time._time).floor('min').value
+        end = pd.Timestamp(end_time._time).floor('min').value
+        remaining = subtract_intervals(np.array([[start, end]], dtype=np.int64),
+                                       self._data.manifest.tradeless_intervals)
+        return len(remaining) == 0
+
+    def _record_fetched_interval(self, start_time, end_time):
+        """처음부터 끝까지 모두 받아온 구간을 기록한다.
+
+        받아온 구간 안에서 빠진 분은 거래가 없었던 분이므로 다시 요청할 필요가 없다.
+        시작 시간이 없으면 데이터의 처음부터 받아온 것이다.
+        """
+        if not self._data.exists_data:
+            return
+        start = pd.Timestamp((start_time if start_time else self._data.start_time)._time).floor('min')
+        end = pd.Timestamp(end_time._time).floor('min') + pd.Timedelta(minutes=1)
+        self._fetched_intervals = np.concatenate([self._fetched_intervals, [[start.value, end.value]]])
+
+    def _find_first_time(self, before):
+        """before 이전에서 가격 데이터가 처음 시작되는 시간을 찾는다."""
+        raise NotImplementedError("find_first_time method must be implemented in PriceUpdaterBase")
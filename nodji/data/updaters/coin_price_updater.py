@@ -1,5 +1,6 @@
 from typing import TYPE_CHECKING
 
+import nodji as nd
 from .asset_price_updater_base import AssetPriceDataUpdaterBase
 from ..collectors.price_collectors.coin_price_collector import CoinPriceCollector
 
@@ -29,5 +30,21 @@ class CoinPriceUpdater(AssetPriceDataUpdaterBase):
         return CoinPriceCollector(self._price_data)
 
     def _update_data_from_time_range(self, start_time, end_time):
-        return self._coll.get_from_upbit(start_time, end_time)
-
+        """
+        Notes:
+            동시에 받기:
+                jobs가 1보다 크면 구간을 나눠서 동시에 받는다.
+                시작 시간이 없으면(처음 받는 경우) 상장 시간을 먼저 찾아서 시작 시간으로 쓴다.
+        """
+        if self._jobs > 1:
+            if not start_time:
+                start_time = self._find_first_time(end_time if end_time else nd.NTime.get_current_time())
+            if start_time:
+                return self._coll.get_from_upbit_by_windows(start_time, end_time, self._jobs, self._checkpoint)
+        return self._coll.get_from_upbit(start_time, end_time, self._checkpoint)
+
+    def _fill_missing_intervals(self, intervals):
+        return self._coll.fill_missing_intervals(intervals, self._jobs, self._checkpoint)
+
+    def _find_first_time(self, before):
+        return self._coll.find_listing_time(before)
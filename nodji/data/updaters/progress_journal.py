@@ -0,0 +1,100 @@
+"""종목 하나의 가격 업데이트 진행 기록
+
+오래 걸리는 업데이트(몇 년치 backfill)가 중간에 죽으면 다시 시작할 때 어디까지 받았는지 알아야 한다.
+받은 데이터는 checkpoint 마다 저장하고, 저장까지 끝난 구간들을 journal에 기록한다.
+
+    db/<name>/<name>.journal.json
+
+업데이트가 끝까지 성공하면 journal을 지운다.
+journal이 남아 있다면 지난 업데이트가 중간에 멈춘 것이다.
+"""
+import json
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+from ...common.file_utils import atomic_path
+from ...common.time_intervals import MINUTE_NS, empty_intervals, merge_intervals
+
+
+class ProgressJournal:
+    """받아서 저장까지 끝난 구간들(epoch ns [start, end))의 기록
+
+    Notes:
+        분 단위:
+            manifest의 tradeless와 같이 epoch 분 단위 [start, end) 목록으로 저장한다.
+    """
+
+    def __init__(self, directory: Path, name: str):
+        self._path = Path(directory) / f"{name}.journal.json"
+        self._journal: dict = {}
+        if self._path.exists():
+            self._journal = json.loads(self._path.read_text())
+
+    def __repr__(self):
+        return f"ProgressJournal({self._path.name}, fetched: {len(self.fetched_intervals)} intervals)"
+
+    @property
+    def exists(self) -> bool:
+        return self._path.exists()
+
+    @property
+    def fetched_intervals(self) -> np.ndarray:
+        intervals = np.array(self._journal.get('fetched', []), dtype=np.int64).reshape(-1, 2)
+        return intervals * MINUTE_NS
+
+    @property
+    def updated_at(self) -> Optional[pd.Timestamp]:
+        updated_at = self._journal.get('updated_at')
+        return None if updated_at is None else pd.Timestamp(updated_at)
+
+    def add_fetched_intervals(self, intervals: np.ndarray):
+        intervals = merge_intervals(np.concatenate([self.fetched_intervals, intervals]))
+        self._journal['fetched'] = (intervals // MINUTE_NS).tolist()
+
+    def save(self):
+        self._journal['updated_at'] = pd.Timestamp.now(tz='UTC').isoformat()
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        with atomic_path(self._path) as tmp_path:
+            tmp_path.write_text(json.dumps(self._journal, indent=1, sort_keys=True))
+
+    def delete(self):
+        self._path.unlink(missing_ok=True)
+        self._journal = {}
+
+
+class Checkpoint:
+    """collector가 받은 구간을 알려주면 interval_sec 마다 save를 부른다.
+
+    Notes:
+        collector는 due일 때만 모아둔 페이지들을 데이터에 더하고 add를 부른다.
+        (페이지마다 데이터에 더하면 느려진다. DataFrameAccumulator 참고)
+
+        save(intervals):
+            지난 checkpoint 이후에 받은 구간들을 받아서 데이터와 journal을 저장한다.
+    """
+
+    def __init__(self, save: Callable[[np.ndarray], None], interval_sec: float = 60.0):
+        self._save = save
+        self.interval_sec = interval_sec
+        self._intervals = [empty_intervals()]
+        self._last = time.monotonic()
+
+    @property
+    def due(self) -> bool:
+        return time.monotonic() - self._last >= self.interval_sec
+
+    def add(self, intervals: np.ndarray):
+        """intervals를 받아서 데이터에 더했다. due면 저장한다."""
+        self._intervals.append(np.asarray(intervals, dtype=np.int64).reshape(-1, 2))
+        if self.due:
+            self.flush()
+
+    def flush(self):
+        intervals = merge_intervals(np.concatenate(self._intervals))
+        self._intervals = [empty_intervals()]
+        self._last = time.monotonic()
+        self._save(intervals)
@@ -1,2 +1,3 @@
 from .upbit import Upbit
-
+from .upbit_response_cache import UpbitResponseCache, set_default_response_cache
+from .upbit_websocket import UpbitWebSocket
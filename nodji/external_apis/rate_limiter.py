@@ -0,0 +1,47 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """여러 스레드가 하나의 요청 예산을 나눠 쓰도록 하는 token bucket
+
+    Notes:
+        공유 예산:
+            upbit은 ip 단위로 초당 요청 수를 제한한다.
+            여러 종목을 동시에 업데이트 하더라도 같은 bucket을 쓰게 해서
+            전체 요청 수가 한도를 넘지 않도록 한다.
+
+        서버와 맞추기:
+            upbit은 응답 헤더의 Remaining-Req로 이번 초에 남은 요청 수를 알려준다.
+            sync로 그 값을 넣어주면 bucket의 토큰이 서버보다 많아지지 않게 줄인다.
+    """
+
+    def __init__(self, requests_per_sec: float, capacity: float = None):
+        assert requests_per_sec > 0, 'requests_per_sec should be greater than 0'
+        self._rate = requests_per_sec
+        self._capacity = requests_per_sec if capacity is None else capacity
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """토큰을 하나 얻을 때까지 기다린다."""
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self._rate
+            time.sleep(wait)
+
+    def sync(self, remaining: int):
+        """서버가 알려준 남은 요청 수로 토큰을 맞춘다."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, remaining)
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
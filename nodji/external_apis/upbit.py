@@ -1,25 +1,55 @@
-import time
+import os
 from typing import Optional
 
-import pandas as pd
 import requests
 import nodji as nd
 from nodji import NTime
 from loguru import logger
+from ..common.metrics import metrics
+from .upbit_response_cache import UpbitResponseCache, get_default_response_cache
+from .upbit_transport import UpbitTransport, get_default_transport
 
 
 class Upbit:
+    """upbit의 quotation api를 호출하는 클래스
+
+    Notes:
+        transport:
+            따로 넣어주지 않으면 모든 인스턴스가 하나의 transport를 공유한다.
+            연결 재사용과 요청 제한, 재시도는 transport가 담당한다.
+
+        base_url:
+            따로 넣어주지 않으면 BASE_URL을 쓴다.
+            BASE_URL은 NODJI_UPBIT_URL 환경변수로 바꿀 수 있다.
+            benchmarks의 로컬 fake 서버에 연결할 때 쓴다.
+
+        response_cache:
+            캔들 페이지 응답을 디스크에 저장해두고 같은 요청은 디스크에서 읽는다.
+            따로 넣어주지 않으면 set_default_response_cache로 정한 cache를 쓴다. (기본은 쓰지 않음)
+    """
+    BASE_URL = os.environ.get('NODJI_UPBIT_URL', 'https://api.upbit.com')
+
+    def __init__(self,
+                 transport: Optional[UpbitTransport] = None,
+                 base_url: Optional[str] = None,
+                 response_cache: Optional[UpbitResponseCache] = None):
+        self._transport = get_default_transport() if transport is None else transport
+        self.base_url = (base_url or self.BASE_URL).rstrip('/')
+        self._response_cache = get_default_response_cache() if response_cache is None else response_cache
 
     def get_market_codes(self) -> list[dict]:
         """https://docs.upbit.com/reference/%EB%A7%88%EC%BC%93-%EC%BD%94%EB%93%9C-%EC%A1%B0%ED%9A%8C"""
-        url = "https://api.upbit.com/v1/market/all?isDetails=true"
-        headers = {"accept": "application/json"}
-        res = requests.get(url, headers=headers)
+        url = f"{self.base_url}/v1/market/all"
+        res = self._transport.get(url, params={"isDetails": "true"}, group='market')
         return res.json()
 
-    def get_minute_candles(self, ticker: str, end_time: Optional[NTime]) -> requests.Response:
+    def get_minute_candles(self, ticker: str, end_time: Optional[NTime], count: Optional[int] = None) -> requests.Response:
         """upbit에서 최대 날짜 범위의 mdata를 받아온다
 
+        Args:
+            count:
+                받을 캔들의 수. 지정하지 않으면 한번에 받을 수 있는 최대 수를 받는다.
+
         Notes:
             시간대:
                 upbit에 querystring으로 호출하는 시간대는 utc 시간대이다.
@@ -28,35 +58,44 @@ class Upbit:
                 candle_date_time_kst
                 두가지로 나오므로 한국시간대를 저장한다.
 
-            sleep구문:
-                값을 받을 때 에러나는 경우가 있다.
-                max retries exceeded with url
-                그럴경우 잠시 쉬어준다.
+            재시도:
+                값을 받을 때 에러나 429가 나는 경우가 있다.
+                재시도는 transport에서 횟수 제한과 backoff를 두고 처리한다.
 
             1초를 더하는 이유:
                 12시 10분 데이터를 받는다고 하면 12시 9분 데이터부터 나오는것 같다.
                 그래서 1초를 더해주면 12시 10분 데이터가 포함되어 나온다.
+                넘겨받은 end_time은 바꾸지 않고 1초 뒤의 새 NTime을 만든다.
+
+            cache:
+                response_cache에 있는 페이지면 요청하지 않고 CachedResponse를 반환한다.
+                requests.Response와 같이 json()으로 값을 꺼낸다.
+
+            json:
+                응답은 converter에서 한번만 json으로 바꾼다. 로그에는 크기만 남긴다.
         """
         if end_time is None:
             end_time = nd.NTime.get_current_time()
         assert isinstance(end_time, NTime), f"end_date must be NTime but {type(end_time)}"
-        end_time.sec += 1
-        url = "https://api.upbit.com/v1/candles/minutes/1"
-        try:
-            querystring = {"market": ticker,
-                           "to": end_time.to_utc().to_string(),
-                           "count": str(nd.consts.Upbit.MAX_UPBIT_MPRICE_QUERY_COUNT)}
-            headers = {"accept": "application/json"}
-            response = requests.get(url, params=querystring, headers=headers)
-        except requests.exceptions.ConnectionError:
-            time.sleep(0.1)
-            logger.debug(f"Something wrong. end_date: {end_time}.")
-            return self.get_minute_candles(ticker, end_time)
-
-        if response.status_code == 429:
-            time.sleep(0.1)
-            logger.debug('Too many request')
-            return self.get_minute_candles(ticker, end_time)
-
-        logger.debug(f"upbit response: {response.json()[-1]['candle_date_time_kst']}")
+        end_time = end_time.shift(seconds=1)
+        endpoint = '/v1/candles/minutes/1'
+        querystring = {"market": ticker,
+                       "to": end_time.to_utc().to_string(),
+                       "count": str(count or nd.consts.Upbit.MAX_UPBIT_MPRICE_QUERY_COUNT)}
+        response = self._get_cached(endpoint, querystring, group='candles')
+        metrics.inc('nodji_upbit_response_bytes_total', len(response.content), ticker=ticker)
+        logger.debug(f"upbit response: {ticker} to {querystring['to']}, {len(response.content)} bytes")
+        return response
+
+    def _get_cached(self, endpoint: str, params: dict, group: str):
+        """응답 cache가 있으면 cache를 먼저 보고, 없으면 요청한 뒤 cache에 저장한다."""
+        cache = self._response_cache
+        if cache is not None:
+            response = cache.get(endpoint, params)
+            metrics.inc('nodji_upbit_cache_total', result='miss' if response is None else 'hit')
+            if response is not None:
+                return response
+        response = self._transport.get(f"{self.base_url}{endpoint}", params=params, group=group)
+        if cache is not None:
+            cache.put(endpoint, params, response.content)
         return response
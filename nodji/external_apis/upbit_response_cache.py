@@ -0,0 +1,198 @@
+"""upbit 캔들 응답을 디스크에 저장해두는 cache
+
+이미 끝난 분의 캔들은 바뀌지 않는다.
+그래서 과거 구간을 다시 받을 때(죽은 backfill을 다시 돌리거나 다른 컴퓨터에서 받을 때)
+같은 페이지를 upbit에 다시 요청하지 않고 디스크에서 읽는다.
+"""
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+import nodji as nd
+from ..common.file_utils import atomic_path
+from ..common.types import ResponseCacheMode
+
+
+class CachedResponse:
+    """cache에서 읽은 응답. upbit 응답(requests.Response)처럼 json()으로 값을 꺼낸다."""
+    status_code = 200
+    from_cache = True
+
+    def __init__(self, content: bytes):
+        self.content = content
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class UpbitResponseCache:
+    """캔들 페이지 응답의 디스크 cache
+
+    Notes:
+        key:
+            (endpoint, market, to, count)
+            파일은 path/<endpoint>/<market>/<to>_<count>.json 에 저장한다.
+
+        저장하는 페이지:
+            to가 지금 분의 시작보다 이전인 페이지만 저장한다.
+            그러면 페이지의 마지막 캔들도 지금 분보다 이전이어서 더 바뀌지 않는다.
+            마지막 캔들만 보지 않는 이유는 최근 몇 분 동안 거래가 없으면
+            지금 분에 거래가 생겼을 때 같은 요청의 결과가 달라지기 때문이다.
+            그래서 지금 진행 중인 구간(live edge)은 항상 upbit에 요청한다.
+
+        mode:
+            CACHE: cache에 있으면 읽고 없으면 요청해서 끝난 페이지만 저장한다.
+            RECORD: 항상 요청하고 끝나지 않은 페이지까지 모든 응답을 저장한다.
+            REPLAY: cache에서만 읽는다. 없으면 RuntimeError를 낸다. (인터넷 없이 같은 결과를 재현할 때)
+
+        크기:
+            저장한 파일들의 크기 합이 max_bytes를 넘으면 가장 오래 쓰지 않은 파일부터 지운다.
+            읽을 때 파일의 mtime을 갱신해서 쓴 시간으로 쓴다.
+    """
+
+    def __init__(self,
+                 path: Optional[Path] = None,
+                 max_bytes: int = 2 * 2 ** 30,
+                 mode: ResponseCacheMode = ResponseCacheMode.CACHE):
+        """
+        Args:
+            path:
+                cache를 저장할 디렉토리. 지정하지 않으면 Paths.DATABASE/.upbit_cache
+        """
+        assert isinstance(mode, ResponseCacheMode), 'mode should be ResponseCacheMode'
+        self.path = Path(path) if path is not None else nd.Paths.DATABASE / '.upbit_cache'
+        self.max_bytes = max_bytes
+        self.mode = mode
+        self._bytes = None
+        self._hits = 0
+        self._misses = 0
+        self._stores = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"UpbitResponseCache({self.path}, {self.mode.name}, {self.stats})"
+
+    @property
+    def stats(self) -> dict:
+        return {'hits': self._hits,
+                'misses': self._misses,
+                'stores': self._stores,
+                'evictions': self._evictions,
+                'bytes': self._get_bytes(),
+                'max_bytes': self.max_bytes}
+
+    def get(self, endpoint: str, params: dict) -> Optional[CachedResponse]:
+        """cache에 있는 응답을 반환한다. 없으면 None, REPLAY mode에서는 RuntimeError"""
+        if self.mode is ResponseCacheMode.RECORD:
+            return None
+        file_path = self._get_file_path(endpoint, params)
+        try:
+            content = file_path.read_bytes()
+        except FileNotFoundError:
+            with self._lock:
+                self._misses += 1
+            if self.mode is ResponseCacheMode.REPLAY:
+                raise RuntimeError(f"{endpoint} {params} is not in the response cache {self.path}")
+            return None
+        try:
+            os.utime(file_path)
+        except OSError:
+            pass
+        with self._lock:
+            self._hits += 1
+        return CachedResponse(content)
+
+    def put(self, endpoint: str, params: dict, content: bytes, now: Optional[pd.Timestamp] = None):
+        """응답을 저장한다. CACHE mode에서는 끝난 페이지만 저장한다."""
+        if self.mode is ResponseCacheMode.REPLAY:
+            return
+        if self.mode is ResponseCacheMode.CACHE and not self.is_closed(params, now):
+            return
+        file_path = self._get_file_path(endpoint, params)
+        with self._lock:
+            self._get_bytes()
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        with atomic_path(file_path, fsync=False) as tmp_path:
+            tmp_path.write_bytes(content)
+        with self._lock:
+            self._stores += 1
+            self._bytes += len(content)
+            over = self._bytes > self.max_bytes
+        if over:
+            self.evict()
+
+    @staticmethod
+    def is_closed(params: dict, now: Optional[pd.Timestamp] = None) -> bool:
+        """to가 지금 분의 시작 이전이라 페이지의 모든 캔들이 끝났는지"""
+        to = params.get('to')
+        if not to:
+            return False
+        now = pd.Timestamp.now(tz='UTC') if now is None else pd.Timestamp(now).tz_convert('UTC')
+        return pd.Timestamp(to, tz='UTC') <= now.floor('min')
+
+    def evict(self):
+        """크기 합이 max_bytes의 90% 이하가 될 때까지 가장 오래 쓰지 않은 파일부터 지운다."""
+        with self._lock:
+            files = [(stat.st_mtime_ns, stat.st_size, file_path) for file_path, stat in self._scan()]
+            total = sum(size for _, size, _ in files)
+            target = self.max_bytes * 0.9
+            for _, size, file_path in sorted(files):
+                if total <= target:
+                    break
+                try:
+                    file_path.unlink()
+                except FileNotFoundError:
+                    pass
+                total -= size
+                self._evictions += 1
+            self._bytes = total
+
+    def clear(self):
+        with self._lock:
+            for file_path, _ in self._scan():
+                file_path.unlink(missing_ok=True)
+            self._bytes = 0
+
+    def _get_file_path(self, endpoint: str, params: dict) -> Path:
+        market = params.get('market', '_')
+        to = params.get('to') or '_'
+        name = f"{to.replace(' ', 'T').replace(':', '')}_{params.get('count', '_')}.json"
+        directory = endpoint.strip('/').replace('/', '_')
+        if not all(c.isalnum() or c in '-_.' for c in market + name):
+            name = hashlib.sha1(f"{market}|{name}".encode()).hexdigest() + '.json'
+            market = '_'
+        return self.path / directory / market / name
+
+    def _get_bytes(self) -> int:
+        if self._bytes is None:
+            self._bytes = sum(stat.st_size for _, stat in self._scan())
+        return self._bytes
+
+    def _scan(self):
+        if not self.path.exists():
+            return
+        for file_path in self.path.rglob('*.json'):
+            try:
+                yield file_path, file_path.stat()
+            except FileNotFoundError:
+                continue
+
+
+_default_cache: Optional[UpbitResponseCache] = None
+
+
+def get_default_response_cache() -> Optional[UpbitResponseCache]:
+    """모든 Upbit 인스턴스가 같이 쓰는 응답 cache. 켜지 않았으면 None"""
+    return _default_cache
+
+
+def set_default_response_cache(cache: Optional[UpbitResponseCache]):
+    """모든 Upbit 인스턴스가 같이 쓸 응답 cache를 정한다. None이면 cache를 쓰지 않는다."""
+    global _default_cache
+    _default_cache = cache
@@ -0,0 +1,140 @@
+"""upbit api 호출에 쓰는 http transport
+
+모든 Upbit 인스턴스는 기본적으로 모듈에 하나 있는 transport를 공유한다.
+그래서 collector들은 따로 설정하지 않아도 연결 재사용과 요청 제한을 같이 쓴다.
+"""
+import random
+import threading
+import time
+from typing import Optional
+
+import requests
+from loguru import logger
+from requests.adapters import HTTPAdapter
+
+from .rate_limiter import TokenBucket
+from ..common import constants as consts
+from ..common.metrics import metrics
+
+
+class UpbitTransport:
+    """keep-alive 세션과 요청 제한, 재시도를 담당한다.
+
+    Notes:
+        세션:
+            requests.get을 매번 호출하면 요청마다 TCP, TLS 연결을 새로 맺는다.
+            세션을 하나 두고 연결을 재사용한다.
+
+        요청 제한:
+            upbit은 요청 그룹별로(market, candles 등) 초당 요청 수를 제한한다.
+            그룹마다 TokenBucket을 두고 응답의 Remaining-Req 헤더로 남은 수를 맞춘다.
+                Remaining-Req: group=candles; min=1799; sec=29
+
+        재시도:
+            429, 5xx, 연결 에러가 나면 지수적으로 늘어나는 시간에 jitter를 섞어서 쉰 뒤 다시 요청한다.
+            max_retries번 넘게 실패하면 RuntimeError를 낸다.
+
+        metrics:
+            요청마다 그룹, 상태 코드별 요청 수와 걸린 시간, 재시도 이유를 nd.metrics에 기록한다.
+    """
+    RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+    def __init__(self,
+                 max_retries: int = 8,
+                 backoff_base: float = 0.1,
+                 backoff_max: float = 5.0,
+                 pool_size: int = 32,
+                 timeout: float = 10.0,
+                 requests_per_sec: Optional[float] = None):
+        """
+
+        Args:
+            requests_per_sec:
+                그룹별 초당 요청 수. 지정하지 않으면 consts.Upbit.QUOTATION_REQUESTS_PER_SEC
+        """
+        self.max_retries = max_retries
+        self.requests_per_sec = requests_per_sec or consts.Upbit.QUOTATION_REQUESTS_PER_SEC
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self._session = requests.Session()
+        self._session.headers.update({"accept": "application/json"})
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
+        self._buckets: dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def get(self, url: str, params: Optional[dict] = None, group: str = 'default') -> requests.Response:
+        """요청 제한을 지키면서 GET 요청을 보내고 성공한 응답을 반환한다."""
+        bucket = self._get_bucket(group)
+        for attempt in range(self.max_retries + 1):
+            bucket.acquire()
+            started = time.perf_counter()
+            try:
+                response = self._session.get(url, params=params, timeout=self.timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                logger.debug(f"Something wrong. url: {url}, params: {params}. {e}")
+                metrics.inc('nodji_upbit_retries_total', group=group, reason=type(e).__name__)
+                self._sleep_backoff(attempt)
+                continue
+
+            metrics.inc('nodji_upbit_requests_total', group=group, status=response.status_code)
+            metrics.observe('nodji_upbit_request_seconds', time.perf_counter() - started, group=group)
+            self._sync_bucket(response)
+            if response.status_code in self.RETRY_STATUS_CODES:
+                logger.debug(f"Retry response. status: {response.status_code}, params: {params}")
+                metrics.inc('nodji_upbit_retries_total', group=group, reason=str(response.status_code))
+                self._sleep_backoff(attempt)
+                continue
+
+            response.raise_for_status()
+            return response
+
+        metrics.inc('nodji_upbit_failures_total', group=group)
+        raise RuntimeError(f"Failed to request {url} with {params} after {self.max_retries} retries.")
+
+    def close(self):
+        self._session.close()
+
+    def _get_bucket(self, group: str) -> TokenBucket:
+        with self._lock:
+            if group not in self._buckets:
+                self._buckets[group] = TokenBucket(self.requests_per_sec)
+            return self._buckets[group]
+
+    def _sync_bucket(self, response: requests.Response):
+        """Remaining-Req 헤더를 읽어서 해당 그룹의 bucket을 맞춘다."""
+        remaining_req = response.headers.get('Remaining-Req')
+        if not remaining_req:
+            return
+        values = dict(item.strip().split('=', 1) for item in remaining_req.split(';') if '=' in item)
+        if 'group' in values and 'sec' in values:
+            self._get_bucket(values['group']).sync(int(values['sec']))
+
+    def _sleep_backoff(self, attempt: int):
+        """마지막 시도가 실패했다면 다시 요청하지 않으므로 쉬지 않는다."""
+        if attempt >= self.max_retries:
+            return
+        delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+        time.sleep(random.uniform(delay / 2, delay))
+
+
+_default_transport = None
+_default_transport_lock = threading.Lock()
+
+
+def get_default_transport() -> UpbitTransport:
+    """모든 Upbit 인스턴스가 같이 쓰는 transport를 반환한다."""
+    global _default_transport
+    with _default_transport_lock:
+        if _default_transport is None:
+            _default_transport = UpbitTransport()
+        return _default_transport
+
+
+def set_default_transport(transport: Optional[UpbitTransport]):
+    """모든 Upbit 인스턴스가 같이 쓸 transport를 바꾼다. None이면 다음에 새로 만든다."""
+    global _default_transport
+    with _default_transport_lock:
+        _default_transport = transport
@@ -0,0 +1,98 @@
+"""upbit websocket 시세 스트림
+
+REST로 종목마다 최근 캔들을 받으면 종목 수만큼 요청이 필요하다.
+websocket은 연결 하나로 여러 종목의 체결(trade)을 실시간으로 받을 수 있다.
+
+websockets 패키지가 필요하다. (`pip install websockets`)
+"""
+import json
+import uuid
+from typing import Iterable, Optional
+
+
+def _import_websocket_client():
+    try:
+        from websockets.sync import client
+    except ImportError as e:
+        raise RuntimeError("websockets is required for upbit streaming. `pip install websockets`") from e
+    return client
+
+
+class UpbitWebSocket:
+    """upbit websocket 연결 하나
+
+    Notes:
+        url:
+            지정하지 않으면 URL을 쓴다. 테스트할 때는 로컬 replay 서버 주소를 넣는다.
+
+        수신:
+            recv는 timeout 동안 메시지가 없으면 None을 반환한다.
+            연결이 끊어지면 ConnectionError를 발생시킨다.
+            호출하는 쪽은 websockets의 예외를 몰라도 된다.
+
+    Example:
+        with UpbitWebSocket() as ws:
+            ws.subscribe(['KRW-BTC', 'KRW-ETH'])
+            message = ws.recv()
+    """
+    URL = 'wss://api.upbit.com/websocket/v1'
+
+    def __init__(self, url: Optional[str] = None, recv_timeout: float = 1.0, open_timeout: float = 10.0):
+        self.url = url or self.URL
+        self.recv_timeout = recv_timeout
+        self.open_timeout = open_timeout
+        self._connection = None
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def connect(self):
+        client = _import_websocket_client()
+        try:
+            self._connection = client.connect(self.url, open_timeout=self.open_timeout, max_size=None)
+        except Exception as e:
+            raise ConnectionError(f"failed to connect to {self.url}. {e}") from e
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def subscribe(self, codes: Iterable[str], types: Iterable[str] = ('trade',)):
+        """codes 종목들의 types 스트림을 구독한다.
+
+        is_only_realtime:
+            구독하자마자 오는 snapshot(마지막 체결)은 예전 체결일 수 있어서 받지 않는다.
+        """
+        codes = list(codes)
+        request = [{'ticket': str(uuid.uuid4())}]
+        request += [{'type': stream_type, 'codes': codes, 'is_only_realtime': True} for stream_type in types]
+        request.append({'format': 'DEFAULT'})
+        self._send(json.dumps(request))
+
+    def recv(self) -> Optional[dict]:
+        from websockets.exceptions import ConnectionClosed
+
+        if self._connection is None:
+            raise ConnectionError("websocket is not connected")
+        try:
+            message = self._connection.recv(timeout=self.recv_timeout)
+        except TimeoutError:
+            return None
+        except (ConnectionClosed, OSError) as e:
+            raise ConnectionError(f"websocket connection closed. {e}") from e
+        if isinstance(message, bytes):
+            message = message.decode('utf-8')
+        return json.loads(message)
+
+    def _send(self, message: str):
+        from websockets.exceptions import ConnectionClosed
+
+        try:
+            self._connection.send(message)
+        except (ConnectionClosed, OSError) as e:
+            raise ConnectionError(f"websocket connection closed. {e}") from e
@@ -0,0 +1,2 @@
+from .update_queue import TickerState, UpdateQueue
+from .update_scheduler import UpdateScheduler
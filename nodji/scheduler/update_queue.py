@@ -0,0 +1,131 @@
+"""업데이트 scheduler가 종목별 상태를 기록해두는 queue
+
+    db/.scheduler/queue.json
+
+scheduler가 멈췄다가 다시 시작해도 종목마다 어디까지 받았는지, 얼마나 거래가 많은지,
+과거 데이터를 어디까지 받았는지를 다시 계산하지 않는다.
+"""
+import json
+import math
+import threading
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+from typing import Iterable, Optional
+
+import nodji as nd
+from ..common.file_utils import atomic_path
+
+
+@dataclass
+class TickerState:
+    """종목 하나의 업데이트 상태
+
+    Notes:
+        last_end_ns:
+            저장된 데이터의 마지막 분 (epoch ns). 없으면 아직 받은 적이 없다.
+        last_synced:
+            마지막으로 최근 데이터(tail)를 받은 시간 (epoch sec)
+        liquidity:
+            최근 하루 거래대금(TradePrice 합). 우선 순위의 가중치로 쓴다.
+        backfill_before_ns:
+            과거 데이터를 이 시간 전까지 받아야 한다. (지금 가진 데이터의 처음 시간)
+        backfill_done:
+            상장 시간까지 모두 받았다.
+        failures, retry_at:
+            tail을 연속으로 실패한 횟수와 다시 시도할 시간 (epoch sec)
+        backfill_failures, backfill_retry_at:
+            backfill을 연속으로 실패한 횟수와 다시 시도할 시간. backfill이 실패해도 tail은 늦추지 않는다.
+    """
+    ticker: str
+    last_end_ns: Optional[int] = None
+    last_synced: float = 0.0
+    liquidity: float = 0.0
+    backfill_before_ns: Optional[int] = None
+    backfill_done: bool = False
+    failures: int = 0
+    retry_at: float = 0.0
+    backfill_failures: int = 0
+    backfill_retry_at: float = 0.0
+
+    def staleness(self, now: float) -> float:
+        """마지막 데이터가 지금보다 얼마나 뒤처졌는지 (초). 받은 적이 없으면 inf"""
+        if self.last_end_ns is None:
+            return math.inf
+        return max(0.0, now - self.last_end_ns / 1e9)
+
+    def priority(self, now: float) -> float:
+        """staleness * 거래대금 가중치. 클수록 먼저 업데이트 한다.
+
+        거래대금은 종목마다 몇 자리씩 차이가 나므로 log로 줄여서
+        거래가 적은 종목도 충분히 뒤처지면 차례가 오게 한다.
+        """
+        return self.staleness(now) * (1 + math.log10(1 + self.liquidity / 1e6))
+
+
+class UpdateQueue:
+    """종목별 TickerState를 모아서 다음에 할 일을 고르고 파일에 저장한다."""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path is not None else nd.Paths.DATABASE / '.scheduler' / 'queue.json'
+        self._states: dict[str, TickerState] = {}
+        self._lock = threading.Lock()
+        if self.path.exists():
+            self._load()
+
+    def __len__(self):
+        return len(self._states)
+
+    def __contains__(self, ticker: str):
+        return ticker in self._states
+
+    def __getitem__(self, ticker: str) -> TickerState:
+        return self._states[ticker]
+
+    def __repr__(self):
+        return f"UpdateQueue({len(self)} tickers, {self.path})"
+
+    @property
+    def states(self) -> list[TickerState]:
+        with self._lock:
+            return list(self._states.values())
+
+    def sync_tickers(self, tickers: Iterable[str]):
+        """업데이트 할 종목들을 tickers로 맞춘다. 새 종목은 추가하고 빠진 종목은 지운다."""
+        tickers = list(tickers)
+        with self._lock:
+            for ticker in tickers:
+                if ticker not in self._states:
+                    self._states[ticker] = TickerState(ticker)
+            for ticker in set(self._states) - set(tickers):
+                del self._states[ticker]
+
+    def next_tail(self, now: float, interval: float, busy: set[str]) -> Optional[TickerState]:
+        """tail을 받을 때가 된 종목 중 우선 순위가 가장 높은 종목"""
+        with self._lock:
+            due = [state for state in self._states.values()
+                   if state.ticker not in busy and now - state.last_synced >= interval and now >= state.retry_at]
+        return max(due, key=lambda state: state.priority(now), default=None)
+
+    def next_backfill(self, now: float, busy: set[str]) -> Optional[TickerState]:
+        """과거 데이터가 남은 종목 중 거래대금이 가장 많은 종목
+
+        tail을 한번도 받지 않은 종목은 어디부터 받아야 할지 모르므로 고르지 않는다.
+        """
+        with self._lock:
+            candidates = [state for state in self._states.values()
+                          if state.ticker not in busy and not state.backfill_done
+                          and state.backfill_before_ns is not None and now >= state.backfill_retry_at]
+        return max(candidates, key=lambda state: state.liquidity, default=None)
+
+    def save(self):
+        with self._lock:
+            content = json.dumps({'tickers': [asdict(state) for state in self._states.values()]}, indent=1)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with atomic_path(self.path) as tmp_path:
+            tmp_path.write_text(content)
+
+    def _load(self):
+        names = {f.name for f in fields(TickerState)}
+        for item in json.loads(self.path.read_text()).get('tickers', []):
+            state = TickerState(**{key: value for key, value in item.items() if key in names})
+            self._states[state.ticker] = state
@@ -0,0 +1,262 @@
+"""종목 전체의 가격을 계속 최신으로 유지하는 scheduler
+
+종목 하나씩 손으로 update_price를 부르거나 전체를 처음부터 다시 도는 대신
+종목마다 얼마나 뒤처졌는지와 거래대금으로 순서를 정해서 조금씩 계속 받는다.
+"""
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Iterable, Optional, TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+import nodji as nd
+from .update_queue import TickerState, UpdateQueue
+from ..common.metrics import metrics
+from ..data.collectors.price_collectors.coin_price_collector import CoinPriceCollector
+
+if TYPE_CHECKING:
+    from ..assets.coin import Coin
+
+TAIL = 'tail'
+BACKFILL = 'backfill'
+
+
+class UpdateScheduler:
+    """코인들의 가격을 우선 순위에 따라 계속 업데이트 한다.
+
+    Notes:
+        tail:
+            종목마다 tail_interval초에 한번씩 마지막 데이터부터 지금까지 받는다.
+            받을 때가 된 종목들 중에서는 staleness * 거래대금 가중치가 큰 종목부터 받는다.
+            (TickerState.priority 참고)
+            한번도 받은 적이 없는 종목은 최근 first_tail 만큼만 받고 나머지는 backfill로 넘긴다.
+
+        backfill:
+            가진 데이터의 처음 시간부터 상장 시간까지 backfill_chunk씩 과거로 받는다.
+            받을 때가 된 tail이 하나라도 남아 있으면 backfill을 시작하지 않는다.
+            한번에 backfill_chunk만 받으므로 backfill이 worker를 오래 잡고 있지 않는다.
+
+        요청 제한:
+            요청 제한은 transport가 모든 worker와 같이 지킨다.
+            KRW 마켓 200여개를 1분마다 받아도 종목당 1~2번의 요청이라 초당 10번 안에 들어간다.
+
+        queue:
+            종목별 상태는 UpdateQueue로 save_interval초마다, 그리고 멈출 때 저장한다.
+            다시 시작하면 저장된 상태부터 이어서 한다.
+
+        멈추기:
+            stop을 부르면 새 작업을 시작하지 않고 진행 중인 작업이 끝나길 기다린 뒤 queue를 저장한다.
+            signal handler에서 불러도 된다. (execute/update_scheduler_exec.py 참고)
+
+        종목:
+            coins를 넣지 않으면 KRW 마켓 전체를 업데이트 하고
+            items_interval초마다 종목 정보를 업데이트 해서 새로 상장한 종목을 추가한다.
+    """
+
+    def __init__(self,
+                 coins: Optional[Iterable['Coin']] = None,
+                 queue: Optional[UpdateQueue] = None,
+                 tail_interval: float = 60.0,
+                 tail_workers: int = 4,
+                 tail_jobs: int = 4,
+                 backfill_workers: int = 1,
+                 backfill_chunk: pd.Timedelta = pd.Timedelta(days=1),
+                 backfill_jobs: int = 4,
+                 first_tail: pd.Timedelta = pd.Timedelta(days=1),
+                 items_interval: float = 3600.0,
+                 save_interval: float = 10.0,
+                 status_interval: float = 60.0,
+                 retry_delay: float = 10.0,
+                 max_retry_delay: float = 600.0,
+                 poll_interval: float = 0.5,
+                 clock: Callable[[], float] = time.time):
+        self._fixed_coins = coins is not None
+        self._coins: dict[str, 'Coin'] = {coin.ticker: coin for coin in coins} if coins is not None else {}
+        self.queue = queue if queue is not None else UpdateQueue()
+        self.tail_interval = tail_interval
+        self.tail_workers = tail_workers
+        self.tail_jobs = tail_jobs
+        self.backfill_workers = backfill_workers
+        self.backfill_chunk = pd.Timedelta(backfill_chunk)
+        self.backfill_jobs = backfill_jobs
+        self.first_tail = pd.Timedelta(first_tail)
+        self.items_interval = items_interval
+        self.save_interval = save_interval
+        self.status_interval = status_interval
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.poll_interval = poll_interval
+        self._clock = clock
+        self._stop = threading.Event()
+        self._futures: dict[Future, tuple[str, TickerState]] = {}
+        self._last_items = -np.inf
+        self._last_save = -np.inf
+        self._last_status = -np.inf
+        if self._fixed_coins:
+            self.queue.sync_tickers(self._coins)
+
+    def stop(self):
+        """run을 멈춘다. 다른 스레드나 signal handler에서 호출한다."""
+        self._stop.set()
+
+    def run(self, duration: Optional[float] = None):
+        """stop이 호출될 때까지 (혹은 duration초 동안) 업데이트 한다."""
+        self._stop.clear()
+        deadline = None if duration is None else self._clock() + duration
+        with ThreadPoolExecutor(max_workers=self.tail_workers + self.backfill_workers) as executor:
+            try:
+                while not self._stop.is_set() and (deadline is None or self._clock() < deadline):
+                    now = self._clock()
+                    self._refresh_coins(now)
+                    self._dispatch(executor, now)
+                    if self._futures:
+                        done, _ = wait(self._futures, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            self._finish(future)
+                    else:
+                        self._stop.wait(self.poll_interval)
+                    self._save_periodically(self._clock())
+            finally:
+                if self._futures:
+                    logger.info(f"waiting for {len(self._futures)} running updates to finish")
+                for future in list(self._futures):
+                    future.exception()
+                    self._finish(future)
+                self.queue.save()
+                logger.info(f"update scheduler stopped. {self.status()}")
+
+    def status(self, now: Optional[float] = None) -> dict:
+        """종목들이 지금보다 얼마나 뒤처졌는지(초)와 남은 backfill 수"""
+        now = self._clock() if now is None else now
+        states = self.queue.states
+        staleness = np.array([state.staleness(now) for state in states if state.last_end_ns is not None])
+        return {'tickers': len(states),
+                'synced': len(staleness),
+                'running': len(self._futures),
+                'staleness_p50': float(np.median(staleness)) if len(staleness) else None,
+                'staleness_max': float(staleness.max()) if len(staleness) else None,
+                'stale_over_120s': int((staleness > 120).sum()),
+                'backfill_remaining': sum(not state.backfill_done for state in states)}
+
+    def _refresh_coins(self, now: float):
+        """coins를 넣지 않았다면 items_interval마다 종목 정보를 업데이트 하고 KRW 마켓 종목들로 맞춘다."""
+        if self._fixed_coins or now - self._last_items < self.items_interval:
+            return
+        self._last_items = now
+        coins = nd.Assets().coins
+        try:
+            coins.update_item()
+        except Exception as e:
+            logger.error(f"failed to update coin items. {e}")
+        self._coins = {coin.ticker: coin for coin in coins.by_quote('KRW')}
+        self.queue.sync_tickers(self._coins)
+        logger.info(f"update scheduler tracks {len(self._coins)} coins")
+
+    def _dispatch(self, executor: ThreadPoolExecutor, now: float):
+        """빈 worker에 tail을 먼저 채우고, 받을 때가 된 tail이 없을 때만 backfill을 채운다."""
+        busy = {state.ticker for _, state in self._futures.values()}
+        running = [lane for lane, _ in self._futures.values()]
+
+        for _ in range(self.tail_workers - running.count(TAIL)):
+            state = self.queue.next_tail(now, self.tail_interval, busy)
+            if state is None:
+                break
+            self._submit(executor, TAIL, state, busy)
+
+        if self.queue.next_tail(now, self.tail_interval, busy) is not None:
+            return
+        for _ in range(self.backfill_workers - running.count(BACKFILL)):
+            state = self.queue.next_backfill(now, busy)
+            if state is None:
+                break
+            self._submit(executor, BACKFILL, state, busy)
+
+    def _submit(self, executor: ThreadPoolExecutor, lane: str, state: TickerState, busy: set[str]):
+        task = self._sync_tail if lane == TAIL else self._backfill
+        self._futures[executor.submit(task, state)] = (lane, state)
+        busy.add(state.ticker)
+
+    def _finish(self, future: Future):
+        lane, state = self._futures.pop(future)
+        error = future.exception()
+        now = self._clock()
+        if lane == TAIL:
+            state.last_synced = now
+        if error is None:
+            if lane == TAIL:
+                state.failures = 0
+            else:
+                state.backfill_failures = 0
+            metrics.inc('nodji_scheduler_tasks_total', lane=lane, result='succeeded')
+            return
+
+        metrics.inc('nodji_scheduler_tasks_total', lane=lane, result='failed')
+        if lane == TAIL:
+            state.failures += 1
+            state.retry_at = now + self._get_retry_delay(state.failures)
+            failures = state.failures
+        else:
+            state.backfill_failures += 1
+            state.backfill_retry_at = now + self._get_retry_delay(state.backfill_failures)
+            failures = state.backfill_failures
+        logger.error(f"{state.ticker} {lane} update failed ({failures} times). {error}")
+
+    def _get_retry_delay(self, failures: int) -> float:
+        return min(self.max_retry_delay, self.retry_delay * 2 ** (failures - 1))
+
+    def _sync_tail(self, state: TickerState):
+        """마지막 데이터부터 지금까지 받는다."""
+        coin = self._coins[state.ticker]
+        price = coin.price
+        if state.last_end_ns is None:
+            end_time = price.end_time
+            state.last_end_ns = end_time.ns if end_time else None
+
+        if state.last_end_ns is None:
+            start_time = nd.NTime.get_current_time().shift(seconds=-self.first_tail.total_seconds())
+        else:
+            start_time = nd.NTime.from_ns(state.last_end_ns)
+        coin.update_price(start_time=start_time, jobs=self.tail_jobs)
+
+        end_time = price.end_time
+        if end_time:
+            state.last_end_ns = end_time.ns
+            state.liquidity = self._get_liquidity(coin, end_time)
+        if state.backfill_before_ns is None:
+            first_time = price.start_time
+            state.backfill_before_ns = first_time.ns if first_time else None
+
+    def _backfill(self, state: TickerState):
+        """가진 데이터의 처음 시간 이전을 backfill_chunk 만큼 받는다."""
+        coin = self._coins[state.ticker]
+        before = nd.NTime.from_ns(state.backfill_before_ns)
+        listing_time = CoinPriceCollector(coin.price).find_listing_time(before)
+        if not listing_time or listing_time >= before:
+            state.backfill_done = True
+            return
+
+        start_time = before.shift(seconds=-self.backfill_chunk.total_seconds())
+        if start_time <= listing_time:
+            start_time = listing_time
+        end_time = before.shift(minutes=-1)
+        if start_time < end_time:
+            coin.update_price(start_time=start_time, end_time=end_time, jobs=self.backfill_jobs)
+        state.backfill_before_ns = start_time.ns
+        state.backfill_done = start_time <= listing_time
+
+    @staticmethod
+    def _get_liquidity(coin: 'Coin', end_time: 'nd.NTime') -> float:
+        """end_time까지 최근 하루 동안의 거래대금"""
+        df = coin.price.load(end_time.shift(days=-1), end_time, columns=['TradePrice'])
+        return float(df['TradePrice'].sum()) if 'TradePrice' in df else 0.0
+
+    def _save_periodically(self, now: float):
+        if now - self._last_save >= self.save_interval:
+            self._last_save = now
+            self.queue.save()
+        if now - self._last_status >= self.status_interval:
+            self._last_status = now
+            logger.info(f"update scheduler {self.status(now)}")